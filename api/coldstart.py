@@ -0,0 +1,144 @@
+"""
+Cold-start benchmark and import-time report for the serverless entry point.
+
+Each run starts a fresh interpreter that imports api/index.py and serves one
+request through the WSGI app, the way a new Vercel instance does. The first
+request counts because URLconfs, views and serializers are imported then.
+Runs go against a throwaway SQLite database holding one user, so the
+authenticated path exercises JWT auth and the ORM.
+
+    python api/coldstart.py                      # compare settings profiles
+    python api/coldstart.py --runs 20 --path /api/notifications/
+    python api/coldstart.py --importtime         # per-module import cost
+
+Bytecode is compiled before the first run, so runs measure imports and
+setup rather than compilation.
+"""
+import argparse
+import io
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BACKEND = os.path.join(ROOT, 'backend')
+PROFILES = ['config.settings', 'config.api_settings']
+
+
+def child(path, token):
+    """Runs in the measured interpreter: import the entry point, serve one request."""
+    started = time.perf_counter()
+    sys.path.insert(0, os.path.join(ROOT, 'api'))
+    import index
+    imported = time.perf_counter()
+    environ = {
+        'REQUEST_METHOD': 'GET', 'PATH_INFO': path, 'QUERY_STRING': '', 'SERVER_NAME': 'localhost',
+        'SERVER_PORT': '443', 'HTTP_HOST': 'localhost', 'wsgi.url_scheme': 'https', 'wsgi.input': io.BytesIO(),
+        'wsgi.errors': sys.stderr,
+    }
+    if token:
+        environ['HTTP_AUTHORIZATION'] = f'Bearer {token}'
+    statuses = []
+    b''.join(index.app(environ, lambda status, headers, exc_info=None: statuses.append(status)))
+    served = time.perf_counter()
+    print(json.dumps({'status': statuses[0], 'import_ms': (imported - started) * 1000,
+                      'request_ms': (served - imported) * 1000}))
+
+
+def setup_database(env):
+    """Migrate a throwaway database and mint a token for a fresh user."""
+    script = (
+        'import django; django.setup()\n'
+        'from django.core.management import call_command\n'
+        'call_command("migrate", verbosity=0)\n'
+        'from users.models import User\n'
+        'from users.tokens import RefreshToken\n'
+        'user = User.objects.create_user(username="coldstart", password="coldstart", role="buyer")\n'
+        'print(RefreshToken.for_user(user).access_token)\n'
+    )
+    result = subprocess.run([sys.executable, '-c', script], env={**env, 'DJANGO_SETTINGS_MODULE': 'config.settings'},
+                            cwd=BACKEND, capture_output=True, text=True, check=True)
+    return result.stdout.strip().splitlines()[-1]
+
+
+def run(settings, path, token, env, importtime=False):
+    command = [sys.executable, *(['-X', 'importtime'] if importtime else []), os.path.abspath(__file__),
+               '--child', '--path', path, '--token', token or '']
+    started = time.perf_counter()
+    result = subprocess.run(command, env={**env, 'DJANGO_SETTINGS_MODULE': settings},
+                            capture_output=True, text=True, check=True)
+    measured = json.loads(result.stdout.strip().splitlines()[-1])
+    measured['total_ms'] = (time.perf_counter() - started) * 1000
+    return measured, result.stderr
+
+
+def importtime_report(stderr, top):
+    """Self and cumulative import time per module, plus self time per top-level package."""
+    modules = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        modules.append((int(self_us), int(cumulative_us), name.strip()))
+    packages = {}
+    for self_us, _, name in modules:
+        package = name.split('.')[0]
+        packages[package] = packages.get(package, 0) + self_us
+    lines = [f'{"cumulative ms":>14} {"self ms":>8}  module']
+    for self_us, cumulative_us, name in sorted(modules, key=lambda row: -row[1])[:top]:
+        lines.append(f'{cumulative_us / 1000:14.1f} {self_us / 1000:8.1f}  {name}')
+    lines += ['', f'{"self ms":>14}  package']
+    for package, self_us in sorted(packages.items(), key=lambda item: -item[1])[:top]:
+        lines.append(f'{self_us / 1000:14.1f}  {package}')
+    return '\n'.join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--settings', action='append', help=f'Settings profile to measure (default: {", ".join(PROFILES)})')
+    parser.add_argument('--path', default='/api/auth/profile/', help='Path of the first request')
+    parser.add_argument('--anonymous', action='store_true', help='Send the request without a token')
+    parser.add_argument('--runs', type=int, default=10)
+    parser.add_argument('--importtime', action='store_true', help='Print the import-time report for one run per profile')
+    parser.add_argument('--top', type=int, default=25, help='Rows in the import-time report')
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument('--token', default='', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        return child(args.path, args.token)
+
+    subprocess.run([sys.executable, '-m', 'compileall', '-q', BACKEND, os.path.join(ROOT, 'api')], check=False)
+    with tempfile.TemporaryDirectory() as tmp:
+        env = {**os.environ, 'DATABASE_URL': f'sqlite:///{os.path.join(tmp, "coldstart.sqlite3")}',
+               'NOTIFICATION_OUTBOX_EAGER': 'False', 'AUDITLOG_ENABLED': 'False', 'PYTHONPATH': BACKEND}
+        env.pop('DJANGO_SETTINGS_MODULE', None)
+        token = None if args.anonymous else setup_database(env)
+        if args.anonymous:
+            subprocess.run([sys.executable, '-c', 'import django; django.setup()\n'
+                            'from django.core.management import call_command; call_command("migrate", verbosity=0)'],
+                           env={**env, 'DJANGO_SETTINGS_MODULE': 'config.settings'}, cwd=BACKEND, check=True)
+
+        for settings in args.settings or PROFILES:
+            if args.importtime:
+                _, stderr = run(settings, args.path, token, env, importtime=True)
+                print(f'== {settings}: import time ==')
+                print(importtime_report(stderr, args.top))
+                print()
+                continue
+            samples = [run(settings, args.path, token, env)[0] for _ in range(args.runs)]
+            status = {sample['status'] for sample in samples}
+            print(
+                f'{settings}: {args.path} [{", ".join(sorted(status))}] over {args.runs} runs, median '
+                f'import {statistics.median(s["import_ms"] for s in samples):.0f} ms + '
+                f'first request {statistics.median(s["request_ms"] for s in samples):.0f} ms = '
+                f'{statistics.median(s["import_ms"] + s["request_ms"] for s in samples):.0f} ms '
+                f'(process wall {statistics.median(s["total_ms"] for s in samples):.0f} ms)'
+            )
+
+
+if __name__ == '__main__':
+    main()
@@ -10,8 +10,9 @@ backend_dir = os.path.join(BASE_DIR, 'backend')
 if backend_dir not in sys.path:
     sys.path.insert(0, backend_dir)
 
-# Set environment variables
-os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+# Set environment variables; the API-only profile keeps cold starts short
+# (see config/api_settings.py and api/coldstart.py)
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.api_settings')
 os.environ['VERCEL'] = '1'
 
 # Initialize Django
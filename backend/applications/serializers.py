@@ -19,6 +19,7 @@ class ApplicationSerializer(serializers.ModelSerializer):
         model = Application
         fields = '__all__'
         read_only_fields = ['provider', 'created_at', 'updated_at', 'chat_thread']
+        select_related = ('request',)
     
     def get_request_data(self, obj):
         # Add safety check to prevent errors during creation
@@ -39,6 +40,6 @@ class ApplicationSerializer(serializers.ModelSerializer):
     
     def get_chat_thread_id(self, obj):
         # Add safety check
-        if not obj or not hasattr(obj, 'chat_thread'):
+        if not obj or not hasattr(obj, 'chat_thread_id'):
             return None
-        return obj.chat_thread.id if obj.chat_thread else None
+        return obj.chat_thread_id
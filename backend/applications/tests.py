@@ -4,6 +4,7 @@ from providers.models import ProviderProfile
 from service_requests.models import ServiceRequest
 from buyers.models import BuyerProfile
 from users.models import User
+from core.testing import QueryBudgetMixin
 
 class ApplicationTest(TestCase):
     def test_create_application(self):
@@ -15,3 +16,86 @@ class ApplicationTest(TestCase):
         app = Application.objects.create(request=req, provider=provider, pitch='Choose me', status='submitted')
         self.assertEqual(app.pitch, 'Choose me')
         self.assertEqual(app.status, 'submitted')
+
+
+class ApplicationQueryBudgetTest(QueryBudgetMixin, TestCase):
+    def test_list_query_count_is_independent_of_page_size(self):
+        from rest_framework.test import APIClient
+        user = User.objects.create(username='budgetbuyer', role='buyer')
+        buyer = BuyerProfile.objects.create(user=user, company_name='TestCo', industry='Tech', contact_person_name='Alice')
+        provider_user = User.objects.create(username='budgetprovider', role='provider')
+        provider = ProviderProfile.objects.create(user=provider_user, base_location='Berlin', education='BSc', years_experience=5, hourly_rate_eur=50)
+
+        def make_row():
+            req = ServiceRequest.objects.create(buyer=buyer, title='Test', machine_type='TypeA', serial_number='123', customer_company_name='TestCo', customer_address='Addr', contact_person_name='Alice', contact_email='alice@test.com', contact_phone='123', service_types=['repair'], issue_description='Issue', urgency='high', preferred_date='2025-08-21', budget_eur=100, payment_method='bank_transfer')
+            Application.objects.create(request=req, provider=provider, pitch='Choose me')
+
+        client = APIClient()
+        client.force_authenticate(user)
+        # buyer profile lookup, ETag validator, COUNT, page
+        self.assertListQueryBudget(client, '/api/applications/', 4, make_row)
+
+
+class ApplicationProfileLookupTest(TestCase):
+    def setUp(self):
+        from rest_framework.test import APIClient
+        buyer_user = User.objects.create(username='lookupbuyer', role='buyer')
+        self.buyer = BuyerProfile.objects.create(user=buyer_user, company_name='TestCo', industry='Tech', contact_person_name='Alice')
+        self.request = ServiceRequest.objects.create(buyer=self.buyer, title='Test', machine_type='TypeA', serial_number='123', customer_company_name='TestCo', customer_address='Addr', contact_person_name='Alice', contact_email='alice@test.com', contact_phone='123', service_types=['repair'], issue_description='Issue', urgency='high', preferred_date='2025-08-21', budget_eur=100, payment_method='bank_transfer')
+        provider_user = User.objects.create(username='lookupprovider', role='provider')
+        self.provider = ProviderProfile.objects.create(user=provider_user, base_location='Berlin', education='BSc', years_experience=5, hourly_rate_eur=50)
+        self.buyer_client = APIClient()
+        self.buyer_client.force_authenticate(buyer_user)
+        self.provider_client = APIClient()
+        self.provider_client.force_authenticate(provider_user)
+
+    def profile_lookups(self, queries, table):
+        return [q['sql'] for q in queries if f'FROM "{table}" WHERE "{table}"."user_id" = ' in q['sql']]
+
+    def test_create_looks_up_provider_profile_once(self):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.provider_client.post('/api/applications/', {'request': self.request.id, 'pitch': 'Choose me'})
+        self.assertEqual(response.status_code, 201, response.content)
+        self.assertEqual(len(self.profile_lookups(ctx.captured_queries, 'providers_providerprofile')), 1)
+        self.assertEqual(Application.objects.get().provider, self.provider)
+
+    def test_accept_looks_up_buyer_profile_once(self):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        application = Application.objects.create(request=self.request, provider=self.provider, pitch='Choose me')
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.buyer_client.post(f'/api/applications/{application.id}/accept/')
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(len(self.profile_lookups(ctx.captured_queries, 'buyers_buyerprofile')), 1)
+
+    def test_accept_requires_own_request(self):
+        other_user = User.objects.create(username='otherbuyer', role='buyer')
+        BuyerProfile.objects.create(user=other_user, company_name='Other', industry='Tech', contact_person_name='Bob')
+        application = Application.objects.create(request=self.request, provider=self.provider, pitch='Choose me')
+        self.buyer_client.force_authenticate(other_user)
+        response = self.buyer_client.post(f'/api/applications/{application.id}/accept/')
+        self.assertEqual(response.status_code, 404)
+
+
+class ApplicationConditionalGetTest(TestCase):
+    def test_etag_follows_the_embedded_request(self):
+        from rest_framework.test import APIClient
+        user = User.objects.create(username='etagappbuyer', role='buyer')
+        buyer = BuyerProfile.objects.create(user=user, company_name='TestCo', industry='Tech', contact_person_name='Alice')
+        provider_user = User.objects.create(username='etagappprovider', role='provider')
+        provider = ProviderProfile.objects.create(user=provider_user, base_location='Berlin', education='BSc', years_experience=5, hourly_rate_eur=50)
+        req = ServiceRequest.objects.create(buyer=buyer, title='Test', machine_type='TypeA', serial_number='123', customer_company_name='TestCo', customer_address='Addr', contact_person_name='Alice', contact_email='alice@test.com', contact_phone='123', service_types=['repair'], issue_description='Issue', urgency='high', preferred_date='2025-08-21', budget_eur=100, payment_method='bank_transfer')
+        application = Application.objects.create(request=req, provider=provider, pitch='Choose me')
+        client = APIClient()
+        client.force_authenticate(provider_user)
+
+        for url in ('/api/applications/', f'/api/applications/{application.id}/'):
+            etag = client.get(url)['ETag']
+            self.assertEqual(client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+            req.title = f'Renamed for {url}'
+            req.save()
+            response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, 200)
+            self.assertIn('Renamed', response.content.decode())
@@ -2,31 +2,30 @@ from rest_framework import viewsets, permissions, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.exceptions import ValidationError, PermissionDenied
+from django.db import transaction
 from django.http import JsonResponse
 from .models import Application
 from .serializers import ApplicationSerializer
-from providers.models import ProviderProfile
+from core.mixins import ConditionalGetMixin, SerializerRelationsMixin
+from notifications.outbox import enqueue
+from users.profiles import get_role_profile
 
-class ApplicationViewSet(viewsets.ModelViewSet):
+class ApplicationViewSet(SerializerRelationsMixin, ConditionalGetMixin, viewsets.ModelViewSet):
     serializer_class = ApplicationSerializer
     permission_classes = [permissions.IsAuthenticated]
+    # The serializer embeds the service request's fields
+    conditional_timestamp_fields = ('updated_at', 'request__updated_at')
     
     def get_queryset(self):
         queryset = Application.objects.none()
         status_param = self.request.query_params.get('status')
-        if self.request.user.role == 'provider':
-            try:
-                provider_profile = ProviderProfile.objects.get(user=self.request.user)
-                queryset = Application.objects.filter(provider=provider_profile)
-            except ProviderProfile.DoesNotExist:
-                queryset = Application.objects.none()
+        profile = get_role_profile(self.request)
+        if profile is None:
+            queryset = Application.objects.none()
+        elif self.request.user.role == 'provider':
+            queryset = Application.objects.filter(provider=profile)
         elif self.request.user.role == 'buyer':
-            from buyers.models import BuyerProfile
-            try:
-                buyer_profile = BuyerProfile.objects.get(user=self.request.user)
-                queryset = Application.objects.filter(request__buyer=buyer_profile)
-            except BuyerProfile.DoesNotExist:
-                queryset = Application.objects.none()
+            queryset = Application.objects.filter(request__buyer=profile)
         # Apply status filter if present
         if status_param and status_param != 'all':
             queryset = queryset.filter(status=status_param)
@@ -54,12 +53,11 @@ class ApplicationViewSet(viewsets.ModelViewSet):
                 return Response({'detail': 'Only providers can submit applications'}, status=403)
             
             # Check if provider profile exists
-            try:
-                provider_profile = ProviderProfile.objects.get(user=request.user)
-                logger.info(f"Provider profile found: {provider_profile.id}")
-            except ProviderProfile.DoesNotExist:
+            provider_profile = get_role_profile(request, 'provider')
+            if provider_profile is None:
                 logger.error("Provider profile not found")
                 return Response({'detail': 'Provider profile required'}, status=400)
+            logger.info(f"Provider profile found: {provider_profile.id}")
             
             # Create serializer
             serializer = self.get_serializer(data=request.data)
@@ -102,34 +100,19 @@ class ApplicationViewSet(viewsets.ModelViewSet):
                 logger.error(f"User with role {self.request.user.role} tried to create application")
                 raise ValidationError("Only providers can submit applications")
             
-            provider_profile = ProviderProfile.objects.get(user=self.request.user)
+            provider_profile = get_role_profile(self.request, 'provider')
+            if provider_profile is None:
+                logger.error("Provider profile not found")
+                raise ValidationError("Provider profile required to submit application")
             logger.info(f"Found provider profile: {provider_profile}")
             logger.info(f"Request data: {serializer.validated_data}")
             
-            # Save the application 
-            application = serializer.save(provider=provider_profile)
+            # Save the application and queue the buyer's notification together
+            with transaction.atomic():
+                application = serializer.save(provider=provider_profile)
+                enqueue('new_application', {'application_id': application.id})
             logger.info(f"Application saved successfully: {application.id}")
             
-            # Create notification for the buyer
-            try:
-                from notifications.models import Notification
-                Notification.objects.create(
-                    user=application.request.buyer.user,
-                    type='new_application',
-                    payload={
-                        'application_id': application.id,
-                        'request_title': application.request.title,
-                        'provider_name': provider_profile.user.first_name + ' ' + provider_profile.user.last_name
-                    }
-                )
-                logger.info("Notification created successfully")
-            except Exception as e:
-                logger.error(f"Failed to create notification: {e}")
-                # Don't fail the application creation if notification fails
-            
-        except ProviderProfile.DoesNotExist:
-            logger.error("Provider profile not found")
-            raise ValidationError("Provider profile required to submit application")
         except Exception as e:
             logger.error(f"Error in perform_create: {e}")
             logger.error(f"Serializer errors: {serializer.errors}")
@@ -137,69 +120,51 @@ class ApplicationViewSet(viewsets.ModelViewSet):
     
     @action(detail=True, methods=['post'], permission_classes=[permissions.IsAuthenticated])
     def accept(self, request, pk=None):
-        from notifications.models import Notification
         application = self.get_object()
         
         # Only the buyer who posted the service request can accept applications
         if request.user.role != 'buyer':
             raise PermissionDenied("Only buyers can accept applications")
         
-        try:
-            from buyers.models import BuyerProfile
-            buyer_profile = BuyerProfile.objects.get(user=request.user)
-            if application.request.buyer != buyer_profile:
-                raise PermissionDenied("You can only accept applications for your own requests")
-        except BuyerProfile.DoesNotExist:
+        buyer_profile = get_role_profile(request, 'buyer')
+        if buyer_profile is None:
             raise PermissionDenied("Buyer profile required")
+        if application.request.buyer_id != buyer_profile.id:
+            raise PermissionDenied("You can only accept applications for your own requests")
         
-        application.status = 'accepted'
-        application.save()
-        
-        # Optionally update service request status
-        service_request = application.request
-        service_request.status = 'in_progress'
-        service_request.save()
-        
-        # Notify provider
-        Notification.objects.create(
-            user=application.provider.user,
-            type='application_accepted',
-            payload={
-                'application_id': application.id,
-                'request_title': application.request.title
-            }
-        )
+        with transaction.atomic():
+            application.status = 'accepted'
+            application.save()
+            
+            # Optionally update service request status
+            service_request = application.request
+            service_request.status = 'in_progress'
+            service_request.save()
+            
+            # Notify provider
+            enqueue('application_accepted', {'application_id': application.id})
         
         return Response({'detail': 'Application accepted successfully'})
     
     @action(detail=True, methods=['post'], permission_classes=[permissions.IsAuthenticated])
     def reject(self, request, pk=None):
-        from notifications.models import Notification
         application = self.get_object()
         
         # Only the buyer who posted the service request can reject applications
         if request.user.role != 'buyer':
             raise PermissionDenied("Only buyers can reject applications")
         
-        try:
-            from buyers.models import BuyerProfile
-            buyer_profile = BuyerProfile.objects.get(user=request.user)
-            if application.request.buyer != buyer_profile:
-                raise PermissionDenied("You can only reject applications for your own requests")
-        except BuyerProfile.DoesNotExist:
+        buyer_profile = get_role_profile(request, 'buyer')
+        if buyer_profile is None:
             raise PermissionDenied("Buyer profile required")
+        if application.request.buyer_id != buyer_profile.id:
+            raise PermissionDenied("You can only reject applications for your own requests")
         
-        application.status = 'rejected'
-        application.save()
-        
-        # Notify provider
-        Notification.objects.create(
-            user=application.provider.user,
-            type='application_rejected',
-            payload={
-                'application_id': application.id,
-                'request_title': application.request.title
-            }
-        )
+        with transaction.atomic():
+            application.status = 'rejected'
+            application.save()
+            
+            # Notify provider
+            enqueue('application_rejected', {'application_id': application.id})
         
         return Response({'detail': 'Application rejected successfully'})
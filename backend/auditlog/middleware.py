@@ -0,0 +1,79 @@
+import ipaddress
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from rest_framework.throttling import BaseThrottle
+
+from .writer import audit_settings, get_writer
+
+MUTATING_METHODS = {'POST', 'PUT', 'PATCH', 'DELETE'}
+ACTIONS = {'POST': 'create', 'PUT': 'update', 'PATCH': 'partial_update', 'DELETE': 'delete'}
+
+
+def client_ip(request):
+    # The proxy-appended X-Forwarded-For entry per REST_FRAMEWORK['NUM_PROXIES'],
+    # like the DRF throttles; the leftmost entry is whatever the client sent.
+    candidate = BaseThrottle().get_ident(request)
+    try:
+        return str(ipaddress.ip_address(candidate))
+    except ValueError:
+        return None
+
+
+class AuditLogMiddleware:
+    """
+    Records every mutating /api/ call to AuditLog through the buffered writer.
+
+    Runs after the view, so the user DRF authenticated from the JWT is
+    available on the request.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.enabled = audit_settings()['ENABLED']
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        response = self.get_response(request)
+        self.maybe_record(request, response)
+        return response
+
+    async def __acall__(self, request):
+        response = await self.get_response(request)
+        self.maybe_record(request, response)
+        return response
+
+    def maybe_record(self, request, response):
+        if self.enabled and request.method in MUTATING_METHODS and request.path.startswith('/api/'):
+            self.record(request, response)
+
+    def record(self, request, response):
+        match = request.resolver_match
+        url_name = (match.url_name or '') if match else ''
+        kwargs = match.kwargs if match else {}
+        # Router names look like "<basename>-<action>", e.g. "application-accept"
+        entity_type, _, action = url_name.partition('-')
+        if action in ('list', 'detail', ''):
+            action = ACTIONS[request.method]
+        entity_id = kwargs.get('pk')
+        if entity_id is None:
+            entity_id = _response_id(getattr(response, 'data', None))
+
+        user = getattr(request, 'user', None)
+        get_writer().record(
+            user_id=user.pk if user is not None and user.is_authenticated else None,
+            actor_ip=client_ip(request),
+            action=action[:100],
+            entity_type=(entity_type or request.path)[:50],
+            entity_id=str(entity_id or '')[:50],
+            metadata={'method': request.method, 'path': request.path, 'status': response.status_code},
+        )
+
+
+def _response_id(data):
+    return data.get('id') if isinstance(data, dict) else None
@@ -1,5 +1,8 @@
-from django.test import TestCase
+from django.test import TestCase, override_settings
+from . import writer as writer_module
 from .models import AuditLog
+from .writer import AuditLogWriter
+from notifications.models import Notification
 from users.models import User
 
 class AuditLogTest(TestCase):
@@ -8,3 +11,49 @@ class AuditLogTest(TestCase):
         log = AuditLog.objects.create(user=user, action='create', entity_type='User', entity_id='1')
         self.assertEqual(log.action, 'create')
         self.assertEqual(log.entity_type, 'User')
+
+
+@override_settings(AUDITLOG={'BACKGROUND': False})
+class AuditLogWriterTest(TestCase):
+    def setUp(self):
+        self.writer = AuditLogWriter(queue_size=3, batch_size=2)
+        writer_module._writer = self.writer
+
+    def tearDown(self):
+        writer_module._writer = None
+
+    def test_records_are_buffered_until_flushed(self):
+        for i in range(4):
+            self.writer.record(action='create', entity_type='Thing', entity_id=str(i), metadata={})
+        self.assertFalse(AuditLog.objects.exists())
+        self.assertEqual(self.writer.flush(), 3)
+        self.assertEqual(AuditLog.objects.count(), 3)
+        stats = self.writer.stats()
+        self.assertEqual((stats['enqueued'], stats['dropped'], stats['flushed'], stats['batches']), (3, 1, 3, 2))
+
+    def test_middleware_records_mutating_api_calls(self):
+        from rest_framework.test import APIClient
+        user = User.objects.create(username='auditedbuyer', role='buyer')
+        notification = Notification.objects.create(user=user, type='info', payload={})
+        client = APIClient(REMOTE_ADDR='10.0.0.7')
+        client.force_authenticate(user)
+        client.get('/api/notifications/')
+        client.put(f'/api/notifications/{notification.id}/read/')
+        self.writer.flush()
+        log = AuditLog.objects.get()
+        self.assertEqual((log.user, log.actor_ip, log.action), (user, '10.0.0.7', 'read'))
+        self.assertEqual((log.entity_type, log.entity_id), ('notification', str(notification.id)))
+        self.assertEqual(log.metadata['status'], 200)
+
+    def test_actor_ip_ignores_client_supplied_forwarded_for(self):
+        from rest_framework.test import APIClient
+        user = User.objects.create(username='spoofer', role='buyer')
+        notification = Notification.objects.create(user=user, type='info', payload={})
+        client = APIClient(REMOTE_ADDR='10.0.0.7', HTTP_X_FORWARDED_FOR='1.2.3.4, 203.0.113.9')
+        client.force_authenticate(user)
+        with override_settings(REST_FRAMEWORK={'NUM_PROXIES': 0}):
+            client.put(f'/api/notifications/{notification.id}/read/')
+        with override_settings(REST_FRAMEWORK={'NUM_PROXIES': 1}):
+            client.put(f'/api/notifications/{notification.id}/read/')
+        self.writer.flush()
+        self.assertEqual(list(AuditLog.objects.order_by('id').values_list('actor_ip', flat=True)), ['10.0.0.7', '203.0.113.9'])
@@ -0,0 +1,6 @@
+from django.urls import path
+from . import views
+
+urlpatterns = [
+    path('stats/', views.AuditLogStatsView.as_view(), name='auditlog-stats'),
+]
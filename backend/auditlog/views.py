@@ -0,0 +1,13 @@
+from rest_framework import permissions
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from .writer import get_writer
+
+
+class AuditLogStatsView(APIView):
+    """Queue depth and drop/flush counters of this worker's audit log writer."""
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        return Response(get_writer().stats())
@@ -0,0 +1,132 @@
+"""
+Buffered, asynchronous AuditLog writer.
+
+``record`` only appends to a bounded in-memory queue, so auditing costs the
+request a few microseconds. A daemon thread flushes the queue with
+bulk_create once BATCH_SIZE records are waiting or FLUSH_INTERVAL seconds
+have passed. When the queue is full the record is dropped and counted rather
+than blocking the request (backpressure); ``stats`` exposes the counters.
+
+Configured through the AUDITLOG setting; see DEFAULTS.
+"""
+import atexit
+import logging
+import queue
+import threading
+import time
+
+from django.conf import settings
+from django.db import close_old_connections
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'ENABLED': True,
+    # Flush from a background thread; when False records wait for flush()
+    'BACKGROUND': True,
+    'QUEUE_SIZE': 10000,
+    'BATCH_SIZE': 200,
+    'FLUSH_INTERVAL': 2.0,
+}
+
+
+def audit_settings():
+    return {**DEFAULTS, **getattr(settings, 'AUDITLOG', {})}
+
+
+class AuditLogWriter:
+    def __init__(self, queue_size=None, batch_size=None, flush_interval=None, background=None):
+        config = audit_settings()
+        self.batch_size = batch_size or config['BATCH_SIZE']
+        self.flush_interval = flush_interval or config['FLUSH_INTERVAL']
+        self.background = config['BACKGROUND'] if background is None else background
+        self._queue = queue.Queue(maxsize=queue_size or config['QUEUE_SIZE'])
+        self._wakeup = threading.Event()
+        self._flush_lock = threading.Lock()
+        self._thread = None
+        self._thread_lock = threading.Lock()
+        self._stopped = False
+        self.counters = {'enqueued': 0, 'dropped': 0, 'flushed': 0, 'batches': 0, 'flush_errors': 0}
+
+    def record(self, **fields):
+        """Queue one AuditLog row; returns False if it was dropped."""
+        try:
+            self._queue.put_nowait(fields)
+        except queue.Full:
+            self.counters['dropped'] += 1
+            return False
+        self.counters['enqueued'] += 1
+        if self.background:
+            self._ensure_thread()
+            if self._queue.qsize() >= self.batch_size:
+                self._wakeup.set()
+        return True
+
+    def flush(self):
+        """Write everything queued so far; returns the number of rows written."""
+        from .models import AuditLog
+
+        written = 0
+        with self._flush_lock:
+            while True:
+                batch = []
+                while len(batch) < self.batch_size:
+                    try:
+                        batch.append(self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+                if not batch:
+                    return written
+                try:
+                    AuditLog.objects.bulk_create([AuditLog(**fields) for fields in batch])
+                except Exception:
+                    self.counters['flush_errors'] += 1
+                    self.counters['dropped'] += len(batch)
+                    logger.exception('Failed to write %d audit log records', len(batch))
+                    continue
+                written += len(batch)
+                self.counters['flushed'] += len(batch)
+                self.counters['batches'] += 1
+
+    def stats(self):
+        return {**self.counters, 'queued': self._queue.qsize(), 'capacity': self._queue.maxsize}
+
+    def close(self):
+        self._stopped = True
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+        self.flush()
+
+    def _ensure_thread(self):
+        if self._thread is not None:
+            return
+        with self._thread_lock:
+            if self._thread is None and not self._stopped:
+                self._thread = threading.Thread(target=self._run, name='auditlog-writer', daemon=True)
+                self._thread.start()
+                atexit.register(self.close)
+
+    def _run(self):
+        while not self._stopped:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            if self._queue.empty():
+                continue
+            close_old_connections()
+            started = time.monotonic()
+            written = self.flush()
+            logger.debug('Flushed %d audit log records in %.1f ms', written, (time.monotonic() - started) * 1000)
+
+
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def get_writer():
+    global _writer
+    if _writer is None:
+        with _writer_lock:
+            if _writer is None:
+                _writer = AuditLogWriter()
+    return _writer
@@ -1,6 +1,7 @@
 from rest_framework import viewsets, permissions
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from users.profiles import get_role_profile
 from .models import BuyerProfile
 from .serializers import BuyerProfileSerializer
 
@@ -18,15 +19,14 @@ class BuyerProfileViewSet(viewsets.ModelViewSet):
     
     @action(detail=False, methods=['get', 'put', 'patch'])
     def me(self, request):
-        try:
-            profile = BuyerProfile.objects.get(user=request.user)
-            if request.method == 'GET':
-                serializer = self.get_serializer(profile)
-                return Response(serializer.data)
-            else:
-                serializer = self.get_serializer(profile, data=request.data, partial=True)
-                serializer.is_valid(raise_exception=True)
-                serializer.save()
-                return Response(serializer.data)
-        except BuyerProfile.DoesNotExist:
+        profile = get_role_profile(request, 'buyer')
+        if profile is None:
             return Response({'error': 'Profile not found'}, status=404)
+        if request.method == 'GET':
+            serializer = self.get_serializer(profile)
+            return Response(serializer.data)
+        else:
+            serializer = self.get_serializer(profile, data=request.data, partial=True)
+            serializer.is_valid(raise_exception=True)
+            serializer.save()
+            return Response(serializer.data)
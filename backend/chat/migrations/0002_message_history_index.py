@@ -0,0 +1,19 @@
+# Generated by Django 4.2.30 on 2026-10-18 12:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("chat", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="message",
+            index=models.Index(
+                fields=["thread", "created_at", "id"], name="chat_message_history_idx"
+            ),
+        ),
+    ]
@@ -16,3 +16,9 @@ class Message(models.Model):
     attachments = models.ManyToManyField(Document, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     read_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        indexes = [
+            # Backs the cursor-paginated thread history
+            models.Index(fields=['thread', 'created_at', 'id'], name='chat_message_history_idx'),
+        ]
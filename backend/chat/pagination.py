@@ -0,0 +1,63 @@
+from django.db.models import Q
+from rest_framework.exceptions import ValidationError
+
+
+class MessageHistoryPagination:
+    """
+    Cursor pagination of one thread's messages by (created_at, id).
+
+    Cursors are message ids:
+
+    - ``?after=<id>`` returns messages newer than the cursor, oldest first,
+      so a reconnecting client only fetches the delta.
+    - ``?before=<id>`` returns the page of messages preceding the cursor.
+    - With neither, the latest page is returned.
+
+    Results are always in chronological order and at most ``limit`` long.
+    """
+    page_size = 50
+    max_page_size = 100
+
+    def paginate(self, queryset, request):
+        limit = self.get_limit(request)
+        after = self.get_anchor(queryset, request, 'after')
+        before = self.get_anchor(queryset, request, 'before')
+
+        if after is not None:
+            created_at, pk = after
+            queryset = queryset.filter(
+                Q(created_at__gt=created_at) | Q(created_at=created_at, id__gt=pk)
+            ).order_by('created_at', 'id')
+        else:
+            if before is not None:
+                created_at, pk = before
+                queryset = queryset.filter(
+                    Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk)
+                )
+            queryset = queryset.order_by('-created_at', '-id')
+
+        rows = list(queryset[:limit + 1])
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        if after is None:
+            rows.reverse()
+        return rows, has_more
+
+    def get_limit(self, request):
+        try:
+            limit = int(request.query_params.get('limit', self.page_size))
+        except ValueError:
+            raise ValidationError({'limit': 'Must be an integer'})
+        return min(max(limit, 1), self.max_page_size)
+
+    def get_anchor(self, queryset, request, param):
+        value = request.query_params.get(param)
+        if not value:
+            return None
+        try:
+            anchor = queryset.filter(pk=int(value)).values_list('created_at', 'id').first()
+        except ValueError:
+            anchor = None
+        if anchor is None:
+            raise ValidationError({param: 'Unknown message id for this thread'})
+        return anchor
@@ -0,0 +1,99 @@
+"""
+Pub/sub used to push new chat messages to open SSE streams.
+
+The broker is chosen with the CHAT_PUBSUB_BROKER setting (a dotted path).
+Any class providing ``publish(channel, event)`` and
+``subscribe(channel) -> Subscription`` can stand in, e.g. a local broker in
+tests or a shared one for multi-process deployments.
+
+InProcessBroker only reaches streams served by the same process. Streams
+also re-check the database on every heartbeat, so a message published in
+another worker is delivered within one heartbeat interval.
+"""
+import asyncio
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+DEFAULT_BROKER = 'chat.pubsub.InProcessBroker'
+
+
+def thread_channel(thread_id):
+    return f'chat.thread.{thread_id}'
+
+
+class Subscription:
+    """A bounded queue of events for one stream, fed from any thread."""
+
+    def __init__(self, broker, channel, maxsize=100):
+        self.broker = broker
+        self.channel = channel
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=maxsize)
+        # Set when events were dropped; the stream then resyncs from the DB.
+        self.overflowed = False
+
+    def deliver(self, event):
+        self.loop.call_soon_threadsafe(self._put, event)
+
+    def _put(self, event):
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.overflowed = True
+
+    async def get(self, timeout):
+        """The next event, or None after ``timeout`` seconds."""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+class InProcessBroker:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscriptions = defaultdict(set)
+
+    def subscribe(self, channel):
+        subscription = Subscription(self, channel)
+        with self._lock:
+            self._subscriptions[channel].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscriptions = self._subscriptions.get(subscription.channel)
+            if subscriptions is not None:
+                subscriptions.discard(subscription)
+                if not subscriptions:
+                    del self._subscriptions[subscription.channel]
+
+    def publish(self, channel, event):
+        with self._lock:
+            subscriptions = list(self._subscriptions.get(channel, ()))
+        for subscription in subscriptions:
+            try:
+                subscription.deliver(event)
+            except RuntimeError:
+                # The stream's event loop has already shut down.
+                self.unsubscribe(subscription)
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                path = getattr(settings, 'CHAT_PUBSUB_BROKER', DEFAULT_BROKER)
+                _broker = import_string(path)()
+    return _broker
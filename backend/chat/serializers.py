@@ -6,9 +6,11 @@ class MessageThreadSerializer(serializers.ModelSerializer):
         model = MessageThread
         fields = '__all__'
         read_only_fields = ['created_at']
+        prefetch_related = ('participants',)
 
 class MessageSerializer(serializers.ModelSerializer):
     class Meta:
         model = Message
         fields = '__all__'
         read_only_fields = ['from_user', 'created_at', 'read_at']
+        prefetch_related = ('attachments',)
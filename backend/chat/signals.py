@@ -0,0 +1,18 @@
+from django.db import transaction
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from .models import Message
+from .pubsub import get_broker, thread_channel
+
+
+@receiver(post_save, sender=Message)
+def publish_message(sender, instance, created, **kwargs):
+    if not created:
+        return
+
+    def publish():
+        from .serializers import MessageSerializer
+        get_broker().publish(thread_channel(instance.thread_id), MessageSerializer(instance).data)
+
+    transaction.on_commit(publish)
@@ -0,0 +1,120 @@
+"""
+Server-Sent Events stream of new messages in a thread.
+
+Served as an async view, so it must run under the ASGI entry point
+(config.asgi); a WSGI worker would buffer the stream. Clients connect with
+EventSource to /api/chat/threads/<id>/stream/?token=<access token> (or an
+Authorization header). Every event carries the message id, so a reconnecting
+EventSource sends Last-Event-ID and only the missed messages are replayed.
+"""
+import json
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import JsonResponse, StreamingHttpResponse
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+
+from users.authentication import CachedJWTAuthentication
+
+from .models import Message, MessageThread
+from .pubsub import get_broker, thread_channel
+from .serializers import MessageSerializer
+
+HEARTBEAT_SECONDS = 15
+MAX_STREAM_SECONDS = 300
+RETRY_MILLISECONDS = 3000
+CATCH_UP_LIMIT = 200
+
+
+def _authenticate(request):
+    auth = CachedJWTAuthentication()
+    header = auth.get_header(request)
+    raw_token = auth.get_raw_token(header) if header else request.GET.get('token')
+    if not raw_token:
+        return None
+    try:
+        return auth.get_user(auth.get_validated_token(raw_token))
+    except (InvalidToken, TokenError, AuthenticationFailed):
+        return None
+
+
+def _is_participant(thread_id, user):
+    return MessageThread.objects.filter(pk=thread_id, participants=user).exists()
+
+
+def _messages_after(thread_id, last_id):
+    messages = (
+        Message.objects.filter(thread_id=thread_id, id__gt=last_id)
+        .prefetch_related('attachments')
+        .order_by('id')[:CATCH_UP_LIMIT]
+    )
+    return [MessageSerializer(message).data for message in messages]
+
+
+def _last_event_id(request):
+    value = request.headers.get('Last-Event-ID') or request.GET.get('last_event_id')
+    try:
+        return max(int(value), 0)
+    except (TypeError, ValueError):
+        return None
+
+
+def format_event(message):
+    data = json.dumps(message, cls=DjangoJSONEncoder)
+    return f'id: {message["id"]}\nevent: message\ndata: {data}\n\n'
+
+
+async def thread_stream(request, pk):
+    user = await sync_to_async(_authenticate)(request)
+    if user is None:
+        return JsonResponse({'detail': 'Authentication credentials were not provided.'}, status=401)
+    if not await sync_to_async(_is_participant)(pk, user):
+        return JsonResponse({'detail': 'Not found.'}, status=404)
+
+    heartbeat = getattr(settings, 'CHAT_STREAM_HEARTBEAT_SECONDS', HEARTBEAT_SECONDS)
+    max_seconds = getattr(settings, 'CHAT_STREAM_MAX_SECONDS', MAX_STREAM_SECONDS)
+    last_id = _last_event_id(request)
+    if last_id is None:
+        # Fresh connection: only stream what arrives from now on.
+        last_id = await sync_to_async(
+            lambda: Message.objects.filter(thread_id=pk).order_by('-id').values_list('id', flat=True).first() or 0
+        )()
+
+    async def events():
+        nonlocal last_id
+        subscription = get_broker().subscribe(thread_channel(pk))
+        deadline = time.monotonic() + max_seconds
+        try:
+            yield f'retry: {RETRY_MILLISECONDS}\n\n'
+            # Replay anything missed before the subscription existed.
+            resync = True
+            while True:
+                if resync:
+                    subscription.overflowed = False
+                    for message in await sync_to_async(_messages_after)(pk, last_id):
+                        last_id = message['id']
+                        yield format_event(message)
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    # Close so the client reconnects with Last-Event-ID.
+                    return
+                message = await subscription.get(timeout=min(heartbeat, remaining))
+                if message is None:
+                    yield ': keepalive\n\n'
+                    # Picks up messages published by other workers.
+                    resync = True
+                    continue
+                resync = subscription.overflowed
+                if message['id'] > last_id:
+                    last_id = message['id']
+                    yield format_event(message)
+        finally:
+            subscription.close()
+
+    response = StreamingHttpResponse(events(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
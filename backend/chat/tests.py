@@ -1,6 +1,7 @@
 from django.test import TestCase
 from .models import MessageThread, Message
 from users.models import User
+from core.testing import QueryBudgetMixin
 
 class MessageTest(TestCase):
     def test_create_message_thread_and_message(self):
@@ -11,3 +12,130 @@ class MessageTest(TestCase):
         msg = Message.objects.create(thread=thread, from_user=user1, to_user=user2, content='Hello')
         self.assertEqual(msg.content, 'Hello')
         self.assertIn(user1, thread.participants.all())
+
+
+class ChatQueryBudgetTest(QueryBudgetMixin, TestCase):
+    def setUp(self):
+        from rest_framework.test import APIClient
+        from buyers.models import BuyerProfile
+        from service_requests.models import ServiceRequest
+        self.user1 = User.objects.create(username='budget1', role='buyer')
+        self.user2 = User.objects.create(username='budget2', role='provider')
+        buyer = BuyerProfile.objects.create(user=self.user1, company_name='TestCo', industry='Tech', contact_person_name='Alice')
+        self.req = ServiceRequest.objects.create(buyer=buyer, title='Test', machine_type='TypeA', serial_number='123', customer_company_name='TestCo', customer_address='Addr', contact_person_name='Alice', contact_email='alice@test.com', contact_phone='123', service_types=['repair'], issue_description='Issue', urgency='high', preferred_date='2025-08-21', budget_eur=100, payment_method='bank_transfer')
+        self.thread = MessageThread.objects.create(request=self.req)
+        self.thread.participants.set([self.user1, self.user2])
+        self.client = APIClient()
+        self.client.force_authenticate(self.user1)
+
+    def test_message_list_budget(self):
+        def make_row():
+            Message.objects.create(thread=self.thread, from_user=self.user1, to_user=self.user2, content='Hello')
+        # COUNT, page, attachments prefetch
+        self.assertListQueryBudget(self.client, '/api/chat/messages/', 3, make_row)
+
+    def test_thread_list_budget(self):
+        def make_row():
+            thread = MessageThread.objects.create(request=self.req)
+            thread.participants.set([self.user1, self.user2])
+        # COUNT, page, participants prefetch
+        self.assertListQueryBudget(self.client, '/api/chat/threads/', 3, make_row)
+
+
+class MessageStreamTest(TestCase):
+    def setUp(self):
+        from buyers.models import BuyerProfile
+        from service_requests.models import ServiceRequest
+        from rest_framework_simplejwt.tokens import AccessToken
+        self.user1 = User.objects.create(username='stream1', role='buyer')
+        self.user2 = User.objects.create(username='stream2', role='provider')
+        self.outsider = User.objects.create(username='stream3', role='provider')
+        buyer = BuyerProfile.objects.create(user=self.user1, company_name='TestCo', industry='Tech', contact_person_name='Alice')
+        req = ServiceRequest.objects.create(buyer=buyer, title='Test', machine_type='TypeA', serial_number='123', customer_company_name='TestCo', customer_address='Addr', contact_person_name='Alice', contact_email='alice@test.com', contact_phone='123', service_types=['repair'], issue_description='Issue', urgency='high', preferred_date='2025-08-21', budget_eur=100, payment_method='bank_transfer')
+        self.thread = MessageThread.objects.create(request=req)
+        self.thread.participants.set([self.user1, self.user2])
+        self.messages = [
+            Message.objects.create(thread=self.thread, from_user=self.user1, to_user=self.user2, content=f'Hello {i}')
+            for i in range(3)
+        ]
+        self.token = str(AccessToken.for_user(self.user2))
+        self.outsider_token = str(AccessToken.for_user(self.outsider))
+
+    async def read_stream(self, headers=None):
+        from django.test import AsyncClient
+        response = await AsyncClient().get(f'/api/chat/threads/{self.thread.id}/stream/', {'token': self.token}, headers=headers)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        return ''.join([chunk.decode() async for chunk in response.streaming_content])
+
+    async def test_reconnect_replays_messages_after_last_event_id(self):
+        from django.test import override_settings
+        with override_settings(CHAT_STREAM_MAX_SECONDS=0):
+            body = await self.read_stream(headers={'Last-Event-ID': str(self.messages[0].id)})
+        self.assertNotIn('Hello 0', body)
+        self.assertIn(f'id: {self.messages[2].id}\nevent: message', body)
+        self.assertIn('Hello 1', body)
+
+    async def test_published_messages_are_pushed(self):
+        import asyncio
+        from django.test import override_settings
+        from .pubsub import get_broker, thread_channel
+
+        async def publish_soon():
+            await asyncio.sleep(0.05)
+            get_broker().publish(thread_channel(self.thread.id), {'id': self.messages[-1].id + 100, 'content': 'Pushed'})
+
+        with override_settings(CHAT_STREAM_MAX_SECONDS=0.2, CHAT_STREAM_HEARTBEAT_SECONDS=0.1):
+            publisher = asyncio.ensure_future(publish_soon())
+            body = await self.read_stream()
+            await publisher
+        self.assertIn('Pushed', body)
+        self.assertNotIn('Hello 2', body)
+        self.assertIn(': keepalive', body)
+
+    async def test_non_participants_are_rejected(self):
+        from django.test import AsyncClient
+        response = await AsyncClient().get(f'/api/chat/threads/{self.thread.id}/stream/', {'token': self.outsider_token})
+        self.assertEqual(response.status_code, 404)
+        response = await AsyncClient().get(f'/api/chat/threads/{self.thread.id}/stream/')
+        self.assertEqual(response.status_code, 401)
+
+
+class MessageHistoryTest(TestCase):
+    def setUp(self):
+        from buyers.models import BuyerProfile
+        from rest_framework.test import APIClient
+        from service_requests.models import ServiceRequest
+        self.user1 = User.objects.create(username='history1', role='buyer')
+        self.user2 = User.objects.create(username='history2', role='provider')
+        buyer = BuyerProfile.objects.create(user=self.user1, company_name='TestCo', industry='Tech', contact_person_name='Alice')
+        req = ServiceRequest.objects.create(buyer=buyer, title='Test', machine_type='TypeA', serial_number='123', customer_company_name='TestCo', customer_address='Addr', contact_person_name='Alice', contact_email='alice@test.com', contact_phone='123', service_types=['repair'], issue_description='Issue', urgency='high', preferred_date='2025-08-21', budget_eur=100, payment_method='bank_transfer')
+        self.thread = MessageThread.objects.create(request=req)
+        self.thread.participants.set([self.user1, self.user2])
+        self.messages = [
+            Message.objects.create(thread=self.thread, from_user=self.user1, to_user=self.user2, content=f'Hello {i}')
+            for i in range(5)
+        ]
+        self.client = APIClient()
+        self.client.force_authenticate(self.user2)
+        self.url = f'/api/chat/threads/{self.thread.id}/messages/'
+
+    def contents(self, response):
+        return [message['content'] for message in response.json()['results']]
+
+    def test_latest_page_and_scrollback(self):
+        latest = self.client.get(self.url, {'limit': 2})
+        self.assertEqual(self.contents(latest), ['Hello 3', 'Hello 4'])
+        self.assertTrue(latest.json()['has_more'])
+        older = self.client.get(self.url, {'limit': 10, 'before': latest.json()['oldest_id']})
+        self.assertEqual(self.contents(older), ['Hello 0', 'Hello 1', 'Hello 2'])
+        self.assertFalse(older.json()['has_more'])
+
+    def test_resync_returns_only_the_delta(self):
+        Message.objects.create(thread=self.thread, from_user=self.user2, to_user=self.user1, content='New')
+        response = self.client.get(self.url, {'after': self.messages[-1].id})
+        self.assertEqual(self.contents(response), ['New'])
+
+    def test_post_still_creates_messages(self):
+        response = self.client.post(self.url, {'content': 'Reply'})
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(self.messages[0].thread.message_set.count(), 6)
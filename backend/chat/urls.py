@@ -1,11 +1,12 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from . import views
+from . import stream, views
 
 router = DefaultRouter()
 router.register(r'threads', views.MessageThreadViewSet, basename='messagethread')
 router.register(r'messages', views.MessageViewSet, basename='message')
 
 urlpatterns = [
+    path('threads/<int:pk>/stream/', stream.thread_stream, name='messagethread-stream'),
     path('', include(router.urls)),
 ]
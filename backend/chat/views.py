@@ -3,24 +3,21 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from .models import MessageThread, Message
 from .serializers import MessageThreadSerializer, MessageSerializer
+from .pagination import MessageHistoryPagination
+from core.mixins import SerializerRelationsMixin, apply_serializer_relations
 
-class MessageThreadViewSet(viewsets.ModelViewSet):
+class MessageThreadViewSet(SerializerRelationsMixin, viewsets.ModelViewSet):
     serializer_class = MessageThreadSerializer
     permission_classes = [permissions.IsAuthenticated]
     
     def get_queryset(self):
         return MessageThread.objects.filter(participants=self.request.user)
     
-    @action(detail=True, methods=['get'])
-    def messages(self, request, pk=None):
-        thread = self.get_object()
-        messages = Message.objects.filter(thread=thread).order_by('created_at')
-        serializer = MessageSerializer(messages, many=True)
-        return Response(serializer.data)
-    
-    @action(detail=True, methods=['post'])
+    @action(detail=True, methods=['get', 'post'])
     def messages(self, request, pk=None):
         thread = self.get_object()
+        if request.method == 'GET':
+            return self.message_history(request, thread)
         
         # Determine the recipient (the other participant)
         participants = thread.participants.all()
@@ -43,8 +40,19 @@ class MessageThreadViewSet(viewsets.ModelViewSet):
             serializer.save(from_user=request.user, thread=thread, to_user=to_user)
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    
+    def message_history(self, request, thread):
+        """Thread history paged by message-id cursors (?after=, ?before=, ?limit=)."""
+        queryset = apply_serializer_relations(Message.objects.filter(thread=thread), MessageSerializer)
+        messages, has_more = MessageHistoryPagination().paginate(queryset, request)
+        return Response({
+            'results': MessageSerializer(messages, many=True).data,
+            'has_more': has_more,
+            'oldest_id': messages[0].id if messages else None,
+            'newest_id': messages[-1].id if messages else None,
+        })
 
-class MessageViewSet(viewsets.ModelViewSet):
+class MessageViewSet(SerializerRelationsMixin, viewsets.ModelViewSet):
     serializer_class = MessageSerializer
     permission_classes = [permissions.IsAuthenticated]
     
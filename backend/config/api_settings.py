@@ -0,0 +1,44 @@
+"""
+API-only settings for the serverless entry point (api/index.py).
+
+The API is stateless JWT, so this profile drops the admin, sessions,
+messages, static files and the template stack, and only installs the
+middleware the API uses. URLs are resolved through config.api_urls, which
+imports an app's views on the first request routed to it. Run
+``python api/coldstart.py`` to compare cold starts against config.settings.
+"""
+from .settings import *  # noqa: F401,F403
+
+INSTALLED_APPS = [
+    app for app in INSTALLED_APPS
+    if app not in (
+        'django.contrib.admin',
+        'django.contrib.sessions',
+        'django.contrib.messages',
+        'django.contrib.staticfiles',
+    )
+]
+
+MIDDLEWARE = [
+    'corsheaders.middleware.CorsMiddleware',
+    'django.middleware.security.SecurityMiddleware',
+    'django.middleware.common.CommonMiddleware',
+    'auditlog.middleware.AuditLogMiddleware',
+]
+
+ROOT_URLCONF = 'config.api_urls'
+
+TEMPLATES = []
+
+REST_FRAMEWORK = {
+    **REST_FRAMEWORK,
+    # No browsable API: it needs templates and sessions
+    'DEFAULT_RENDERER_CLASSES': ['rest_framework.renderers.JSONRenderer'],
+}
+
+# Lambda has no /dev/shm, so process pools can't start; render previews inline
+DOCUMENT_PREVIEW_WORKERS = 0
+
+# The instance may be frozen once the response is sent, so a background
+# thread can't be relied on to finish the outbox drain
+NOTIFICATION_OUTBOX_EAGER_THREAD = False
@@ -0,0 +1,33 @@
+"""
+URLs for the API-only profile (config.api_settings).
+
+Same routes as config.urls without the admin. Each app's urls module is
+passed to path() by name, so Django imports it (and its views and
+serializers) the first time a request reaches that prefix rather than
+at startup.
+"""
+from django.urls import path
+
+from .views import health_view
+
+
+def lazy_include(module, namespace=None):
+    return (module, None, namespace)
+
+
+urlpatterns = [
+    path('api/health/', health_view),
+    path('api/health/db-pool/', lazy_include('core.db.urls')),
+    path('api/auth/', lazy_include('users.urls')),
+    path('api/buyers/', lazy_include('buyers.urls')),
+    path('api/providers/', lazy_include('providers.urls')),
+    path('api/service-requests/', lazy_include('service_requests.urls')),
+    path('api/applications/', lazy_include('applications.urls')),
+    path('api/documents/', lazy_include('documents.urls')),
+    path('api/chat/', lazy_include('chat.urls')),
+    path('api/reviews/', lazy_include('reviews.urls')),
+    path('api/notifications/', lazy_include('notifications.urls')),
+    path('api/auditlog/', lazy_include('auditlog.urls')),
+    # Matches any /api/ path, so it goes last to keep the prefixes above lazy.
+    path('api/', lazy_include('users.urls')),  # For dashboard endpoint
+]
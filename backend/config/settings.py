@@ -1,4 +1,5 @@
 import os
+import sys
 from pathlib import Path
 from dotenv import load_dotenv
 
@@ -53,6 +54,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'auditlog.middleware.AuditLogMiddleware',
 ]
 
 ROOT_URLCONF = 'config.urls'
@@ -74,14 +76,38 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'config.wsgi.application'
+# The chat SSE stream (chat.stream) needs the ASGI entry point
+ASGI_APPLICATION = 'config.asgi.application'
 
 # Database Configuration
 import dj_database_url
 DATABASE_URL = os.getenv('DATABASE_URL')
+# Connections are pooled per process (core.db.pool) rather than held per
+# thread with CONN_MAX_AGE; DB_POOL_MAX_SIZE=0 restores Django's own handling.
+DB_POOL = {
+    'MAX_SIZE': int(os.getenv('DB_POOL_MAX_SIZE', '4')),
+    'TIMEOUT': float(os.getenv('DB_POOL_TIMEOUT', '10')),
+    'MAX_IDLE': 300,
+    'MAX_LIFETIME': 1800,
+    'CHECK_AFTER': 30,
+}
+POOLED_ENGINES = {
+    'django.db.backends.postgresql': 'core.db.backends.postgresql',
+    'django.db.backends.sqlite3': 'core.db.backends.sqlite3',
+}
 if DATABASE_URL:
     DATABASES = {
-        'default': dj_database_url.parse(DATABASE_URL, conn_max_age=600)
+        'default': dj_database_url.parse(DATABASE_URL, conn_max_age=0 if DB_POOL['MAX_SIZE'] else 600)
     }
+    if DB_POOL['MAX_SIZE'] and DATABASES['default']['ENGINE'] in POOLED_ENGINES:
+        DATABASES['default']['ENGINE'] = POOLED_ENGINES[DATABASES['default']['ENGINE']]
+        DATABASES['default']['POOL'] = DB_POOL
+    # Transaction-mode poolers (PgBouncer, Neon's -pooler hosts) may run each
+    # transaction on a different server connection, so named cursors can't
+    # be used across fetches.
+    DATABASES['default']['DISABLE_SERVER_SIDE_CURSORS'] = (
+        os.getenv('DB_TRANSACTION_POOLING', str('-pooler' in (DATABASES['default'].get('HOST') or ''))) == 'True'
+    )
 else:
     # For local development, use persistent SQLite
     DATABASES = {
@@ -100,13 +126,18 @@ STATIC_URL = '/static/'
 # REST Framework Settings
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'users.authentication.CachedJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
-    'PAGE_SIZE': 20
+    'PAGE_SIZE': 20,
+    # Proxies that append to X-Forwarded-For in front of the app; client IPs
+    # (login throttles, audit log) are read from the entry the nearest one
+    # added. Vercel's edge is one hop; the Docker setup serves directly, so
+    # REMOTE_ADDR is used.
+    'NUM_PROXIES': int(os.getenv('NUM_PROXIES', '1' if os.getenv('VERCEL') else '0')),
 }
 
 # JWT Settings
@@ -115,6 +146,9 @@ SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(minutes=60),
     'REFRESH_TOKEN_LIFETIME': timedelta(days=30),
     'ROTATE_REFRESH_TOKENS': True,
+    # Revoked through users.revocation rather than the token_blacklist app
+    'BLACKLIST_AFTER_ROTATION': True,
+    'TOKEN_REFRESH_SERIALIZER': 'users.serializers.TokenRefreshSerializer',
 }
 
 # CORS Settings
@@ -161,4 +195,105 @@ LOGGING = {
             'propagate': False,
         },
     },
-}
\ No newline at end of file
+}
+
+# Seconds before a worker rebuilds its in-process provider matching index
+PROVIDER_MATCH_INDEX_TTL = int(os.getenv('PROVIDER_MATCH_INDEX_TTL', '300'))
+
+# Pub/sub broker pushing new chat messages to SSE streams
+CHAT_PUBSUB_BROKER = os.getenv('CHAT_PUBSUB_BROKER', 'chat.pubsub.InProcessBroker')
+
+# Drain the notification outbox after each write, in a background thread or,
+# with NOTIFICATION_OUTBOX_EAGER_THREAD off, inline before the response.
+# Disable when a `manage.py dispatch_notifications --loop` worker is running.
+# Either way, run `manage.py dispatch_notifications` periodically (e.g. from
+# cron) so failed events are retried.
+NOTIFICATION_OUTBOX_EAGER = os.getenv('NOTIFICATION_OUTBOX_EAGER', 'True').lower() == 'true'
+NOTIFICATION_OUTBOX_EAGER_THREAD = os.getenv('NOTIFICATION_OUTBOX_EAGER_THREAD', 'True').lower() == 'true'
+
+# Buffered audit log writer (auditlog.writer)
+TESTING = len(sys.argv) > 1 and sys.argv[1] == 'test'
+AUDITLOG = {
+    'ENABLED': os.getenv('AUDITLOG_ENABLED', 'True').lower() == 'true',
+    # The test database is transactional and per-thread; tests flush explicitly
+    'BACKGROUND': not TESTING,
+    'QUEUE_SIZE': 10000,
+    'BATCH_SIZE': 200,
+    'FLUSH_INTERVAL': 2.0,
+}
+
+# Blob storage for uploaded documents (documents.storage)
+DOCUMENT_STORAGE_BACKEND = os.getenv('DOCUMENT_STORAGE_BACKEND', 'documents.storage.LocalFileStorage')
+DOCUMENT_STORAGE_ROOT = os.getenv('DOCUMENT_STORAGE_ROOT', str(MEDIA_ROOT / 'documents'))
+
+# Resumable chunked uploads (documents.uploads)
+DOCUMENT_UPLOAD_STAGING_ROOT = os.getenv('DOCUMENT_UPLOAD_STAGING_ROOT', str(MEDIA_ROOT / 'uploads'))
+DOCUMENT_UPLOAD_CHUNK_SIZE = int(os.getenv('DOCUMENT_UPLOAD_CHUNK_SIZE', str(8 * 1024 * 1024)))
+DOCUMENT_UPLOAD_MAX_SIZE = int(os.getenv('DOCUMENT_UPLOAD_MAX_SIZE', str(2 * 1024 ** 3)))
+
+# Thumbnail/preview derivatives (documents.previews); 0 workers renders inline
+DOCUMENT_PREVIEW_ROOT = os.getenv('DOCUMENT_PREVIEW_ROOT', str(MEDIA_ROOT / 'previews'))
+DOCUMENT_PREVIEW_WORKERS = int(os.getenv('DOCUMENT_PREVIEW_WORKERS', '2'))
+
+# Seconds a JWT-authenticated user is served from cache (users.authentication)
+AUTH_USER_CACHE_TTL = int(os.getenv('AUTH_USER_CACHE_TTL', '60'))
+
+# Login password checks (users.login): bounded hashing pool and throttles
+LOGIN = {
+    'HASH_WORKERS': int(os.getenv('LOGIN_HASH_WORKERS', '2')),
+    'HASH_QUEUE_SIZE': int(os.getenv('LOGIN_HASH_QUEUE_SIZE', '16')),
+    'HASH_TIMEOUT': 10.0,
+    # (attempts, window seconds)
+    'IP_RATE': (int(os.getenv('LOGIN_IP_RATE', '30')), 60),
+    'ACCOUNT_FAILURE_RATE': (10, 15 * 60),
+}
+
+# Stored passwords are upgraded to the first hasher on the next successful login
+PASSWORD_HASHER = os.getenv('PASSWORD_HASHER', 'django.contrib.auth.hashers.PBKDF2PasswordHasher')
+PASSWORD_HASHERS = list(dict.fromkeys([
+    PASSWORD_HASHER,
+    'django.contrib.auth.hashers.PBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+    'django.contrib.auth.hashers.ScryptPasswordHasher',
+]))
+
+# Refresh-token revocation store (users.revocation); run purge_revoked_tokens periodically
+REFRESH_TOKEN_REVOCATION = {
+    'BLOOM_CAPACITY': int(os.getenv('REVOCATION_BLOOM_CAPACITY', '1000000')),
+    'BLOOM_ERROR_RATE': 0.001,
+    'SYNC_INTERVAL': 30,
+}
+
+# Shared cache tier: 'db' (the django_cache table; run createcachetable),
+# 'file' (SHARED_CACHE_LOCATION) or 'locmem' (per process, no tiering).
+# 'db' and 'file' sit behind an in-process LRU (core.cache.TieredCache).
+# The db tier trims itself on roughly 1 in 1000 writes (CULL_PROBABILITY),
+# each paying a DELETE of expired rows plus a COUNT(*), instead of a COUNT(*)
+# on every write as Django's own DatabaseCache does.
+SHARED_CACHE = os.getenv('SHARED_CACHE', 'db' if DATABASE_URL or os.getenv('VERCEL') else 'locmem')
+if SHARED_CACHE == 'locmem':
+    CACHES = {
+        'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'core.cache.TieredCache',
+            'OPTIONS': {
+                'SHARED': 'shared',
+                'LOCAL_MAX_BYTES': int(os.getenv('LOCAL_CACHE_MAX_BYTES', str(8 * 1024 * 1024))),
+                'LOCAL_TIMEOUT': 5,
+            },
+        },
+        'shared': {
+            'BACKEND': 'core.cache.DatabaseCache',
+            'LOCATION': 'django_cache',
+            'OPTIONS': {'MAX_ENTRIES': 50000, 'CULL_PROBABILITY': 0.001},
+        } if SHARED_CACHE == 'db' else {
+            'BACKEND': 'core.cache.FileBasedCache',
+            'LOCATION': os.getenv('SHARED_CACHE_LOCATION', '/tmp/sawa-cache'),
+            'OPTIONS': {'MAX_ENTRIES': 10000},
+        },
+    }
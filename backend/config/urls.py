@@ -1,13 +1,11 @@
 from django.contrib import admin
 from django.urls import path, include
-from django.http import JsonResponse
-
-def health_view(request):
-    return JsonResponse({"status": "ok"})
+from .views import health_view
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/health/', health_view),
+    path('api/health/db-pool/', include('core.db.urls')),
     path('api/auth/', include('users.urls')),
     path('api/', include('users.urls')),  # For dashboard endpoint
     path('api/buyers/', include('buyers.urls')),
@@ -18,4 +16,5 @@ urlpatterns = [
     path('api/chat/', include('chat.urls')),
     path('api/reviews/', include('reviews.urls')),
     path('api/notifications/', include('notifications.urls')),
+    path('api/auditlog/', include('auditlog.urls')),
 ]
@@ -69,9 +69,11 @@ LOGGING = {
     },
 }
 
-# Cache configuration (optional)
-CACHES = {
-    'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-    }
-}
+# Caches come from settings.py: on Vercel, an in-process LRU in front of the shared django_cache table, so instances don't start cold.
+# Create the table once with `python manage.py createcachetable`.
+
+# Lambda has no /dev/shm, so process pools can't start; render previews inline
+DOCUMENT_PREVIEW_WORKERS = 0
+
+# The instance may be frozen once the response is sent; drain the outbox inline
+NOTIFICATION_OUTBOX_EAGER_THREAD = False
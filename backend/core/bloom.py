@@ -0,0 +1,41 @@
+"""
+A compact in-memory Bloom filter for string keys.
+
+Membership answers are "definitely not present" or "possibly present"; the
+false-positive rate stays near ``error_rate`` while at most ``capacity``
+keys have been added. Positions come from one BLAKE2b digest split into two
+halves (Kirsch-Mitzenmacher double hashing), so a lookup costs one hash.
+"""
+import hashlib
+import math
+
+
+class BloomFilter:
+    def __init__(self, capacity, error_rate=0.001):
+        self.capacity = max(int(capacity), 1)
+        self.error_rate = error_rate
+        self.size = max(8, math.ceil(-self.capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / self.capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, key):
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hashes))
+
+    def add(self, key):
+        for position in self._positions(key):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, key):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+    def __len__(self):
+        return self.count
+
+    @property
+    def full(self):
+        return self.count >= self.capacity
@@ -0,0 +1,372 @@
+"""
+Tiered cache backend and stampede-safe cached computations.
+
+``TieredCache`` puts a small in-process LRU (bounded by pickled size) in
+front of a shared cache alias, typically the database or file cache, so
+serverless instances and workers share entries without an external
+service. Writes go through to the shared tier. A worker's local copy of a
+key written elsewhere can lag by up to LOCAL_TIMEOUT seconds; incr/decr and
+add always go to the shared tier. Django's database and file caches
+implement incr as get-then-set with the default timeout, which loses
+concurrent increments and resets the counter's expiry, so this module's
+``DatabaseCache`` and ``FileBasedCache`` subclasses replace it: the
+database one with a compare-and-swap UPDATE that leaves ``expires`` alone,
+the file one under a file lock, keeping the entry's expiry. The database
+cache also drops Django's SELECT COUNT(*) on every write and culls on a
+sample of writes (CULL_PROBABILITY) instead.
+
+``fetch`` caches the result of an expensive computation. Concurrent misses
+for a key are coalesced: within a process one thread computes while the
+others wait for its result, and across processes a short lock in the cache
+lets one caller compute while the rest poll for the value. Before an entry
+expires it is refreshed early with rising probability (the XFetch rule,
+scaled by how long the computation took), so hot keys are recomputed by
+one caller while everyone else is still served the current value.
+"""
+import base64
+import math
+import os
+import pickle
+import random
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends import db, filebased
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+from django.db import DatabaseError, connections, router, transaction
+from django.utils import timezone
+
+_MISSING = object()
+
+# fetch(): early-refresh aggressiveness, cross-process lock lifetime, and how
+# long a caller waits for another process to fill a missing key
+BETA = 1.0
+LOCK_TIMEOUT = 30
+WAIT_TIMEOUT = 2.0
+POLL_INTERVAL = 0.05
+
+
+class LocalLRU:
+    """Thread-safe LRU of pickled values with per-entry expiry, bounded by total bytes."""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()  # key -> (pickled, expires_at)
+        self.bytes = 0
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return _MISSING
+            pickled, expires_at = entry
+            if expires_at <= time.monotonic():
+                self._pop(key)
+                return _MISSING
+            self.entries.move_to_end(key)
+        return pickle.loads(pickled)
+
+    def set(self, key, value, timeout):
+        pickled = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        with self.lock:
+            self._pop(key)
+            if len(pickled) > self.max_bytes or timeout <= 0:
+                return
+            self.entries[key] = (pickled, time.monotonic() + timeout)
+            self.bytes += len(pickled)
+            while self.bytes > self.max_bytes:
+                self._pop(next(iter(self.entries)))
+
+    def delete(self, key):
+        with self.lock:
+            self._pop(key)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.bytes = 0
+
+    def _pop(self, key):
+        entry = self.entries.pop(key, None)
+        if entry is not None:
+            self.bytes -= len(entry[0])
+
+
+class TieredCache(BaseCache):
+    """
+    CACHES backend: an in-process LRU in front of another cache alias.
+
+    OPTIONS: SHARED (alias of the shared tier, default 'shared'),
+    LOCAL_MAX_BYTES (default 8 MB) and LOCAL_TIMEOUT (seconds a local copy
+    is trusted, default 5). Key prefixes and versions are those of the
+    shared tier.
+    """
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self.shared_alias = options.get('SHARED', 'shared')
+        self.local_timeout = options.get('LOCAL_TIMEOUT', 5)
+        self.local = LocalLRU(options.get('LOCAL_MAX_BYTES', 8 * 1024 * 1024))
+
+    @property
+    def shared(self):
+        return caches[self.shared_alias]
+
+    def _local_key(self, key, version):
+        return self.shared.make_and_validate_key(key, version=version)
+
+    def _local_timeout(self, timeout):
+        timeout = self.shared.get_backend_timeout(timeout)
+        return self.local_timeout if timeout is None else min(timeout, self.local_timeout)
+
+    def get(self, key, default=None, version=None):
+        local_key = self._local_key(key, version)
+        value = self.local.get(local_key)
+        if value is not _MISSING:
+            return value
+        value = self.shared.get(key, _MISSING, version=version)
+        if value is _MISSING:
+            return default
+        self.local.set(local_key, value, self.local_timeout)
+        return value
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self.shared.set(key, value, timeout, version=version)
+        self.local.set(self._local_key(key, version), value, self._local_timeout(timeout))
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self.local.delete(self._local_key(key, version))
+        return self.shared.add(key, value, timeout, version=version)
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        return self.shared.touch(key, timeout, version=version)
+
+    def delete(self, key, version=None):
+        self.local.delete(self._local_key(key, version))
+        return self.shared.delete(key, version=version)
+
+    def has_key(self, key, version=None):
+        if self.local.get(self._local_key(key, version)) is not _MISSING:
+            return True
+        return self.shared.has_key(key, version=version)
+
+    def incr(self, key, delta=1, version=None):
+        self.local.delete(self._local_key(key, version))
+        return self.shared.incr(key, delta, version=version)
+
+    def decr(self, key, delta=1, version=None):
+        self.local.delete(self._local_key(key, version))
+        return self.shared.decr(key, delta, version=version)
+
+    def clear(self):
+        self.local.clear()
+        self.shared.clear()
+
+    def close(self, **kwargs):
+        self.shared.close(**kwargs)
+
+
+class DatabaseCache(db.DatabaseCache):
+    """
+    Django's database cache with atomic incr/decr and without a COUNT(*) per write.
+
+    OPTIONS: MAX_ENTRIES and CULL_FREQUENCY as in Django, applied by
+    ``cull()``, which runs on CULL_PROBABILITY (default 0.001) of writes.
+    """
+
+    def __init__(self, table, params):
+        super().__init__(table, params)
+        self.cull_probability = params.get('OPTIONS', {}).get('CULL_PROBABILITY', 0.001)
+
+    def _sql(self):
+        connection = connections[router.db_for_write(self.cache_model_class)]
+        quote_name = connection.ops.quote_name
+        return connection, quote_name(self._table), quote_name('cache_key'), quote_name('value'), quote_name('expires')
+
+    def _now(self, connection):
+        return connection.ops.adapt_datetimefield_value(timezone.now().replace(microsecond=0))
+
+    def _base_set(self, mode, key, value, timeout=DEFAULT_TIMEOUT):
+        if random.random() < self.cull_probability:
+            self.cull()
+        timeout = self.get_backend_timeout(timeout)
+        if timeout is None:
+            expires = datetime.max
+        else:
+            expires = datetime.fromtimestamp(timeout, tz=dt_timezone.utc if settings.USE_TZ else None)
+        connection, table, cache_key, value_column, expires_column = self._sql()
+        expires = connection.ops.adapt_datetimefield_value(expires.replace(microsecond=0))
+        encoded = base64.b64encode(pickle.dumps(value, self.pickle_protocol)).decode('latin1')
+        now = self._now(connection)
+        try:
+            with connection.cursor() as cursor:
+                if mode == 'touch':
+                    cursor.execute(
+                        f'UPDATE {table} SET {expires_column} = %s WHERE {cache_key} = %s AND {expires_column} >= %s',
+                        [expires, key, now],
+                    )
+                    return bool(cursor.rowcount)
+                # set overwrites any row; add only takes over an expired one.
+                condition = '' if mode == 'set' else f' AND {expires_column} < %s'
+                cursor.execute(
+                    f'UPDATE {table} SET {value_column} = %s, {expires_column} = %s WHERE {cache_key} = %s{condition}',
+                    [encoded, expires, key] + ([now] if mode == 'add' else []),
+                )
+                if cursor.rowcount:
+                    return True
+                with transaction.atomic(using=connection.alias):
+                    cursor.execute(
+                        f'INSERT INTO {table} ({cache_key}, {value_column}, {expires_column}) VALUES (%s, %s, %s)',
+                        [key, encoded, expires],
+                    )
+        except DatabaseError:
+            # For add, a live row already exists; for set, a concurrent insert won.
+            return False
+        return True
+
+    def _read_counter(self, cursor, table, key, columns, now):
+        cache_key, value_column, expires_column = columns
+        cursor.execute(
+            f'SELECT {value_column} FROM {table} WHERE {cache_key} = %s AND {expires_column} >= %s', [key, now]
+        )
+        row = cursor.fetchone()
+        return None if row is None else row[0]
+
+    def incr(self, key, delta=1, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        connection, table, *columns = self._sql()
+        cache_key, value_column, _ = columns
+        with connection.cursor() as cursor:
+            while True:
+                encoded = self._read_counter(cursor, table, key, columns, self._now(connection))
+                if encoded is None:
+                    raise ValueError("Key '%s' not found" % key)
+                value = pickle.loads(base64.b64decode(encoded.encode())) + delta
+                # Only applies if nobody changed the value since the read;
+                # otherwise someone else's increment landed, so re-read.
+                cursor.execute(
+                    f'UPDATE {table} SET {value_column} = %s WHERE {cache_key} = %s AND {value_column} = %s',
+                    [base64.b64encode(pickle.dumps(value, self.pickle_protocol)).decode('latin1'), key, encoded],
+                )
+                if cursor.rowcount:
+                    return value
+
+    def cull(self):
+        """Delete expired entries and, past MAX_ENTRIES, a CULL_FREQUENCY share of the rest."""
+        connection, table, *_ = self._sql()
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT COUNT(*) FROM {table}')
+            self._cull(connection.alias, cursor, timezone.now().replace(microsecond=0), cursor.fetchone()[0])
+
+
+class FileBasedCache(filebased.FileBasedCache):
+    """Django's file cache with incr/decr that are atomic across processes and keep the entry's expiry."""
+
+    def incr(self, key, delta=1, version=None):
+        import fcntl
+
+        self._createdir()
+        fname = self._key_to_file(key, version)
+        with open(os.path.join(self._dir, 'incr.lock'), 'a') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                with open(fname, 'rb') as f:
+                    expiry = pickle.load(f)
+                    value = pickle.loads(zlib.decompress(f.read()))
+            except (FileNotFoundError, EOFError):
+                value = expiry = _MISSING
+            if value is _MISSING or (expiry is not None and expiry < time.time()):
+                raise ValueError("Key '%s' not found" % key)
+            value += delta
+            remaining = None if expiry is None else max(expiry - time.time(), 0.001)
+            self.set(key, value, remaining, version=version)
+        return value
+
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+_flights = {}
+_flights_lock = threading.Lock()
+
+
+def fetch(key, compute, timeout, cache_alias='default', beta=BETA):
+    """
+    ``compute()``'s result, cached under ``key`` for ``timeout`` seconds.
+
+    Misses are coalesced and hot entries refreshed early; see the module
+    docstring. Exceptions from ``compute`` propagate to every waiting caller.
+    """
+    cache = caches[cache_alias]
+    entry = cache.get(key)
+    if entry is not None:
+        value, delta, expires_at = entry
+        # 1 - random() is in (0, 1], so the log is defined and <= 0.
+        if time.time() - delta * beta * math.log(1 - random.random()) < expires_at:
+            return value
+        if not cache.add(f'{key}:lock', 1, LOCK_TIMEOUT):
+            return value  # another caller is already refreshing it
+        return _single_flight(key, lambda: _compute(cache, key, compute, timeout, locked=True))
+    return _single_flight(key, lambda: _fill(cache, key, compute, timeout))
+
+
+def _single_flight(key, run):
+    with _flights_lock:
+        flight = _flights.get(key)
+        leader = flight is None
+        if leader:
+            flight = _flights[key] = _Flight()
+    if not leader:
+        flight.done.wait()
+        if flight.error is not None:
+            raise flight.error
+        return flight.value
+    try:
+        flight.value = run()
+        return flight.value
+    except BaseException as exc:
+        flight.error = exc
+        raise
+    finally:
+        with _flights_lock:
+            del _flights[key]
+        flight.done.set()
+
+
+def _fill(cache, key, compute, timeout):
+    entry = cache.get(key)
+    if entry is not None:
+        return entry[0]
+    if cache.add(f'{key}:lock', 1, LOCK_TIMEOUT):
+        return _compute(cache, key, compute, timeout, locked=True)
+    # Another process is computing it; wait for its result, then give up and compute too.
+    deadline = time.monotonic() + WAIT_TIMEOUT
+    while time.monotonic() < deadline:
+        time.sleep(POLL_INTERVAL)
+        entry = cache.get(key)
+        if entry is not None:
+            return entry[0]
+    return _compute(cache, key, compute, timeout, locked=False)
+
+
+def _compute(cache, key, compute, timeout, locked):
+    try:
+        started = time.time()
+        value = compute()
+        finished = time.time()
+        cache.set(key, (value, finished - started, finished + timeout), timeout)
+        return value
+    finally:
+        if locked:
+            cache.delete(f'{key}:lock')
@@ -0,0 +1,40 @@
+from core.db.pool import ConnectionPool, get_pool
+
+
+class PooledDatabaseWrapperMixin:
+    """
+    DatabaseWrapper mixin that borrows connections from core.db.pool.
+
+    Use with CONN_MAX_AGE = 0: Django then "closes" the connection after each
+    request, which returns it to the pool. Pool settings come from the
+    database's POOL dict (see core.db.pool.DEFAULTS).
+    """
+
+    def pool_check(self, connection):
+        raise NotImplementedError
+
+    def pool_reset(self, connection):
+        raise NotImplementedError
+
+    def pool_is_closed(self, connection):
+        raise NotImplementedError
+
+    @property
+    def pool(self):
+        settings = self.settings_dict
+        key = (self.vendor, self.alias, settings['HOST'], settings['PORT'], str(settings['NAME']))
+        return get_pool(key, lambda: ConnectionPool(
+            self.pool_check, self.pool_reset, self.pool_is_closed, settings.get('POOL'),
+        ))
+
+    def get_new_connection(self, conn_params):
+        parent = super().get_new_connection
+        return self.pool.acquire(lambda: parent(conn_params))
+
+    def _close(self):
+        if self.connection is None:
+            return
+        # Closed inside atomic(): the wrapper keeps its reference until the
+        # block exits, so the connection can't be lent to anyone else.
+        with self.wrap_database_errors:
+            self.pool.release(self.connection, discard=self.in_atomic_block)
@@ -0,0 +1,34 @@
+"""
+PostgreSQL engine with process-wide connection pooling (core.db.pool).
+
+ENGINE = 'core.db.backends.postgresql'. Behind a transaction-mode pooler
+such as PgBouncer or Neon's -pooler endpoints, also set
+DISABLE_SERVER_SIDE_CURSORS, since named cursors don't survive the end of
+a transaction there. Django's only session state is the time zone, which
+it sets solely when the server default differs from UTC.
+"""
+from django.db.backends.postgresql.base import DatabaseWrapper as PostgresDatabaseWrapper
+from django.db.backends.postgresql.psycopg_any import IsolationLevel
+
+from core.db.backends import PooledDatabaseWrapperMixin
+
+
+class DatabaseWrapper(PooledDatabaseWrapperMixin, PostgresDatabaseWrapper):
+    def get_new_connection(self, conn_params):
+        connection = super().get_new_connection(conn_params)
+        # Set by the parent only when it opens a connection, not on reuse.
+        self.isolation_level = IsolationLevel(
+            self.settings_dict['OPTIONS'].get('isolation_level', IsolationLevel.READ_COMMITTED)
+        )
+        return connection
+
+    def pool_check(self, connection):
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+
+    def pool_reset(self, connection):
+        if connection.get_transaction_status() != self.Database.extensions.TRANSACTION_STATUS_IDLE:
+            connection.rollback()
+
+    def pool_is_closed(self, connection):
+        return bool(connection.closed)
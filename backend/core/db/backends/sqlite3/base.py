@@ -0,0 +1,23 @@
+"""
+SQLite engine with connection pooling, a local stand-in for the pooled
+PostgreSQL engine (ENGINE = 'core.db.backends.sqlite3').
+"""
+from django.db.backends.sqlite3.base import DatabaseWrapper as SQLiteDatabaseWrapper
+
+from core.db.backends import PooledDatabaseWrapperMixin
+
+
+class DatabaseWrapper(PooledDatabaseWrapperMixin, SQLiteDatabaseWrapper):
+    def pool_check(self, connection):
+        connection.execute('SELECT 1')
+
+    def pool_reset(self, connection):
+        if connection.in_transaction:
+            connection.rollback()
+
+    def pool_is_closed(self, connection):
+        try:
+            connection.total_changes
+        except self.Database.ProgrammingError:
+            return True
+        return False
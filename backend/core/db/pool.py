@@ -0,0 +1,242 @@
+"""
+Process-wide database connection pool behind the core.db.backends engines.
+
+Django opens a connection per thread and, with CONN_MAX_AGE = 0, closes it
+at the end of every request. The pooled engines hand that close back to a
+pool instead, so the next request on the instance reuses a warm connection
+rather than paying for TCP, TLS and authentication again, and the number
+of connections an instance holds is capped by MAX_SIZE.
+
+Checkout prefers the most recently used idle connection. One idle for
+longer than CHECK_AFTER (e.g. after a serverless instance was frozen) is
+health-checked first; one past MAX_IDLE or MAX_LIFETIME is closed instead.
+Check-in rolls back any open transaction, so nothing leaks into the next
+borrower. Connections that a dead thread never returned are reclaimed when
+they're garbage collected. ``stats()`` reports pool sizes, checkout waits
+and connection setup times; staff can read them at /api/health/db-pool/.
+"""
+import logging
+import os
+import threading
+import time
+import weakref
+from collections import deque
+
+from django.db.utils import OperationalError
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'MAX_SIZE': 4,
+    # Seconds to wait for a free connection before failing the checkout
+    'TIMEOUT': 10.0,
+    'MAX_IDLE': 300,
+    'MAX_LIFETIME': 1800,
+    'CHECK_AFTER': 30,
+}
+SLOW_WAIT = 1.0
+
+
+class PoolTimeout(OperationalError):
+    pass
+
+
+class Timing:
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, seconds):
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def as_dict(self):
+        return {
+            'count': self.count,
+            'avg_ms': round(self.total / self.count * 1000, 2) if self.count else 0.0,
+            'max_ms': round(self.max * 1000, 2),
+        }
+
+
+class ConnectionPool:
+    def __init__(self, check, reset, is_closed, options=None):
+        self.check = check
+        self.reset = reset
+        self.is_closed = is_closed
+        self.options = {**DEFAULTS, **(options or {})}
+        self.cond = threading.Condition()
+        self.idle = deque()  # (connection, created, last used), most recent last
+        self.in_use = {}  # id(connection) -> (created, finalizer)
+        self.size = 0
+        self.wait = Timing()
+        self.setup = Timing()
+        self.timeouts = 0
+        self.discarded = 0
+
+    def acquire(self, connect):
+        """A connection from the pool, or a new one from ``connect()`` if none is idle and there's room."""
+        started = time.monotonic()
+        while True:
+            connection, created, last_used = self._take(started)
+            checked_out = time.monotonic()
+            if connection is None:
+                try:
+                    connection = connect()
+                except BaseException:
+                    self._forget()
+                    raise
+                created = time.monotonic()
+                with self.cond:
+                    self.setup.add(created - checked_out)
+            elif checked_out - last_used > self.options['CHECK_AFTER'] and not self._healthy(connection):
+                self._discard(connection)
+                continue
+            waited = checked_out - started
+            with self.cond:
+                self.wait.add(waited)
+            if waited > SLOW_WAIT:
+                logger.warning('Waited %.2fs for a database connection (pool size %d)', waited, self.options['MAX_SIZE'])
+            self._track(connection, created)
+            return connection
+
+    def release(self, connection, discard=False):
+        with self.cond:
+            created, finalizer = self.in_use.pop(id(connection), (None, None))
+        if finalizer is not None:
+            finalizer.detach()
+        if created is None:
+            # Not checked out from this pool (e.g. inherited across a fork).
+            return
+        now = time.monotonic()
+        if discard or now - created > self.options['MAX_LIFETIME'] or not self._reset(connection):
+            self._discard(connection)
+            return
+        with self.cond:
+            self.idle.append((connection, created, now))
+            self.cond.notify()
+
+    def close_idle(self):
+        with self.cond:
+            idle, self.idle = list(self.idle), deque()
+            self.size -= len(idle)
+            self.cond.notify_all()
+        for connection, _, _ in idle:
+            self._close(connection)
+
+    def stats(self):
+        with self.cond:
+            return {
+                'max_size': self.options['MAX_SIZE'],
+                'open': self.size,
+                'idle': len(self.idle),
+                'in_use': len(self.in_use),
+                'timeouts': self.timeouts,
+                'discarded': self.discarded,
+                'wait': self.wait.as_dict(),
+                'setup': self.setup.as_dict(),
+            }
+
+    def _take(self, started):
+        """An idle (connection, created, last used), or (None, ...) after reserving a slot for a new one."""
+        expired = []
+        try:
+            with self.cond:
+                while True:
+                    now = time.monotonic()
+                    while self.idle:
+                        connection, created, last_used = self.idle.pop()
+                        if now - last_used > self.options['MAX_IDLE'] or now - created > self.options['MAX_LIFETIME']:
+                            self.size -= 1
+                            expired.append(connection)
+                            continue
+                        return connection, created, last_used
+                    if self.size < self.options['MAX_SIZE']:
+                        self.size += 1
+                        return None, None, None
+                    remaining = self.options['TIMEOUT'] - (now - started)
+                    if remaining <= 0:
+                        self.timeouts += 1
+                        raise PoolTimeout(
+                            f"No database connection free after {self.options['TIMEOUT']}s "
+                            f"(pool size {self.options['MAX_SIZE']})"
+                        )
+                    self.cond.wait(remaining)
+        finally:
+            for connection in expired:
+                self._close(connection)
+
+    def _track(self, connection, created):
+        try:
+            finalizer = weakref.finalize(connection, self._lost, id(connection))
+        except TypeError:
+            finalizer = None
+        with self.cond:
+            self.in_use[id(connection)] = (created, finalizer)
+
+    def _lost(self, connection_id):
+        # Garbage collected while checked out, e.g. by a thread that exited without closing.
+        with self.cond:
+            self.in_use.pop(connection_id, None)
+        self._forget()
+
+    def _forget(self):
+        with self.cond:
+            self.size -= 1
+            self.cond.notify()
+
+    def _discard(self, connection):
+        self._close(connection)
+        with self.cond:
+            self.discarded += 1
+            self.size -= 1
+            self.cond.notify()
+
+    def _healthy(self, connection):
+        try:
+            return not self.is_closed(connection) and self.check(connection) is not False
+        except Exception:
+            return False
+
+    def _reset(self, connection):
+        try:
+            return not self.is_closed(connection) and self.reset(connection) is not False
+        except Exception:
+            return False
+
+    def _close(self, connection):
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(key, factory):
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = _pools[key] = factory()
+        return pool
+
+
+def stats():
+    with _pools_lock:
+        pools = dict(_pools)
+    # Labelled by vendor and alias only: the host and database name stay out of the stats endpoint.
+    return {f'{key[0]}/{key[1]}': pool.stats() for key, pool in pools.items()}
+
+
+def _after_fork():
+    # The child must not share the parent's sockets; it opens its own.
+    global _pools_lock
+    _pools.clear()
+    _pools_lock = threading.Lock()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_after_fork)
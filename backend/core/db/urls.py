@@ -0,0 +1,6 @@
+from django.urls import path
+from . import views
+
+urlpatterns = [
+    path('', views.PoolStatsView.as_view(), name='db-pool-stats'),
+]
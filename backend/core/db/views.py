@@ -0,0 +1,13 @@
+from rest_framework import permissions
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from . import pool
+
+
+class PoolStatsView(APIView):
+    """Sizes, checkout waits and connection setup times of this worker's database pools."""
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        return Response(pool.stats())
@@ -0,0 +1,222 @@
+"""
+Offline geocoding and proximity filtering.
+
+Free-text places ("Werkstraße 4, 70565 Stuttgart, Germany", "Berlin, DE")
+are resolved against the bundled gazetteer in core/data, with no network
+access; results are memoized. Models store the coordinates next to the text
+plus a grid cell (1° x 1°) with a database index. A radius query first
+narrows rows to the cells covering the bounding box, then computes the
+exact haversine distance in SQL for the survivors and ranks on it.
+"""
+import csv
+import math
+import re
+import unicodedata
+from functools import lru_cache
+from pathlib import Path
+
+from django.db.models import F, FloatField, Value
+from django.db.models.functions import ASin, Cos, Least, Power, Radians, Sin, Sqrt
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import BaseFilterBackend
+
+GAZETTEER_PATH = Path(__file__).resolve().parent / 'data' / 'gazetteer.csv'
+EARTH_RADIUS_KM = 6371.0088
+DEFAULT_RADIUS_KM = 100
+MAX_RADIUS_KM = 2000
+# Above this many grid cells the latitude/longitude range alone is cheaper.
+MAX_CELLS = 400
+
+COUNTRIES = {
+    'AT': ('austria', 'österreich'),
+    'BE': ('belgium', 'belgien', 'belgique'),
+    'BG': ('bulgaria',),
+    'CH': ('switzerland', 'schweiz', 'suisse'),
+    'CZ': ('czechia', 'czech republic', 'tschechien'),
+    'DE': ('germany', 'deutschland'),
+    'DK': ('denmark', 'dänemark', 'danmark'),
+    'ES': ('spain', 'spanien', 'españa'),
+    'FI': ('finland', 'finnland'),
+    'FR': ('france', 'frankreich'),
+    'GB': ('united kingdom', 'uk', 'great britain', 'england', 'scotland'),
+    'GR': ('greece', 'griechenland'),
+    'HR': ('croatia', 'kroatien'),
+    'HU': ('hungary', 'ungarn'),
+    'IE': ('ireland', 'irland'),
+    'IT': ('italy', 'italien', 'italia'),
+    'LU': ('luxembourg', 'luxemburg'),
+    'NL': ('netherlands', 'niederlande', 'nederland', 'holland'),
+    'NO': ('norway', 'norwegen'),
+    'PL': ('poland', 'polen', 'polska'),
+    'PT': ('portugal',),
+    'RO': ('romania', 'rumänien'),
+    'RS': ('serbia', 'serbien'),
+    'SE': ('sweden', 'schweden'),
+    'SI': ('slovenia', 'slowenien'),
+    'SK': ('slovakia', 'slowakei'),
+    'TR': ('turkey', 'türkei', 'türkiye'),
+}
+
+COORDINATES_RE = re.compile(r'^\s*(-?\d+(?:\.\d+)?)\s*,\s*(-?\d+(?:\.\d+)?)\s*$')
+
+
+def normalize(text):
+    text = text.replace('ß', 'ss').casefold()
+    text = ''.join(c for c in unicodedata.normalize('NFKD', text) if not unicodedata.combining(c))
+    return ' '.join(re.findall(r'[a-z]+', text))
+
+
+@lru_cache(maxsize=1)
+def _gazetteer():
+    """{normalized name: [(country, lat, lon), ...]} and {normalized country: code}."""
+    places = {}
+    with open(GAZETTEER_PATH, encoding='utf-8') as f:
+        for row in csv.DictReader(f):
+            entry = (row['country'], float(row['lat']), float(row['lon']))
+            for name in [row['name'], *filter(None, row['alt_names'].split('|'))]:
+                places.setdefault(normalize(name), []).append(entry)
+    countries = {}
+    for code, names in COUNTRIES.items():
+        countries[code.lower()] = code
+        for name in names:
+            countries[normalize(name)] = code
+    return places, countries
+
+
+@lru_cache(maxsize=4096)
+def geocode(text):
+    """Resolve a free-text place to (lat, lon), or None if the gazetteer has no match."""
+    if not text:
+        return None
+    match = COORDINATES_RE.match(text)
+    if match:
+        lat, lon = float(match.group(1)), float(match.group(2))
+        return (lat, lon) if -90 <= lat <= 90 and -180 <= lon <= 180 else None
+
+    places, countries = _gazetteer()
+    parts = [normalize(part) for part in re.split(r'[,;\n]', text)]
+    country = next((countries[part] for part in parts if part in countries), None)
+    # The city usually follows the street, so try later parts first, and
+    # within a part the longest run of words ("frankfurt am main" before "main").
+    for part in reversed(parts):
+        words = part.split()
+        for length in range(len(words), 0, -1):
+            for start in range(len(words) - length + 1):
+                candidates = places.get(' '.join(words[start:start + length]))
+                if not candidates:
+                    continue
+                for code, lat, lon in candidates:
+                    if country is None or code == country:
+                        return lat, lon
+    return None
+
+
+def grid_cell(lat, lon):
+    if lat is None or lon is None:
+        return None
+    row = min(int(math.floor(lat)) + 90, 179)
+    col = int(math.floor(lon)) % 360
+    return row * 360 + col
+
+
+def bounding_box(lat, lon, radius_km):
+    dlat = math.degrees(radius_km / EARTH_RADIUS_KM)
+    cos_lat = math.cos(math.radians(lat))
+    dlon = 180.0 if cos_lat < 1e-6 else min(180.0, math.degrees(radius_km / (EARTH_RADIUS_KM * cos_lat)))
+    return max(lat - dlat, -90.0), lon - dlon, min(lat + dlat, 90.0), lon + dlon
+
+
+def cells_for_box(min_lat, min_lon, max_lat, max_lon):
+    rows = range(int(math.floor(min_lat)) + 90, min(int(math.floor(max_lat)) + 90, 179) + 1)
+    cols = {col % 360 for col in range(int(math.floor(min_lon)), int(math.floor(max_lon)) + 1)}
+    if len(rows) * len(cols) > MAX_CELLS:
+        return None
+    return [row * 360 + col for row in rows for col in cols]
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    a = (math.sin((phi2 - phi1) / 2) ** 2
+         + math.cos(phi1) * math.cos(phi2) * math.sin(math.radians(lon2 - lon1) / 2) ** 2)
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def distance_expression(lat_field, lon_field, lat, lon):
+    """Haversine distance in km from (lat, lon) as a database expression."""
+    lat0 = math.radians(lat)
+    a = (
+        Power(Sin((Radians(F(lat_field)) - lat0) / 2), 2)
+        + math.cos(lat0) * Cos(Radians(F(lat_field))) * Power(Sin((Radians(F(lon_field)) - math.radians(lon)) / 2), 2)
+    )
+    # Least() guards asin against rounding just above 1 for antipodal points.
+    return 2 * EARTH_RADIUS_KM * ASin(Sqrt(Least(a, Value(1.0))), output_field=FloatField())
+
+
+def filter_near(queryset, fields, lat, lon, radius_km):
+    """Rows within ``radius_km`` of (lat, lon), annotated with distance_km and nearest first."""
+    lat_field, lon_field, cell_field = fields
+    min_lat, min_lon, max_lat, max_lon = bounding_box(lat, lon, radius_km)
+    cells = cells_for_box(min_lat, min_lon, max_lat, max_lon)
+    if cells is not None:
+        queryset = queryset.filter(**{f'{cell_field}__in': cells})
+    queryset = queryset.filter(**{f'{lat_field}__gte': min_lat, f'{lat_field}__lte': max_lat})
+    if -180 <= min_lon and max_lon <= 180:
+        queryset = queryset.filter(**{f'{lon_field}__gte': min_lon, f'{lon_field}__lte': max_lon})
+    return (
+        queryset
+        .annotate(distance_km=distance_expression(lat_field, lon_field, lat, lon))
+        .filter(distance_km__lte=radius_km)
+        .order_by('distance_km', 'pk')
+    )
+
+
+def filter_bbox(queryset, fields, min_lat, min_lon, max_lat, max_lon):
+    lat_field, lon_field, cell_field = fields
+    cells = cells_for_box(min_lat, min_lon, max_lat, max_lon)
+    if cells is not None:
+        queryset = queryset.filter(**{f'{cell_field}__in': cells})
+    return queryset.filter(**{
+        f'{lat_field}__gte': min_lat, f'{lat_field}__lte': max_lat,
+        f'{lon_field}__gte': min_lon, f'{lon_field}__lte': max_lon,
+    })
+
+
+class NearFilter(BaseFilterBackend):
+    """
+    ``?near=<place or lat,lon>&radius_km=<km>`` and
+    ``?bbox=<min_lat>,<min_lon>,<max_lat>,<max_lon>`` on the fields a view
+    lists in ``near_filter_fields`` as (latitude, longitude, grid cell).
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        bbox = request.query_params.get('bbox', '').strip()
+        if bbox:
+            try:
+                min_lat, min_lon, max_lat, max_lon = (float(value) for value in bbox.split(','))
+            except ValueError:
+                raise ValidationError({'bbox': 'Use min_lat,min_lon,max_lat,max_lon'})
+            if not (-90 <= min_lat <= max_lat <= 90 and -180 <= min_lon <= max_lon <= 180):
+                raise ValidationError({'bbox': 'Coordinates out of range'})
+            queryset = filter_bbox(queryset, view.near_filter_fields, min_lat, min_lon, max_lat, max_lon)
+        near = request.query_params.get('near', '').strip()
+        if not near:
+            return queryset
+        point = geocode(near)
+        if point is None:
+            raise ValidationError({'near': 'Unknown place; use a city name or "lat,lon"'})
+        try:
+            radius_km = float(request.query_params.get('radius_km', DEFAULT_RADIUS_KM))
+        except ValueError:
+            raise ValidationError({'radius_km': 'Must be a number'})
+        if not 0 < radius_km <= MAX_RADIUS_KM:
+            raise ValidationError({'radius_km': f'Must be between 0 and {MAX_RADIUS_KM}'})
+        return filter_near(queryset, view.near_filter_fields, *point, radius_km)
+
+
+def set_location(instance, texts, lat_field, lon_field, cell_field):
+    """Geocode the first resolvable text onto ``instance``'s coordinate fields."""
+    point = next(filter(None, (geocode(text) for text in texts if text)), None)
+    lat, lon = point or (None, None)
+    setattr(instance, lat_field, lat)
+    setattr(instance, lon_field, lon)
+    setattr(instance, cell_field, grid_cell(lat, lon))
@@ -0,0 +1,84 @@
+"""
+Indexed containment filters on JSON list fields.
+
+``?service_types=repair&service_types=maintenance`` keeps rows whose list
+contains every given value. Values are taken literally (list entries such
+as "Berlin, DE" contain commas). On Postgres that is ``field @> '["repair", "maintenance"]'``,
+answered by a GIN jsonb_path_ops index created in the app's migrations.
+Other databases can't index inside JSON, so each list element is mirrored
+into a side table with a (field, value) index and the filter joins through
+it. Models opt in with a side table whose foreign key uses
+related_name='list_values' and call ``sync_list_values`` from post_save.
+
+QuerySet.update() and bulk_create() bypass post_save; call
+``rebuild_list_values`` after bulk writes to these fields.
+"""
+from django.db import connections
+from rest_framework.filters import BaseFilterBackend
+
+MAX_VALUES = 20
+
+
+def uses_side_table(using='default'):
+    return connections[using].vendor != 'postgresql'
+
+
+def list_values_fk(model):
+    """Name of the side table's foreign key back to ``model``."""
+    return model._meta.get_field('list_values').field.name
+
+
+def side_table_rows(instance, fields):
+    side_model = instance._meta.get_field('list_values').related_model
+    fk = list_values_fk(type(instance))
+    return [
+        side_model(**{fk: instance, 'field': field, 'value': value})
+        for field in fields
+        for value in {str(value) for value in getattr(instance, field) or [] if value is not None}
+    ]
+
+
+def sync_list_values(instance, fields, update_fields=None, using='default'):
+    """Mirror ``instance``'s list fields into its side table."""
+    if not uses_side_table(using):
+        return
+    if update_fields is not None and not set(update_fields) & set(fields):
+        return
+    instance.list_values.all().delete()
+    instance.list_values.model.objects.bulk_create(side_table_rows(instance, fields))
+
+
+def rebuild_list_values(model, fields, batch_size=500, using='default'):
+    """Repopulate ``model``'s side table from scratch."""
+    if not uses_side_table(using):
+        return
+    side_model = model._meta.get_field('list_values').related_model
+    side_model.objects.using(using).all().delete()
+    rows = []
+    for instance in model.objects.using(using).only('pk', *fields).iterator(chunk_size=batch_size):
+        rows.extend(side_table_rows(instance, fields))
+        if len(rows) >= batch_size:
+            side_model.objects.using(using).bulk_create(rows)
+            rows = []
+    side_model.objects.using(using).bulk_create(rows)
+
+
+def filter_json_lists(queryset, params, fields):
+    for field in fields:
+        values = list(dict.fromkeys(value.strip() for value in params.getlist(field) if value.strip()))[:MAX_VALUES]
+        if not values:
+            continue
+        if uses_side_table(queryset.db):
+            # One join per value; the side table is unique per (row, field, value).
+            for value in values:
+                queryset = queryset.filter(list_values__field=field, list_values__value=value)
+        else:
+            queryset = queryset.filter(**{f'{field}__contains': values})
+    return queryset
+
+
+class JSONListFilter(BaseFilterBackend):
+    """Filter backend for the fields a view lists in ``json_list_filter_fields``."""
+
+    def filter_queryset(self, request, queryset, view):
+        return filter_json_lists(queryset, request.query_params, getattr(view, 'json_list_filter_fields', ()))
@@ -0,0 +1,103 @@
+import hashlib
+
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date
+from rest_framework.response import Response
+
+
+def apply_serializer_relations(queryset, serializer_class):
+    """Apply the select_related/prefetch_related declared on a serializer's Meta."""
+    meta = getattr(serializer_class, 'Meta', None)
+    select_related = getattr(meta, 'select_related', ())
+    prefetch_related = getattr(meta, 'prefetch_related', ())
+    if select_related:
+        queryset = queryset.select_related(*select_related)
+    if prefetch_related:
+        queryset = queryset.prefetch_related(*prefetch_related)
+    return queryset
+
+
+class SerializerRelationsMixin:
+    """
+    Viewset mixin that loads the relations a serializer declares it needs.
+
+    Serializers list them on Meta::
+
+        class Meta:
+            model = Application
+            select_related = ('request',)
+            prefetch_related = ('attachments',)
+
+    Hooking filter_queryset covers list, retrieve and every get_object()
+    call without each viewset having to repeat the joins in get_queryset.
+    """
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        return apply_serializer_relations(queryset, self.get_serializer_class())
+
+
+class ConditionalGetMixin:
+    """
+    Viewset mixin that answers unchanged list and detail GETs with 304.
+
+    The validator is computed before serialization: for a list, one
+    aggregate over the filtered queryset (row count plus the latest of
+    ``conditional_timestamp_fields``); for a detail, the fetched object's
+    own timestamps. Cursor-paginated actions, which must not pay for an
+    aggregate over the whole queryset, use ``page_validator`` on the rows
+    the paginator already fetched instead. Fields may follow relations the
+    serializer embeds, e.g. 'request__updated_at'. ETags are weak and specific to the user, path
+    and query string, and media type. Details also carry Last-Modified for
+    If-Modified-Since; lists don't, since a delete can shrink a list
+    without moving its latest timestamp.
+    """
+    conditional_timestamp_fields = ('updated_at',)
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        return self.conditional_response(
+            self.list_validator(queryset), None, lambda: super(ConditionalGetMixin, self).list(request, *args, **kwargs)
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        instance = self.get_object()
+        timestamps = [value for value in (self._follow(instance, field) for field in self.conditional_timestamp_fields) if value]
+        last_modified = int(max(timestamps).timestamp()) if timestamps else None
+        return self.conditional_response(
+            [instance.pk, *timestamps], last_modified, lambda: Response(self.get_serializer(instance).data)
+        )
+
+    def list_validator(self, queryset):
+        latest = {f'latest_{i}': Max(field) for i, field in enumerate(self.conditional_timestamp_fields)}
+        values = queryset.order_by().aggregate(count=Count('pk', distinct=True), **latest)
+        return [values['count'], *(values[name] for name in latest)]
+
+    def page_validator(self, rows, *extra):
+        """Validator built from an already fetched page: each row's pk and timestamps, plus paginator state."""
+        fields = self.conditional_timestamp_fields
+        return [*([row.pk, *(self._follow(row, field) for field in fields)] for row in rows), *extra]
+
+    def conditional_response(self, validator, last_modified, respond):
+        request = self.request
+        parts = [request.user.pk, request.get_full_path(), getattr(request, 'accepted_media_type', ''), *validator]
+        digest = hashlib.blake2b(repr(parts).encode(), digest_size=16).hexdigest()
+        etag = f'W/"{digest}"'
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is None:
+            response = respond()
+        if response.status_code in (200, 304):
+            response['ETag'] = etag
+            if last_modified is not None:
+                response['Last-Modified'] = http_date(last_modified)
+        patch_vary_headers(response, ('Authorization',))
+        return response
+
+    @staticmethod
+    def _follow(instance, path):
+        for name in path.split('__'):
+            instance = getattr(instance, name, None)
+            if instance is None:
+                return None
+        return instance
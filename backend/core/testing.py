@@ -0,0 +1,31 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+class QueryBudgetMixin:
+    """
+    TestCase mixin asserting a list endpoint runs a fixed number of queries.
+
+    ``make_row`` is called to grow the table between requests; the query
+    count must not change with the number of rows on the page.
+    """
+
+    def assertListQueryBudget(self, client, url, budget, make_row, sizes=(1, 5)):
+        counts = []
+        created = 0
+        for size in sizes:
+            while created < size:
+                make_row()
+                created += 1
+            with CaptureQueriesContext(connection) as ctx:
+                response = client.get(url)
+            self.assertEqual(response.status_code, 200, response.content)
+            counts.append(len(ctx.captured_queries))
+        self.assertEqual(
+            len(set(counts)), 1,
+            f'{url} query count grows with page size: {dict(zip(sizes, counts))}',
+        )
+        self.assertLessEqual(
+            counts[0], budget,
+            f'{url} ran {counts[0]} queries, budget is {budget}',
+        )
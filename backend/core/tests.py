@@ -0,0 +1,297 @@
+from django.test import TestCase
+
+
+class BloomFilterTest(TestCase):
+    def test_membership_and_error_rate(self):
+        from core.bloom import BloomFilter
+        bloom = BloomFilter(1000, error_rate=0.01)
+        for i in range(1000):
+            bloom.add(f'jti-{i}')
+        self.assertTrue(all(f'jti-{i}' in bloom for i in range(1000)))
+        false_positives = sum(f'other-{i}' in bloom for i in range(10000))
+        self.assertLess(false_positives, 300)
+        self.assertTrue(bloom.full)
+
+
+class ConnectionPoolTest(TestCase):
+    def make_pool(self, **options):
+        import sqlite3
+        from core.db.pool import ConnectionPool
+
+        def is_closed(connection):
+            try:
+                connection.total_changes
+            except sqlite3.ProgrammingError:
+                return True
+            return False
+
+        def reset(connection):
+            if connection.in_transaction:
+                connection.rollback()
+
+        pool = ConnectionPool(lambda c: c.execute('SELECT 1'), reset, is_closed, options)
+        return pool, lambda: sqlite3.connect(':memory:', check_same_thread=False)
+
+    def test_reuses_connections_up_to_max_size(self):
+        from core.db.pool import PoolTimeout
+        pool, connect = self.make_pool(MAX_SIZE=2, TIMEOUT=0.05)
+        first = pool.acquire(connect)
+        pool.release(first)
+        self.assertIs(pool.acquire(connect), first)
+        second = pool.acquire(connect)
+        with self.assertRaises(PoolTimeout):
+            pool.acquire(connect)
+        pool.release(second)
+        self.assertIs(pool.acquire(connect), second)
+        stats = pool.stats()
+        self.assertEqual((stats['open'], stats['in_use'], stats['timeouts']), (2, 2, 1))
+        self.assertEqual(stats['setup']['count'], 2)
+
+    def test_checkout_replaces_dead_connections(self):
+        pool, connect = self.make_pool(CHECK_AFTER=0)
+        connection = pool.acquire(connect)
+        pool.release(connection)
+        connection.close()
+        replacement = pool.acquire(connect)
+        self.assertIsNot(replacement, connection)
+        self.assertEqual(pool.stats()['discarded'], 1)
+        self.assertEqual(pool.stats()['open'], 1)
+
+    def test_release_rolls_back_open_transaction(self):
+        pool, connect = self.make_pool()
+        connection = pool.acquire(connect)
+        connection.execute('CREATE TABLE t (x)')
+        connection.commit()
+        connection.execute('INSERT INTO t VALUES (1)')
+        pool.release(connection)
+        connection = pool.acquire(connect)
+        self.assertFalse(connection.in_transaction)
+        self.assertEqual(connection.execute('SELECT count(*) FROM t').fetchone(), (0,))
+
+    def test_waiter_gets_released_connection(self):
+        import threading
+        pool, connect = self.make_pool(MAX_SIZE=1, TIMEOUT=5)
+        connection = pool.acquire(connect)
+        got = []
+        waiter = threading.Thread(target=lambda: got.append(pool.acquire(connect)))
+        waiter.start()
+        pool.release(connection)
+        waiter.join(5)
+        self.assertEqual(got, [connection])
+
+    def test_pooled_engine_returns_connection_on_close(self):
+        import os
+        import tempfile
+        from django.db.utils import ConnectionHandler
+        with tempfile.TemporaryDirectory() as tmp:
+            handler = ConnectionHandler({'default': {
+                'ENGINE': 'core.db.backends.sqlite3', 'NAME': os.path.join(tmp, 'pool.sqlite3'),
+                'POOL': {'MAX_SIZE': 1},
+            }})
+            wrapper = handler['default']
+            with wrapper.cursor() as cursor:
+                cursor.execute('SELECT 1')
+            raw = wrapper.connection
+            wrapper.close()
+            self.assertIsNone(wrapper.connection)
+            wrapper.ensure_connection()
+            self.assertIs(wrapper.connection, raw)
+            self.assertEqual(wrapper.pool.stats()['open'], 1)
+            wrapper.close()
+            wrapper.pool.close_idle()
+
+    def test_stats_are_staff_only(self):
+        from rest_framework.test import APIClient
+        from users.models import User
+        client = APIClient()
+        client.force_authenticate(User.objects.create(username='poolbuyer', role='buyer'))
+        self.assertEqual(client.get('/api/health/db-pool/').status_code, 403)
+        client.force_authenticate(User.objects.create(username='poolstaff', role='admin', is_staff=True))
+        self.assertEqual(client.get('/api/health/db-pool/').status_code, 200)
+        self.assertEqual(client.get('/api/health/').json(), {'status': 'ok'})
+
+
+class TieredCacheTest(TestCase):
+    CACHES = {
+        'default': {
+            'BACKEND': 'core.cache.TieredCache',
+            'OPTIONS': {'SHARED': 'shared', 'LOCAL_MAX_BYTES': 1024, 'LOCAL_TIMEOUT': 60},
+        },
+        'shared': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'tiered-test'},
+    }
+
+    def test_local_tier_fronts_shared_tier(self):
+        from django.core.cache import caches
+        from django.test import override_settings
+        with override_settings(CACHES=self.CACHES):
+            cache, shared = caches['default'], caches['shared']
+            cache.set('k', {'v': 1}, 30)
+            self.assertEqual(shared.get('k'), {'v': 1})
+            shared.delete('k')
+            self.assertEqual(cache.get('k'), {'v': 1})  # served locally until LOCAL_TIMEOUT
+
+            shared.set('other', 'from another worker')
+            self.assertEqual(cache.get('other'), 'from another worker')
+            self.assertTrue(cache.add('n', 1))
+            self.assertEqual(cache.incr('n'), 2)
+            self.assertEqual(cache.get('n'), 2)
+
+            cache.set('big', 'x' * 2000)  # larger than the local tier; kept only in the shared one
+            self.assertNotIn(cache.make_and_validate_key('big'), cache.local.entries)
+            for i in range(20):
+                cache.set(f'fill-{i}', 'y' * 100)
+            self.assertLessEqual(cache.local.bytes, 1024)
+            self.assertEqual(cache.get('fill-0'), 'y' * 100)
+            cache.clear()
+
+    def test_fetch_coalesces_concurrent_misses(self):
+        import threading
+        import time
+        from django.core.cache import caches
+        from django.test import override_settings
+        from core.cache import fetch
+        calls = []
+
+        def compute():
+            calls.append(1)
+            time.sleep(0.2)
+            return 'value'
+
+        with override_settings(CACHES=self.CACHES):
+            caches['default'].clear()
+            results = []
+            threads = [threading.Thread(target=lambda: results.append(fetch('hot', compute, 60))) for _ in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            self.assertEqual(results, ['value'] * 8)
+            self.assertEqual(len(calls), 1)
+            caches['default'].clear()
+
+    def test_fetch_refreshes_early_and_serves_stale_while_locked(self):
+        import time
+        from unittest import mock
+        from django.core.cache import caches
+        from django.test import override_settings
+        from core.cache import fetch
+        with override_settings(CACHES=self.CACHES):
+            cache = caches['default']
+            cache.clear()
+            # Expires in 1s, computed in 10s; a draw near 1 pushes the
+            # XFetch check past expiry, so the refresh is due.
+            cache.set('hot', ('old', 10.0, time.time() + 1), 60)
+            cache.add('hot:lock', 1, 30)
+            with mock.patch('core.cache.random.random', return_value=0.999):
+                self.assertEqual(fetch('hot', lambda: 'new', 60), 'old')
+                cache.delete('hot:lock')
+                self.assertEqual(fetch('hot', lambda: 'new', 60), 'new')
+            self.assertFalse(cache.has_key('hot:lock'))
+            cache.clear()
+
+    def test_fetch_serves_entry_far_from_expiry_without_recomputing(self):
+        import time
+        from unittest import mock
+        from django.core.cache import caches
+        from django.test import override_settings
+        from core.cache import fetch
+
+        def compute():
+            raise AssertionError('recomputed a fresh entry')
+
+        with override_settings(CACHES=self.CACHES):
+            cache = caches['default']
+            cache.clear()
+            # 60s left and computed in 10s: a draw near 0 moves the check by
+            # about 0.01s, nowhere near expiry.
+            cache.set('hot', ('cached', 10.0, time.time() + 60), 60)
+            with mock.patch('core.cache.random.random', return_value=0.001):
+                self.assertEqual(fetch('hot', compute, 60), 'cached')
+            self.assertFalse(cache.has_key('hot:lock'))
+            cache.clear()
+
+
+class SharedCacheTierTest(TestCase):
+    CACHES = {
+        'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+        'shared': {
+            'BACKEND': 'core.cache.DatabaseCache', 'LOCATION': 'shared_cache_test',
+            'OPTIONS': {'MAX_ENTRIES': 3, 'CULL_PROBABILITY': 0},
+        },
+    }
+
+    def _cache(self):
+        from django.core.cache import caches
+        from django.core.management import call_command
+        call_command('createcachetable', 'shared_cache_test', database='default')
+        return caches['shared']
+
+    def _expires(self, cache, key):
+        from django.db import connection
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT expires FROM shared_cache_test WHERE cache_key = %s', [cache.make_key(key)])
+            return cursor.fetchone()[0]
+
+    def test_db_tier_incr_keeps_expiry_and_writes_skip_count(self):
+        from django.db import connection
+        from django.test import override_settings
+        from django.test.utils import CaptureQueriesContext
+        with override_settings(CACHES=self.CACHES):
+            cache = self._cache()
+            self.assertTrue(cache.add('hits', 1, 30))
+            self.assertFalse(cache.add('hits', 5, 30))
+            expires = self._expires(cache, 'hits')
+            self.assertEqual(cache.incr('hits'), 2)
+            self.assertEqual(cache.decr('hits', 5), -3)
+            self.assertEqual(cache.get('hits'), -3)
+            self.assertEqual(self._expires(cache, 'hits'), expires)
+            with self.assertRaises(ValueError):
+                cache.incr('missing')
+
+            with CaptureQueriesContext(connection) as queries:
+                for i in range(5):
+                    cache.set(f'k{i}', i, 30)
+            self.assertFalse([q for q in queries if 'COUNT' in q['sql']])
+            cache.cull()
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT COUNT(*) FROM shared_cache_test')
+                self.assertEqual(cursor.fetchone()[0], 4)  # 6 entries, a third culled
+
+    def test_db_tier_incr_retries_after_concurrent_write(self):
+        from unittest import mock
+        from django.test import override_settings
+        with override_settings(CACHES=self.CACHES):
+            cache = self._cache()
+            cache.set('hits', 10, 30)
+            read = type(cache)._read_counter
+            raced = []
+
+            def racing_read(self, *args):
+                value = read(self, *args)
+                if not raced:
+                    # Another process increments between our read and write.
+                    raced.append(1)
+                    cache.set('hits', 20, 30)
+                return value
+
+            with mock.patch.object(type(cache), '_read_counter', racing_read):
+                self.assertEqual(cache.incr('hits', 5), 25)
+            self.assertEqual(cache.get('hits'), 25)
+
+    def test_file_tier_incr_keeps_expiry(self):
+        import tempfile
+        import time
+        from django.core.cache import caches
+        from django.test import override_settings
+        with tempfile.TemporaryDirectory() as tmp:
+            with override_settings(CACHES={
+                'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+                'shared': {'BACKEND': 'core.cache.FileBasedCache', 'LOCATION': tmp},
+            }):
+                cache = caches['shared']
+                cache.set('hits', 1, 1)
+                self.assertEqual(cache.incr('hits', 2), 3)
+                time.sleep(1.1)
+                self.assertIsNone(cache.get('hits'))  # incr did not extend the one-second expiry
+                with self.assertRaises(ValueError):
+                    cache.incr('hits')
@@ -0,0 +1,83 @@
+"""
+Reference counting for content-addressed document blobs.
+
+Every Document holds a reference to the Blob named by its file_key; the
+counts are kept by documents.signals with F-expression updates, so
+attaching a file that's already stored is a metadata insert. Blobs are never
+deleted inline. ``collect`` (the ``collect_document_blobs`` command) repairs
+the counts from the Document table and reclaims blobs nothing references
+once they have been idle for a grace period, which protects uploads that
+have stored their bytes but not yet created their Document.
+"""
+from datetime import timedelta
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F
+from django.utils import timezone
+
+from .models import Blob, Document
+from .storage import get_storage
+
+GRACE_PERIOD = timedelta(hours=1)
+
+
+def add_ref(key, size_bytes):
+    now = timezone.now()
+    if Blob.objects.filter(key=key).update(ref_count=F('ref_count') + 1, updated_at=now):
+        return
+    try:
+        with transaction.atomic():
+            Blob.objects.create(key=key, size_bytes=size_bytes, ref_count=1)
+    except IntegrityError:
+        Blob.objects.filter(key=key).update(ref_count=F('ref_count') + 1, updated_at=now)
+
+
+def release(key):
+    Blob.objects.filter(key=key).update(ref_count=F('ref_count') - 1, updated_at=timezone.now())
+
+
+def recount():
+    """Rewrite ref counts from the Document table; returns the number of rows fixed."""
+    actual = dict(
+        Document.objects.order_by().values_list('file_key').annotate(n=Count('pk'))
+    )
+    sizes = dict(Document.objects.order_by().values_list('file_key', 'size_bytes').distinct())
+    fixed = 0
+    for blob in Blob.objects.iterator():
+        expected = actual.pop(blob.key, 0)
+        if blob.ref_count != expected:
+            Blob.objects.filter(key=blob.key).update(ref_count=expected)
+            fixed += 1
+    Blob.objects.bulk_create(
+        [Blob(key=key, size_bytes=sizes[key], ref_count=n) for key, n in actual.items()],
+        ignore_conflicts=True,
+    )
+    return fixed + len(actual)
+
+
+def collect(grace_period=GRACE_PERIOD, dry_run=False):
+    """Delete unreferenced blobs older than ``grace_period``; returns (blobs, bytes) reclaimed."""
+    storage = get_storage()
+    cutoff = timezone.now() - grace_period
+    reclaimed = reclaimed_bytes = 0
+
+    with transaction.atomic():
+        dead = list(
+            Blob.objects.select_for_update().filter(ref_count__lte=0, updated_at__lt=cutoff)
+        )
+        if not dry_run:
+            Blob.objects.filter(pk__in=[blob.pk for blob in dead], ref_count__lte=0).delete()
+    dead_keys = {blob.key for blob in dead}
+    known = set(Blob.objects.values_list('key', flat=True))
+
+    for key, age in storage.iter_keys():
+        # Dead rows and files without any row (uploads that never became a
+        # Document). Saving duplicate content refreshes the file's mtime, so
+        # a blob that is being re-attached right now is skipped.
+        if age < grace_period.total_seconds() or (key in known and key not in dead_keys):
+            continue
+        reclaimed += 1
+        reclaimed_bytes += storage.size(key)
+        if not dry_run:
+            storage.delete(key)
+    return reclaimed, reclaimed_bytes
@@ -0,0 +1,33 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from documents.blobs import GRACE_PERIOD, collect, recount
+
+
+class Command(BaseCommand):
+    help = 'Repair blob reference counts and delete blobs no Document references'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--grace-minutes', type=int, default=int(GRACE_PERIOD.total_seconds() // 60),
+                            help='Minimum idle time before an unreferenced blob is deleted (default: 60)')
+        parser.add_argument('--dry-run', action='store_true', help='Report without deleting')
+
+    def handle(self, *args, **options):
+        grace_period = timedelta(minutes=options['grace_minutes'])
+        if options['dry_run']:
+            # Same recount as a real run, rolled back, so legacy files it
+            # would adopt aren't reported as reclaimable.
+            with transaction.atomic():
+                fixed = recount()
+                blobs, size = collect(grace_period, dry_run=True)
+                transaction.set_rollback(True)
+        else:
+            fixed = recount()
+            blobs, size = collect(grace_period)
+        if fixed:
+            verb = 'Would repair' if options['dry_run'] else 'Repaired'
+            self.stdout.write(self.style.WARNING(f'{verb} {fixed} blob reference counts'))
+        verb = 'Would reclaim' if options['dry_run'] else 'Reclaimed'
+        self.stdout.write(self.style.SUCCESS(f'{verb} {blobs} blobs ({size} bytes)'))
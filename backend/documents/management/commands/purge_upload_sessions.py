@@ -0,0 +1,23 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from documents import uploads
+from documents.models import UploadSession
+
+
+class Command(BaseCommand):
+    help = 'Delete upload sessions that were abandoned, along with their staged chunks'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hours', type=int, default=48, help='Idle time before an open session is purged (default: 48)')
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(hours=options['hours'])
+        purged = 0
+        for session in UploadSession.objects.filter(status='open', updated_at__lt=cutoff).iterator():
+            uploads.discard(session)
+            session.delete()
+            purged += 1
+        self.stdout.write(self.style.SUCCESS(f'Purged {purged} upload sessions'))
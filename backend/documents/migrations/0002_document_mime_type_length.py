@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-18 12:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("documents", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="document",
+            name="mime_type",
+            field=models.CharField(max_length=100),
+        ),
+    ]
@@ -0,0 +1,82 @@
+# Generated by Django 4.2.30 on 2026-10-18 12:38
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("providers", "0002_providerprofile_rating_aggregates"),
+        ("service_requests", "0003_servicerequest_feed_index"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("documents", "0002_document_mime_type_length"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="UploadSession",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("type", models.CharField(max_length=50)),
+                ("file_name", models.CharField(max_length=255)),
+                ("mime_type", models.CharField(max_length=100)),
+                ("access_scope", models.CharField(max_length=20)),
+                ("total_size", models.BigIntegerField()),
+                ("chunk_size", models.IntegerField()),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[("open", "Open"), ("committed", "Committed")],
+                        default="open",
+                        max_length=20,
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "document",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        to="documents.document",
+                    ),
+                ),
+                (
+                    "owner_user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+                (
+                    "provider_profile",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        to="providers.providerprofile",
+                    ),
+                ),
+                (
+                    "request",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        to="service_requests.servicerequest",
+                    ),
+                ),
+            ],
+        ),
+    ]
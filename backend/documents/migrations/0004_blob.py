@@ -0,0 +1,31 @@
+# Generated by Django 4.2.30 on 2026-10-18 12:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("documents", "0003_uploadsession"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Blob",
+            fields=[
+                (
+                    "key",
+                    models.CharField(max_length=255, primary_key=True, serialize=False),
+                ),
+                ("size_bytes", models.BigIntegerField()),
+                ("ref_count", models.IntegerField(default=0)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AlterField(
+            model_name="document",
+            name="file_key",
+            field=models.CharField(db_index=True, max_length=255),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-18 13:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("documents", "0004_blob"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="document",
+            name="size_bytes",
+            field=models.BigIntegerField(),
+        ),
+    ]
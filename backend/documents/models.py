@@ -8,9 +8,49 @@ class Document(models.Model):
     request = models.ForeignKey(ServiceRequest, on_delete=models.SET_NULL, null=True, blank=True)
     provider_profile = models.ForeignKey(ProviderProfile, on_delete=models.SET_NULL, null=True, blank=True)
     type = models.CharField(max_length=50)
-    file_key = models.CharField(max_length=255)
+    file_key = models.CharField(max_length=255, db_index=True)
     file_name = models.CharField(max_length=255)
-    mime_type = models.CharField(max_length=50)
-    size_bytes = models.IntegerField()
+    mime_type = models.CharField(max_length=100)
+    size_bytes = models.BigIntegerField()
     uploaded_at = models.DateTimeField(auto_now_add=True)
     access_scope = models.CharField(max_length=20)
+
+
+class UploadSession(models.Model):
+    """A resumable, chunked upload; becomes a Document on commit (see documents.uploads)."""
+    STATUS_CHOICES = [
+        ('open', 'Open'),
+        ('committed', 'Committed'),
+    ]
+
+    owner_user = models.ForeignKey(User, on_delete=models.CASCADE)
+    request = models.ForeignKey(ServiceRequest, on_delete=models.SET_NULL, null=True, blank=True)
+    provider_profile = models.ForeignKey(ProviderProfile, on_delete=models.SET_NULL, null=True, blank=True)
+    type = models.CharField(max_length=50)
+    file_name = models.CharField(max_length=255)
+    mime_type = models.CharField(max_length=100)
+    access_scope = models.CharField(max_length=20)
+    total_size = models.BigIntegerField()
+    chunk_size = models.IntegerField()
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='open')
+    document = models.ForeignKey(Document, on_delete=models.SET_NULL, null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    @property
+    def total_chunks(self):
+        return max(1, -(-self.total_size // self.chunk_size))
+
+    def expected_chunk_size(self, index):
+        if index == self.total_chunks - 1:
+            return self.total_size - self.chunk_size * index
+        return self.chunk_size
+
+
+class Blob(models.Model):
+    """A stored file content, shared by every Document with this file_key."""
+    key = models.CharField(max_length=255, primary_key=True)
+    size_bytes = models.BigIntegerField()
+    ref_count = models.IntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
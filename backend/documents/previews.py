@@ -0,0 +1,187 @@
+"""
+Thumbnail and preview derivatives for documents.
+
+Images (and the first page of PDFs, when PyMuPDF is installed) are rendered
+to JPEG at each of SIZES in a process pool, off the request path. Because
+file keys are content hashes, derivatives are stored per key under
+DOCUMENT_PREVIEW_ROOT and shared by every Document with the same content;
+they never need invalidating. A failed render is retried after a backoff
+(FAILURE_RETRY_SECONDS, doubling per failure), so a transient error doesn't
+disable previews for that content until the process restarts.
+"""
+import logging
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+
+from .storage import CHUNK_SIZE, get_storage
+
+logger = logging.getLogger(__name__)
+
+SIZES = {'small': 128, 'medium': 512, 'large': 1024}
+IMAGE_TYPES = {'image/jpeg', 'image/png', 'image/gif', 'image/webp', 'image/bmp', 'image/tiff'}
+PDF_TYPE = 'application/pdf'
+FAILURE_RETRY_SECONDS = 60
+FAILURE_RETRY_MAX_SECONDS = 6 * 60 * 60
+
+
+def preview_root():
+    return os.fspath(getattr(settings, 'DOCUMENT_PREVIEW_ROOT', None)
+                     or os.path.join(settings.MEDIA_ROOT, 'previews'))
+
+
+def preview_path(key, size):
+    return os.path.join(preview_root(), key[:2], f'{key}-{size}.jpg')
+
+
+def _pdf_supported():
+    try:
+        import fitz  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def supports(mime_type):
+    return mime_type in IMAGE_TYPES or (mime_type == PDF_TYPE and _pdf_supported())
+
+
+def _open_source(source_path, mime_type, max_size):
+    from PIL import Image
+
+    if mime_type == PDF_TYPE:
+        import fitz
+
+        with fitz.open(source_path) as pdf:
+            page = pdf[0]
+            zoom = max_size / max(page.rect.width, page.rect.height)
+            pixmap = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), alpha=False)
+            return Image.frombytes('RGB', (pixmap.width, pixmap.height), pixmap.samples)
+
+    image = Image.open(source_path)
+    # Lets the JPEG decoder downscale by up to 8x while decoding.
+    image.draft('RGB', (max_size, max_size))
+    return image
+
+
+def render(source_path, mime_type, key, root):
+    """Write every size for ``key``; runs in a pool worker, so it takes no Django state."""
+    from PIL import ImageOps
+
+    image = _open_source(source_path, mime_type, max(SIZES.values()))
+    image = ImageOps.exif_transpose(image).convert('RGB')
+    directory = os.path.join(root, key[:2])
+    os.makedirs(directory, exist_ok=True)
+    # Largest first, so each smaller size is resampled from the previous one.
+    for name, edge in sorted(SIZES.items(), key=lambda item: -item[1]):
+        image.thumbnail((edge, edge))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.preview-')
+        with os.fdopen(fd, 'wb') as tmp:
+            image.save(tmp, 'JPEG', quality=82, optimize=True)
+        os.replace(tmp_path, os.path.join(directory, f'{key}-{name}.jpg'))
+    return key
+
+
+_executor = None
+_pending = set()
+_failed = {}  # key -> (monotonic time of the next retry, failures so far)
+_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(max_workers=settings.DOCUMENT_PREVIEW_WORKERS)
+    return _executor
+
+
+def status(document, size):
+    """One of 'ready', 'pending', 'failed' or 'unsupported'."""
+    if os.path.exists(preview_path(document.file_key, size)):
+        return 'ready'
+    if not supports(document.mime_type):
+        return 'unsupported'
+    if _failed_recently(document.file_key):
+        return 'failed'
+    return 'pending'
+
+
+def schedule(document):
+    """
+    Queue preview generation for ``document`` unless it's done or running.
+
+    With DOCUMENT_PREVIEW_WORKERS = 0 (e.g. on serverless hosts, where
+    process pools aren't available) previews are rendered inline instead.
+    """
+    key, mime_type = document.file_key, document.mime_type
+    if status(document, 'small') != 'pending':
+        return
+    with _lock:
+        if key in _pending:
+            return
+        _pending.add(key)
+    storage = get_storage()
+    spooled = not hasattr(storage, 'path')
+    source_path = _spool(storage, key) if spooled else storage.path(key)
+    if not settings.DOCUMENT_PREVIEW_WORKERS:
+        try:
+            render(source_path, mime_type, key, preview_root())
+        except Exception as exc:
+            _record_failure(key, exc)
+        else:
+            _record_success(key)
+        finally:
+            _cleanup(key, source_path, spooled)
+        return
+    try:
+        future = _get_executor().submit(render, source_path, mime_type, key, preview_root())
+    except Exception:
+        _cleanup(key, source_path, spooled)
+        raise
+    future.add_done_callback(lambda f: _finished(f, key, source_path, spooled))
+
+
+def _spool(storage, key):
+    fd, path = tempfile.mkstemp(prefix='preview-src-')
+    with os.fdopen(fd, 'wb') as tmp, storage.open(key) as source:
+        for chunk in iter(lambda: source.read(CHUNK_SIZE), b''):
+            tmp.write(chunk)
+    return path
+
+
+def _cleanup(key, source_path, spooled):
+    with _lock:
+        _pending.discard(key)
+    if spooled:
+        os.unlink(source_path)
+
+
+def _finished(future, key, source_path, spooled):
+    if future.exception() is not None:
+        _record_failure(key, future.exception())
+    else:
+        _record_success(key)
+    _cleanup(key, source_path, spooled)
+
+
+def _failed_recently(key):
+    with _lock:
+        entry = _failed.get(key)
+    return entry is not None and entry[0] > time.monotonic()
+
+
+def _record_failure(key, exc):
+    with _lock:
+        failures = _failed.get(key, (0, 0))[1] + 1
+        delay = min(FAILURE_RETRY_SECONDS * 2 ** (failures - 1), FAILURE_RETRY_MAX_SECONDS)
+        _failed[key] = (time.monotonic() + delay, failures)
+    logger.warning('Preview generation failed for %s (attempt %d, retry in %ds): %s', key, failures, delay, exc)
+
+
+def _record_success(key):
+    with _lock:
+        _failed.pop(key, None)
@@ -0,0 +1,83 @@
+"""
+HTTP Range support for document downloads.
+
+Only single byte ranges are served as 206 responses; multi-range requests get
+the full file (allowed by RFC 9110). Bodies are streamed in CHUNK_SIZE
+pieces, so memory use per request stays constant whatever the file size.
+"""
+import re
+
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+from django.utils.http import content_disposition_header
+
+from .storage import CHUNK_SIZE
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+def parse_range(header, size):
+    """
+    Resolve a Range header to an inclusive (start, end) pair.
+
+    Returns None when the header should be ignored (absent, malformed or
+    multi-range) and raises ValueError when the range is unsatisfiable.
+    """
+    match = RANGE_RE.match((header or '').strip())
+    if not match:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        # Suffix range: the last N bytes.
+        length = int(last)
+        if length == 0:
+            raise ValueError('Empty suffix range')
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        raise ValueError('Range not satisfiable')
+    return start, end
+
+
+def iter_range(fileobj, start, end, chunk_size=CHUNK_SIZE):
+    try:
+        fileobj.seek(start)
+        remaining = end - start + 1
+        while remaining > 0:
+            chunk = fileobj.read(min(chunk_size, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+    finally:
+        fileobj.close()
+
+
+def ranged_file_response(request, storage, key, content_type, filename):
+    size = storage.size(key)
+    try:
+        byte_range = parse_range(request.headers.get('Range'), size)
+    except ValueError:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{size}'
+        response['Accept-Ranges'] = 'bytes'
+        return response
+
+    if byte_range is None:
+        # FileResponse hands real files to wsgi.file_wrapper (sendfile) when available.
+        response = FileResponse(
+            storage.open(key), as_attachment=True, filename=filename, content_type=content_type
+        )
+        response['Content-Length'] = size
+    else:
+        start, end = byte_range
+        response = StreamingHttpResponse(
+            iter_range(storage.open(key), start, end), status=206, content_type=content_type
+        )
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+        response['Content-Length'] = end - start + 1
+        response['Content-Disposition'] = content_disposition_header(True, filename)
+    response['Accept-Ranges'] = 'bytes'
+    return response
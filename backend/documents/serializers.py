@@ -1,8 +1,96 @@
+from django.conf import settings
 from rest_framework import serializers
-from .models import Document
+from . import uploads
+from .models import Document, UploadSession
+from .storage import get_storage, store_file
 
 class DocumentSerializer(serializers.ModelSerializer):
+    file = serializers.FileField(write_only=True, required=False)
+    # Attach content the user has uploaded before without sending it again.
+    sha256 = serializers.RegexField(r'^[0-9a-f]{64}$', write_only=True, required=False)
+
     class Meta:
         model = Document
         fields = '__all__'
-        read_only_fields = ['owner_user', 'uploaded_at', 'size_bytes']
+        read_only_fields = ['owner_user', 'uploaded_at', 'file_key', 'size_bytes']
+        extra_kwargs = {
+            'file_name': {'required': False},
+            'mime_type': {'required': False},
+        }
+
+    def get_fields(self):
+        fields = super().get_fields()
+        if self.instance is not None:
+            # The blob is fixed once uploaded; metadata stays editable.
+            fields['file'].read_only = True
+            fields['sha256'].read_only = True
+        return fields
+
+    def validate(self, attrs):
+        if self.instance is not None:
+            return attrs
+        if ('file' in attrs) == ('sha256' in attrs):
+            raise serializers.ValidationError('Provide either file or sha256')
+        if 'sha256' in attrs:
+            # Only content the user already holds, so a hash alone grants no access.
+            source = Document.objects.filter(
+                owner_user=self.context['request'].user, file_key=attrs['sha256']
+            ).first()
+            if source is None:
+                raise serializers.ValidationError({'sha256': 'No uploaded file with this hash'})
+            attrs['source'] = source
+        return attrs
+
+    def create(self, validated_data):
+        validated_data.pop('sha256', None)
+        source = validated_data.pop('source', None)
+        if source is not None:
+            validated_data.setdefault('file_name', source.file_name)
+            validated_data.setdefault('mime_type', source.mime_type)
+            validated_data['file_key'] = source.file_key
+            validated_data['size_bytes'] = source.size_bytes
+            return super().create(validated_data)
+
+        upload = validated_data.pop('file')
+        validated_data.setdefault('file_name', upload.name[:255])
+        validated_data.setdefault('mime_type', (upload.content_type or 'application/octet-stream')[:100])
+        if hasattr(upload, 'temporary_file_path'):
+            # Large uploads are already spooled to disk; move instead of copying.
+            key, size = store_file(upload.temporary_file_path())
+        else:
+            key, size = get_storage().save(upload.chunks())
+        validated_data['file_key'] = key
+        validated_data['size_bytes'] = size
+        return super().create(validated_data)
+
+
+class UploadSessionSerializer(serializers.ModelSerializer):
+    total_chunks = serializers.IntegerField(read_only=True)
+    received_chunks = serializers.SerializerMethodField()
+    next_chunk = serializers.SerializerMethodField()
+
+    class Meta:
+        model = UploadSession
+        fields = '__all__'
+        read_only_fields = ['owner_user', 'status', 'document', 'created_at', 'updated_at']
+        extra_kwargs = {'chunk_size': {'required': False}}
+
+    def get_received_chunks(self, obj):
+        return uploads.received_chunks(obj)
+
+    def get_next_chunk(self, obj):
+        return uploads.next_chunk(obj)
+
+    def validate(self, attrs):
+        limit = getattr(settings, 'DOCUMENT_UPLOAD_MAX_SIZE', 2 * 1024 ** 3)
+        total_size = attrs.get('total_size', 0)
+        if not 0 <= total_size <= limit:
+            raise serializers.ValidationError({'total_size': f'Must be between 0 and {limit} bytes'})
+        chunk_size = attrs.setdefault(
+            'chunk_size', getattr(settings, 'DOCUMENT_UPLOAD_CHUNK_SIZE', 8 * 1024 ** 2)
+        )
+        if chunk_size <= 0 or -(-total_size // chunk_size) > uploads.MAX_CHUNKS:
+            raise serializers.ValidationError(
+                {'chunk_size': f'Must be positive and split the file into at most {uploads.MAX_CHUNKS} chunks'}
+            )
+        return attrs
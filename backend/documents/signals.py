@@ -0,0 +1,19 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import blobs, previews
+from .models import Document
+
+
+@receiver(post_save, sender=Document)
+def document_saved(sender, instance, created, **kwargs):
+    if created:
+        blobs.add_ref(instance.file_key, instance.size_bytes)
+        if previews.supports(instance.mime_type):
+            transaction.on_commit(lambda: previews.schedule(instance))
+
+
+@receiver(post_delete, sender=Document)
+def document_deleted(sender, instance, **kwargs):
+    blobs.release(instance.file_key)
@@ -0,0 +1,132 @@
+"""
+Pluggable, content-addressed blob storage for Document files.
+
+The backend is chosen with the DOCUMENT_STORAGE_BACKEND setting (a dotted
+path). Keys are the SHA-256 of the content, computed while the data is
+written, so saving bytes that are already stored keeps the existing blob. A
+backend must provide ``save``, ``open``, ``size``, ``delete``, ``exists`` and
+``iter_keys``; ``path`` and ``save_file`` are optional and let downloads use
+sendfile and uploads move files instead of copying them.
+
+Backends don't track references; see documents.blobs.
+"""
+import hashlib
+import os
+import shutil
+import tempfile
+import time
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+CHUNK_SIZE = 64 * 1024
+
+
+class LocalFileStorage:
+    """Stores blobs on the local filesystem under DOCUMENT_STORAGE_ROOT."""
+
+    def __init__(self, root=None):
+        self.root = os.fspath(root or getattr(settings, 'DOCUMENT_STORAGE_ROOT', None)
+                              or os.path.join(settings.MEDIA_ROOT, 'documents'))
+
+    def path(self, key):
+        # Content addresses are fanned out as ab/cd/<sha256>.
+        relative = key if '/' in key else os.path.join(key[:2], key[2:4], key)
+        path = os.path.abspath(os.path.join(self.root, relative))
+        if not path.startswith(os.path.abspath(self.root) + os.sep):
+            raise ValueError(f'Invalid storage key: {key!r}')
+        return path
+
+    def save(self, chunks):
+        """
+        Write an iterable of byte chunks, hashing as it goes; returns (key, size).
+
+        Data is written to a temporary file and renamed into place, so
+        readers never see a partial blob. If the content is already stored
+        the temporary file is dropped.
+        """
+        os.makedirs(self.root, exist_ok=True)
+        digest = hashlib.sha256()
+        size = 0
+        fd, tmp_path = tempfile.mkstemp(dir=self.root, prefix='.upload-')
+        try:
+            with os.fdopen(fd, 'wb') as tmp:
+                for chunk in chunks:
+                    digest.update(chunk)
+                    tmp.write(chunk)
+                    size += len(chunk)
+            self._commit(tmp_path, digest.hexdigest())
+        finally:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+        return digest.hexdigest(), size
+
+    def save_file(self, source_path):
+        """Move an existing file (e.g. an upload spooled to disk) into storage."""
+        digest = hashlib.sha256()
+        with open(source_path, 'rb') as source:
+            for chunk in iter(lambda: source.read(CHUNK_SIZE), b''):
+                digest.update(chunk)
+        size = os.path.getsize(source_path)
+        self._commit(source_path, digest.hexdigest())
+        if os.path.exists(source_path):
+            os.unlink(source_path)
+        return digest.hexdigest(), size
+
+    def _commit(self, tmp_path, key):
+        path = self.path(key)
+        if os.path.exists(path):
+            # Deduplicated; refresh mtime so collect_document_blobs keeps it.
+            os.utime(path)
+            return
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # shutil.move falls back to a copy when the source is on another filesystem.
+        shutil.move(tmp_path, path)
+
+    def open(self, key):
+        return open(self.path(key), 'rb')
+
+    def size(self, key):
+        return os.path.getsize(self.path(key))
+
+    def exists(self, key):
+        try:
+            return os.path.exists(self.path(key))
+        except ValueError:
+            return False
+
+    def delete(self, key):
+        try:
+            os.unlink(self.path(key))
+        except FileNotFoundError:
+            pass
+
+    def iter_keys(self):
+        """Yield (key, age in seconds) for every stored blob."""
+        now = time.time()
+        for directory, _, names in os.walk(self.root):
+            for name in names:
+                if not name.startswith('.'):
+                    path = os.path.join(directory, name)
+                    key = name if len(name) == 64 else os.path.relpath(path, self.root)
+                    yield key, now - os.path.getmtime(path)
+
+
+_storage = None
+
+
+def get_storage():
+    global _storage
+    if _storage is None:
+        backend = getattr(settings, 'DOCUMENT_STORAGE_BACKEND', 'documents.storage.LocalFileStorage')
+        _storage = import_string(backend)()
+    return _storage
+
+
+def store_file(path, storage=None):
+    """Store the file at ``path``, moving it when the backend supports that; returns (key, size)."""
+    storage = storage or get_storage()
+    if hasattr(storage, 'save_file'):
+        return storage.save_file(path)
+    with open(path, 'rb') as source:
+        return storage.save(iter(lambda: source.read(CHUNK_SIZE), b''))
@@ -1,5 +1,20 @@
-from django.test import TestCase
-from .models import Document
+import hashlib
+import io
+import os
+import shutil
+import tempfile
+import time
+from datetime import timedelta
+from unittest import mock
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from PIL import Image
+from rest_framework.test import APIClient
+from .blobs import collect
+from .models import Blob, Document, UploadSession
+from .storage import LocalFileStorage
 from users.models import User
 
 class DocumentTest(TestCase):
@@ -8,3 +23,219 @@ class DocumentTest(TestCase):
         doc = Document.objects.create(owner_user=user, type='manual', file_key='key', file_name='file.pdf', mime_type='application/pdf', size_bytes=1234, access_scope='owner')
         self.assertEqual(doc.file_name, 'file.pdf')
         self.assertEqual(doc.type, 'manual')
+
+
+class DocumentStorageTest(TestCase):
+    def setUp(self):
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root, ignore_errors=True)
+        patcher = mock.patch('documents.storage._storage', LocalFileStorage(root))
+        self.storage = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.user = User.objects.create(username='docowner', role='buyer')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.content = bytes(range(256)) * 40
+
+    def upload(self):
+        file = SimpleUploadedFile('manual.pdf', self.content, content_type='application/pdf')
+        response = self.client.post('/api/documents/', {'file': file, 'type': 'manual', 'access_scope': 'owner'})
+        self.assertEqual(response.status_code, 201)
+        return response.data
+
+    def test_upload_stores_file_and_computes_size(self):
+        data = self.upload()
+        self.assertEqual(data['size_bytes'], len(self.content))
+        self.assertEqual(data['file_name'], 'manual.pdf')
+        self.assertEqual(data['mime_type'], 'application/pdf')
+        with self.storage.open(data['file_key']) as f:
+            self.assertEqual(f.read(), self.content)
+
+    def test_download_full_and_range(self):
+        doc_id = self.upload()['id']
+        response = self.client.get(f'/api/documents/{doc_id}/download/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), self.content)
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+
+        response = self.client.get(f'/api/documents/{doc_id}/download/', HTTP_RANGE='bytes=100-199')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], f'bytes 100-199/{len(self.content)}')
+        self.assertEqual(b''.join(response.streaming_content), self.content[100:200])
+
+        response = self.client.get(f'/api/documents/{doc_id}/download/', HTTP_RANGE='bytes=-10')
+        self.assertEqual(b''.join(response.streaming_content), self.content[-10:])
+
+        response = self.client.get(f'/api/documents/{doc_id}/download/', HTTP_RANGE=f'bytes={len(self.content)}-')
+        self.assertEqual(response.status_code, 416)
+
+    def test_identical_uploads_share_one_blob(self):
+        first = self.upload()
+        second = self.upload()
+        self.assertEqual(first['file_key'], hashlib.sha256(self.content).hexdigest())
+        self.assertEqual(second['file_key'], first['file_key'])
+        self.assertEqual(Blob.objects.get(key=first['file_key']).ref_count, 2)
+
+        response = self.client.post('/api/documents/', {
+            'sha256': first['file_key'], 'type': 'certificate', 'access_scope': 'owner',
+        })
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['size_bytes'], len(self.content))
+        self.assertEqual(Blob.objects.get(key=first['file_key']).ref_count, 3)
+
+        other = APIClient()
+        other.force_authenticate(User.objects.create(username='stranger', role='buyer'))
+        response = other.post('/api/documents/', {'sha256': first['file_key'], 'type': 'x', 'access_scope': 'owner'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_collect_reclaims_unreferenced_blobs(self):
+        data = self.upload()
+        self.client.delete(f'/api/documents/{data["id"]}/')
+        self.assertEqual(Blob.objects.get(key=data['file_key']).ref_count, 0)
+        self.assertEqual(collect(grace_period=timedelta(hours=1)), (0, 0))
+        self.assertTrue(self.storage.exists(data['file_key']))
+
+        with mock.patch('documents.blobs.timezone.now', return_value=timezone.now() + timedelta(hours=2)), \
+                mock.patch('documents.storage.time.time', return_value=time.time() + 7200):
+            self.assertEqual(collect(), (1, len(self.content)))
+        self.assertFalse(self.storage.exists(data['file_key']))
+        self.assertFalse(Blob.objects.filter(key=data['file_key']).exists())
+
+
+    def test_dry_run_matches_real_run_for_legacy_files(self):
+        from io import StringIO
+        from django.core.management import call_command
+        data = self.upload()
+        Blob.objects.all().delete()  # a file stored before blobs were counted
+        later = timezone.now() + timedelta(hours=2)
+        with mock.patch('documents.blobs.timezone.now', return_value=later), \
+                mock.patch('documents.storage.time.time', return_value=time.time() + 7200):
+            out = StringIO()
+            call_command('collect_document_blobs', dry_run=True, stdout=out)
+            self.assertIn('Would reclaim 0 blobs', out.getvalue())
+            self.assertFalse(Blob.objects.exists())
+            out = StringIO()
+            call_command('collect_document_blobs', stdout=out)
+            self.assertIn('Reclaimed 0 blobs', out.getvalue())
+        self.assertTrue(self.storage.exists(data['file_key']))
+        self.assertEqual(Blob.objects.get(key=data['file_key']).ref_count, 1)
+
+class UploadSessionTest(TestCase):
+    def setUp(self):
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root, ignore_errors=True)
+        patcher = mock.patch('documents.storage._storage', LocalFileStorage(root + '/blobs'))
+        self.storage = patcher.start()
+        self.addCleanup(patcher.stop)
+        staging = override_settings(DOCUMENT_UPLOAD_STAGING_ROOT=root + '/uploads')
+        staging.enable()
+        self.addCleanup(staging.disable)
+        self.user = User.objects.create(username='tech', role='provider')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.content = bytes(range(256)) * 10
+
+    def create_session(self):
+        response = self.client.post('/api/documents/uploads/', {
+            'file_name': 'bundle.zip', 'mime_type': 'application/zip', 'type': 'report',
+            'access_scope': 'owner', 'total_size': len(self.content), 'chunk_size': 1000,
+        })
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['total_chunks'], 3)
+        return response.data['id']
+
+    def put_chunk(self, session_id, index):
+        data = self.content[index * 1000:(index + 1) * 1000]
+        return self.client.put(f'/api/documents/uploads/{session_id}/chunks/{index}/', data,
+                               content_type='application/octet-stream')
+
+    def test_resume_and_commit(self):
+        session_id = self.create_session()
+        self.assertEqual(self.put_chunk(session_id, 0).status_code, 200)
+        self.assertEqual(self.put_chunk(session_id, 2).status_code, 200)
+
+        response = self.client.post(f'/api/documents/uploads/{session_id}/commit/')
+        self.assertEqual(response.status_code, 400)
+        response = self.client.get(f'/api/documents/uploads/{session_id}/')
+        self.assertEqual(response.data['received_chunks'], [0, 2])
+        self.assertEqual(response.data['next_chunk'], 1)
+
+        self.put_chunk(session_id, 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(f'/api/documents/uploads/{session_id}/commit/')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['size_bytes'], len(self.content))
+        with self.storage.open(response.data['file_key']) as f:
+            self.assertEqual(f.read(), self.content)
+        self.assertEqual(UploadSession.objects.get(pk=session_id).status, 'committed')
+        self.assertEqual(self.client.get(f'/api/documents/uploads/{session_id}/').data['received_chunks'], [])
+
+    def test_rejects_wrong_chunk_size(self):
+        session_id = self.create_session()
+        response = self.client.put(f'/api/documents/uploads/{session_id}/chunks/0/', b'short',
+                                   content_type='application/octet-stream')
+        self.assertEqual(response.status_code, 400)
+        response = self.put_chunk(session_id, 3)
+        self.assertEqual(response.status_code, 400)
+
+
+class DocumentPreviewTest(TestCase):
+    def setUp(self):
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root, ignore_errors=True)
+        patcher = mock.patch('documents.storage._storage', LocalFileStorage(root + '/blobs'))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        overrides = override_settings(DOCUMENT_PREVIEW_ROOT=root + '/previews', DOCUMENT_PREVIEW_WORKERS=0)
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+        self.user = User.objects.create(username='photographer', role='provider')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def upload(self, name, content, content_type):
+        file = SimpleUploadedFile(name, content, content_type=content_type)
+        response = self.client.post('/api/documents/', {'file': file, 'type': 'photo', 'access_scope': 'owner'})
+        return response.data['id']
+
+    def test_image_preview(self):
+        buffer = io.BytesIO()
+        Image.new('RGB', (2000, 1000), 'red').save(buffer, 'PNG')
+        doc_id = self.upload('site.png', buffer.getvalue(), 'image/png')
+
+        response = self.client.get(f'/api/documents/{doc_id}/preview/', {'size': 'small'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'image/jpeg')
+        thumbnail = Image.open(io.BytesIO(b''.join(response.streaming_content)))
+        self.assertEqual(thumbnail.size, (128, 64))
+
+        response = self.client.get(f'/api/documents/{doc_id}/preview/', {'size': 'huge'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_unsupported_type(self):
+        doc_id = self.upload('notes.txt', b'plain text', 'text/plain')
+        response = self.client.get(f'/api/documents/{doc_id}/preview/')
+        self.assertEqual(response.status_code, 404)
+
+    def test_failed_preview_is_retried_after_backoff(self):
+        from . import previews
+        buffer = io.BytesIO()
+        Image.new('RGB', (200, 100), 'blue').save(buffer, 'PNG')
+        doc_id = self.upload('flaky.png', buffer.getvalue(), 'image/png')
+        document = Document.objects.get(pk=doc_id)
+        self.addCleanup(previews._failed.pop, document.file_key, None)
+        # The upload already rendered them; start from a missing preview.
+        for size in previews.SIZES:
+            path = previews.preview_path(document.file_key, size)
+            if os.path.exists(path):
+                os.unlink(path)
+
+        with mock.patch('documents.previews.render', side_effect=OSError('transient')):
+            previews.schedule(document)
+        self.assertEqual(previews.status(document, 'small'), 'failed')
+        later = time.monotonic() + previews.FAILURE_RETRY_SECONDS + 1
+        with mock.patch('documents.previews.time.monotonic', return_value=later):
+            self.assertEqual(previews.status(document, 'small'), 'pending')
+            previews.schedule(document)
+        self.assertEqual(previews.status(document, 'small'), 'ready')
+        self.assertNotIn(document.file_key, previews._failed)
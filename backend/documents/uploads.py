@@ -0,0 +1,128 @@
+"""
+Resumable chunked uploads.
+
+Each UploadSession stages its chunks as numbered files under
+DOCUMENT_UPLOAD_STAGING_ROOT/<session id>/. The staged files are the source
+of truth for what has been received, so a client that lost its connection
+asks for the session and resumes from ``next_chunk``. On commit the chunks
+are concatenated in the kernel (copy_file_range, falling back to sendfile)
+and the result is moved into document storage.
+"""
+import os
+import shutil
+import tempfile
+
+from django.conf import settings
+
+from .storage import CHUNK_SIZE, store_file
+
+MAX_CHUNKS = 10000
+
+
+class ChunkError(ValueError):
+    pass
+
+
+def staging_root():
+    return os.fspath(getattr(settings, 'DOCUMENT_UPLOAD_STAGING_ROOT', None)
+                     or os.path.join(settings.MEDIA_ROOT, 'uploads'))
+
+
+def session_dir(session):
+    return os.path.join(staging_root(), str(session.pk))
+
+
+def chunk_path(session, index):
+    return os.path.join(session_dir(session), f'{index:05d}.part')
+
+
+def received_chunks(session):
+    try:
+        names = os.listdir(session_dir(session))
+    except FileNotFoundError:
+        return []
+    return sorted(int(name[:-5]) for name in names if name.endswith('.part'))
+
+
+def next_chunk(session):
+    """The lowest chunk index not received yet, or None when complete."""
+    received = set(received_chunks(session))
+    return next((i for i in range(session.total_chunks) if i not in received), None)
+
+
+def write_chunk(session, index, stream):
+    """
+    Stage chunk ``index`` read from a file-like ``stream``.
+
+    Re-sending a chunk replaces it, so clients can retry blindly. The chunk
+    is only visible once fully written and of the expected size.
+    """
+    if not 0 <= index < session.total_chunks:
+        raise ChunkError(f'Chunk index must be between 0 and {session.total_chunks - 1}')
+    expected = session.expected_chunk_size(index)
+    directory = session_dir(session)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.chunk-')
+    written = 0
+    try:
+        with os.fdopen(fd, 'wb') as tmp:
+            while written <= expected:
+                data = stream.read(min(CHUNK_SIZE, expected + 1 - written))
+                if not data:
+                    break
+                tmp.write(data)
+                written += len(data)
+        if written != expected:
+            raise ChunkError(f'Chunk {index} must be exactly {expected} bytes')
+        os.replace(tmp_path, chunk_path(session, index))
+    finally:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+    return written
+
+
+def _concat(source, target):
+    """Append ``source`` to ``target`` without copying through user space where possible."""
+    size = os.fstat(source.fileno()).st_size
+    offset = 0
+    try:
+        while offset < size:
+            copied = os.copy_file_range(source.fileno(), target.fileno(), size - offset)
+            if not copied:
+                break
+            offset += copied
+    except (AttributeError, OSError):
+        try:
+            while offset < size:
+                copied = os.sendfile(target.fileno(), source.fileno(), offset, size - offset)
+                if not copied:
+                    break
+                offset += copied
+        except (AttributeError, OSError):
+            source.seek(offset)
+            target.seek(0, os.SEEK_END)
+            shutil.copyfileobj(source, target, CHUNK_SIZE)
+
+
+def assemble(session):
+    """Concatenate all staged chunks and move the result into storage; returns (key, size)."""
+    missing = [i for i in range(session.total_chunks) if not os.path.exists(chunk_path(session, i))]
+    if missing:
+        raise ChunkError(f'Missing chunks: {missing[:20]}')
+    directory = session_dir(session)
+    fd, assembled = tempfile.mkstemp(dir=directory, prefix='.assembled-')
+    try:
+        with os.fdopen(fd, 'wb') as target:
+            for index in range(session.total_chunks):
+                with open(chunk_path(session, index), 'rb') as source:
+                    _concat(source, target)
+        if os.path.getsize(assembled) != session.total_size:
+            raise ChunkError('Assembled size does not match total_size')
+        return store_file(assembled)
+    finally:
+        if os.path.exists(assembled):
+            os.unlink(assembled)
+
+
+def discard(session):
+    shutil.rmtree(session_dir(session), ignore_errors=True)
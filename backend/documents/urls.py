@@ -3,6 +3,8 @@ from rest_framework.routers import DefaultRouter
 from . import views
 
 router = DefaultRouter()
+# Registered first so 'uploads/' isn't captured by the document detail route.
+router.register(r'uploads', views.UploadSessionViewSet, basename='upload')
 router.register(r'', views.DocumentViewSet, basename='document')
 
 urlpatterns = [
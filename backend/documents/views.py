@@ -1,15 +1,27 @@
-from rest_framework import viewsets, permissions, status
+import io
+from rest_framework import mixins, viewsets, permissions, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from django.http import HttpResponse
-from .models import Document
-from .serializers import DocumentSerializer
+from django.db import transaction
+from django.db.models import Q
+from django.http import FileResponse
+from django.utils import timezone
+from . import previews, uploads
+from .models import Document, UploadSession
+from .ranges import ranged_file_response
+from .serializers import DocumentSerializer, UploadSessionSerializer
+from .storage import get_storage
 
 class DocumentViewSet(viewsets.ModelViewSet):
     serializer_class = DocumentSerializer
     permission_classes = [permissions.IsAuthenticated]
     
     def get_queryset(self):
+        if self.action == 'preview':
+            # Chat participants can preview attachments they were sent.
+            return Document.objects.filter(
+                Q(owner_user=self.request.user) | Q(message__thread__participants=self.request.user)
+            ).distinct()
         return Document.objects.filter(owner_user=self.request.user)
     
     def perform_create(self, serializer):
@@ -18,7 +30,92 @@ class DocumentViewSet(viewsets.ModelViewSet):
     @action(detail=True, methods=['get'])
     def download(self, request, pk=None):
         document = self.get_object()
-        # In production, this would serve from S3 or file storage
-        response = HttpResponse(content_type=document.mime_type)
-        response['Content-Disposition'] = f'attachment; filename="{document.file_name}"'
-        return response
+        storage = get_storage()
+        if not storage.exists(document.file_key):
+            return Response({'error': 'File is missing from storage'}, status=status.HTTP_404_NOT_FOUND)
+        return ranged_file_response(request, storage, document.file_key, document.mime_type, document.file_name)
+
+    @action(detail=True, methods=['get'])
+    def preview(self, request, pk=None):
+        document = self.get_object()
+        size = request.query_params.get('size', 'medium')
+        if size not in previews.SIZES:
+            return Response({'error': f'size must be one of {", ".join(previews.SIZES)}'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        state = previews.status(document, size)
+        if state == 'pending':
+            # Renders inline when no worker pool is configured.
+            previews.schedule(document)
+            state = previews.status(document, size)
+        if state == 'ready':
+            response = FileResponse(open(previews.preview_path(document.file_key, size), 'rb'),
+                                    content_type='image/jpeg')
+            # Keyed by content hash, so a preview never changes.
+            response['Cache-Control'] = 'private, max-age=31536000, immutable'
+            return response
+        if state == 'pending':
+            return Response({'status': 'pending'}, status=status.HTTP_202_ACCEPTED)
+        if state == 'failed':
+            return Response({'error': 'Preview could not be generated'}, status=status.HTTP_422_UNPROCESSABLE_ENTITY)
+        return Response({'error': 'No preview available for this file type'}, status=status.HTTP_404_NOT_FOUND)
+
+
+class UploadSessionViewSet(mixins.CreateModelMixin, mixins.RetrieveModelMixin,
+                           mixins.DestroyModelMixin, viewsets.GenericViewSet):
+    """
+    Resumable uploads: create a session, PUT each chunk's raw bytes to
+    chunks/<index>/, then POST commit/. GET the session to see which chunks
+    arrived and resume from next_chunk.
+    """
+    serializer_class = UploadSessionSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_queryset(self):
+        return UploadSession.objects.filter(owner_user=self.request.user)
+
+    def perform_create(self, serializer):
+        serializer.save(owner_user=self.request.user)
+
+    def perform_destroy(self, instance):
+        uploads.discard(instance)
+        instance.delete()
+
+    @action(detail=True, methods=['put'], url_path=r'chunks/(?P<index>\d+)')
+    def chunk(self, request, pk=None, index=None):
+        session = self.get_object()
+        if session.status != 'open':
+            return Response({'error': 'Upload is already committed'}, status=status.HTTP_409_CONFLICT)
+        try:
+            size = uploads.write_chunk(session, int(index), request.stream or io.BytesIO())
+        except uploads.ChunkError as exc:
+            return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        # Keeps active sessions away from purge_upload_sessions.
+        UploadSession.objects.filter(pk=session.pk).update(updated_at=timezone.now())
+        return Response({'index': int(index), 'size': size, 'next_chunk': uploads.next_chunk(session)})
+
+    @action(detail=True, methods=['post'])
+    def commit(self, request, pk=None):
+        with transaction.atomic():
+            session = self.get_queryset().select_for_update().get(pk=self.get_object().pk)
+            if session.status != 'open':
+                return Response(DocumentSerializer(session.document).data)
+            try:
+                key, size = uploads.assemble(session)
+            except uploads.ChunkError as exc:
+                return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+            document = Document.objects.create(
+                owner_user=session.owner_user,
+                request=session.request,
+                provider_profile=session.provider_profile,
+                type=session.type,
+                file_key=key,
+                file_name=session.file_name,
+                mime_type=session.mime_type,
+                size_bytes=size,
+                access_scope=session.access_scope,
+            )
+            session.status = 'committed'
+            session.document = document
+            session.save(update_fields=['status', 'document', 'updated_at'])
+            transaction.on_commit(lambda: uploads.discard(session))
+        return Response(DocumentSerializer(document).data, status=status.HTTP_201_CREATED)
@@ -0,0 +1,32 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from notifications.outbox import drain_outbox
+
+
+class Command(BaseCommand):
+    help = 'Drain the notification outbox into Notification rows'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help='Events per batch (default: 500)')
+        parser.add_argument('--loop', action='store_true', help='Keep polling instead of exiting when the outbox is empty')
+        parser.add_argument('--interval', type=float, default=1.0, help='Seconds to sleep between polls with --loop (default: 1)')
+
+    def handle(self, *args, **options):
+        total_delivered = total_failed = 0
+        while True:
+            delivered, failed = drain_outbox(options['batch_size'])
+            total_delivered += delivered
+            total_failed += failed
+            if delivered or failed:
+                self.stdout.write(f'Delivered {delivered} events, {failed} failed')
+            if delivered:
+                continue
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
+
+        self.stdout.write(
+            self.style.SUCCESS(f'Delivered {total_delivered} events, {total_failed} failed')
+        )
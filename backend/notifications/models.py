@@ -1,4 +1,5 @@
 from django.db import models
+from django.utils import timezone
 from users.models import User
 
 class Notification(models.Model):
@@ -7,3 +8,32 @@ class Notification(models.Model):
     payload = models.JSONField(default=dict)
     read_at = models.DateTimeField(blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            # Only unread rows are indexed, which keeps unread counts cheap
+            models.Index(fields=['user'], condition=models.Q(read_at__isnull=True), name='notif_unread_idx'),
+        ]
+
+
+class OutboxEvent(models.Model):
+    """
+    Notification fan-out written in the same transaction as the state change.
+
+    ``dispatch_notifications`` drains the table into Notification rows; see
+    notifications.outbox.
+    """
+    type = models.CharField(max_length=50)
+    # Set for events addressed to a known user; otherwise the type's handler
+    # resolves the recipient from the payload.
+    user = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True)
+    payload = models.JSONField(default=dict)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    available_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['available_at', 'id'], name='outbox_pending_idx'),
+        ]
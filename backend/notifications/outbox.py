@@ -0,0 +1,178 @@
+"""
+Transactional outbox for notification fan-out.
+
+Write paths call ``enqueue`` inside the transaction that changes state, which
+costs one narrow INSERT. Recipients and display payloads are resolved later
+by ``drain_outbox`` (run by the ``dispatch_notifications`` worker), which
+loads the related rows in bulk, coalesces duplicate events per user and
+writes the notifications with a single bulk_create. Events are resolved
+in bulk per type; if that fails, each event is resolved on its own so one
+malformed event can't fail the rest of its batch. Failed events are
+retried with exponential backoff up to MAX_ATTEMPTS.
+
+The eager drain after each write (NOTIFICATION_OUTBOX_EAGER) is best
+effort: it only sees events already due, and a background thread can be
+frozen or killed with its process. Run ``dispatch_notifications``
+periodically as well (e.g. from cron) so retries and stragglers go out.
+"""
+import json
+import logging
+import threading
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .models import Notification, OutboxEvent
+from .unread import invalidate_unread_count
+
+logger = logging.getLogger(__name__)
+
+MAX_ATTEMPTS = 5
+RETRY_BASE_SECONDS = 30
+
+
+def enqueue(type, payload, user=None):
+    """Record a notification event; call inside the state change's transaction."""
+    event = OutboxEvent.objects.create(type=type, payload=payload, user=user)
+    if getattr(settings, 'NOTIFICATION_OUTBOX_EAGER', False):
+        if getattr(settings, 'NOTIFICATION_OUTBOX_EAGER_THREAD', True):
+            transaction.on_commit(_schedule_background_drain)
+        else:
+            transaction.on_commit(_drain_inline)
+    return event
+
+
+def _application_notifications(events):
+    """Resolve application events to (event, Notification) pairs in one query."""
+    from applications.models import Application
+
+    applications = Application.objects.select_related(
+        'request__buyer', 'provider__user'
+    ).in_bulk({event.payload['application_id'] for event in events})
+    for event in events:
+        application = applications.get(event.payload['application_id'])
+        if application is None:
+            # Deleted since; nothing to notify about.
+            yield event, None
+            continue
+        payload = {
+            'application_id': application.id,
+            'request_title': application.request.title,
+        }
+        if event.type == 'new_application':
+            provider_user = application.provider.user
+            payload['provider_name'] = provider_user.first_name + ' ' + provider_user.last_name
+            user_id = application.request.buyer.user_id
+        else:
+            user_id = application.provider.user_id
+        yield event, Notification(user_id=user_id, type=event.type, payload=payload)
+
+
+def _direct_notifications(events):
+    for event in events:
+        yield event, Notification(user_id=event.user_id, type=event.type, payload=event.payload)
+
+
+HANDLERS = {
+    'new_application': _application_notifications,
+    'application_accepted': _application_notifications,
+    'application_rejected': _application_notifications,
+}
+
+
+def _coalesce_key(notification):
+    return notification.user_id, notification.type, json.dumps(notification.payload, sort_keys=True, default=str)
+
+
+def drain_outbox(batch_size=500):
+    """Deliver one batch of due events; returns (delivered, failed)."""
+    now = timezone.now()
+    with transaction.atomic():
+        events = list(
+            OutboxEvent.objects.select_for_update(skip_locked=True)
+            .filter(available_at__lte=now, attempts__lt=MAX_ATTEMPTS)
+            .order_by('available_at', 'id')[:batch_size]
+        )
+        if not events:
+            return 0, 0
+
+        groups = {}
+        for event in events:
+            handler = _direct_notifications if event.user_id else HANDLERS.get(event.type)
+            groups.setdefault(handler, []).append(event)
+
+        done, failed, notifications = [], [], {}
+        for handler, group in groups.items():
+            if handler is None:
+                _mark_failed(group, 'No handler for event type', now)
+                failed.extend(group)
+                continue
+            try:
+                with transaction.atomic():
+                    resolved = list(handler(group))
+            except Exception:
+                logger.exception('Failed to resolve %d %s outbox events; retrying one by one', len(group), group[0].type)
+                resolved = []
+                for event in group:
+                    try:
+                        with transaction.atomic():
+                            resolved.extend(handler([event]))
+                    except Exception as exc:
+                        _mark_failed([event], repr(exc), now)
+                        failed.append(event)
+            for event, notification in resolved:
+                done.append(event)
+                if notification is not None:
+                    notifications.setdefault(_coalesce_key(notification), notification)
+
+        try:
+            with transaction.atomic():
+                Notification.objects.bulk_create(notifications.values())
+                OutboxEvent.objects.filter(id__in=[event.id for event in done]).delete()
+        except Exception as exc:
+            logger.exception('Failed to write %d notifications', len(notifications))
+            _mark_failed(done, repr(exc), now)
+            return 0, len(failed) + len(done)
+        # bulk_create skips the post_save signal that drops cached badge counts.
+        for user_id in {notification.user_id for notification in notifications.values()}:
+            invalidate_unread_count(user_id)
+    return len(done), len(failed)
+
+
+def _mark_failed(events, error, now):
+    for event in events:
+        event.attempts += 1
+        event.last_error = error
+        event.available_at = now + timedelta(seconds=RETRY_BASE_SECONDS * 2 ** (event.attempts - 1))
+    OutboxEvent.objects.bulk_update(events, ['attempts', 'last_error', 'available_at'])
+
+
+_drain_lock = threading.Lock()
+
+
+def _drain_inline():
+    """Drain on the request thread, for runtimes that may freeze the process once the response is sent."""
+    try:
+        drain_outbox()
+    except Exception:
+        logger.exception('Inline outbox drain failed')
+
+
+def _schedule_background_drain():
+    """Drain off the request thread; used when no dispatcher worker is running."""
+    if not _drain_lock.acquire(blocking=False):
+        return  # a drain is already running and will pick this event up
+
+    def run():
+        try:
+            while drain_outbox()[0]:
+                pass
+        except Exception:
+            logger.exception('Background outbox drain failed')
+        finally:
+            connection.close()
+            _drain_lock.release()
+
+    threading.Thread(target=run, daemon=True).start()
@@ -1,6 +1,9 @@
-from django.test import TestCase
-from .models import Notification
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from .models import Notification, OutboxEvent
+from .outbox import drain_outbox, enqueue
 from users.models import User
+from core.testing import QueryBudgetMixin
 
 class NotificationTest(TestCase):
     def test_create_notification(self):
@@ -8,3 +11,121 @@ class NotificationTest(TestCase):
         notif = Notification.objects.create(user=user, type='info', payload={})
         self.assertEqual(notif.type, 'info')
         self.assertEqual(notif.user.username, 'notifyuser')
+
+
+class NotificationQueryBudgetTest(QueryBudgetMixin, TestCase):
+    def test_list_query_count_is_independent_of_page_size(self):
+        from rest_framework.test import APIClient
+        user = User.objects.create(username='budgetnotify', role='buyer')
+
+        def make_row():
+            Notification.objects.create(user=user, type='info', payload={})
+
+        client = APIClient()
+        client.force_authenticate(user)
+        # COUNT, page
+        self.assertListQueryBudget(client, '/api/notifications/', 2, make_row)
+
+
+class NotificationReadTest(TestCase):
+    def setUp(self):
+        from django.core.cache import cache
+        from rest_framework.test import APIClient
+        cache.clear()
+        self.user = User.objects.create(username='badgeuser', role='buyer')
+        self.notifications = [Notification.objects.create(user=self.user, type='info', payload={}) for _ in range(3)]
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def unread(self):
+        return self.client.get('/api/notifications/unread_count/').json()['unread']
+
+    def test_unread_count_is_cached_until_invalidated(self):
+        self.assertEqual(self.unread(), 3)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.unread(), 3)
+        with self.captureOnCommitCallbacks(execute=True):
+            Notification.objects.create(user=self.user, type='info', payload={})
+        self.assertEqual(self.unread(), 4)
+
+    def test_mark_up_to_id_is_a_single_update(self):
+        self.assertEqual(self.unread(), 3)
+        with self.captureOnCommitCallbacks(execute=True):
+            with self.assertNumQueries(1):
+                response = self.client.post('/api/notifications/read_all/', {'up_to': self.notifications[1].id})
+        self.assertEqual(response.json()['updated'], 2)
+        self.assertEqual(self.unread(), 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post('/api/notifications/read_all/')
+        self.assertEqual(self.unread(), 0)
+
+    def test_read_single_notification(self):
+        response = self.client.put(f'/api/notifications/{self.notifications[0].id}/read/')
+        self.assertEqual(response.status_code, 200)
+        self.notifications[0].refresh_from_db()
+        self.assertIsNotNone(self.notifications[0].read_at)
+        self.assertEqual(self.client.put('/api/notifications/999999/read/').status_code, 404)
+
+
+@override_settings(NOTIFICATION_OUTBOX_EAGER=False)
+class NotificationOutboxTest(TestCase):
+    def setUp(self):
+        from applications.models import Application
+        from buyers.models import BuyerProfile
+        from providers.models import ProviderProfile
+        from service_requests.models import ServiceRequest
+        self.buyer = User.objects.create(username='outboxbuyer', role='buyer')
+        self.provider = User.objects.create(username='outboxprovider', role='provider', first_name='Bob', last_name='Smith')
+        buyer_profile = BuyerProfile.objects.create(user=self.buyer, company_name='TestCo', industry='Tech', contact_person_name='Alice')
+        provider_profile = ProviderProfile.objects.create(user=self.provider, base_location='Berlin', education='BSc', years_experience=5, hourly_rate_eur=50)
+        req = ServiceRequest.objects.create(buyer=buyer_profile, title='Fix robot', machine_type='TypeA', serial_number='123', customer_company_name='TestCo', customer_address='Addr', contact_person_name='Alice', contact_email='alice@test.com', contact_phone='123', service_types=['repair'], issue_description='Issue', urgency='high', preferred_date='2025-08-21', budget_eur=100, payment_method='bank_transfer')
+        self.application = Application.objects.create(request=req, provider=provider_profile, pitch='Choose me')
+
+    def test_accept_writes_outbox_and_dispatcher_delivers(self):
+        from rest_framework.test import APIClient
+        client = APIClient()
+        client.force_authenticate(self.buyer)
+        response = client.post(f'/api/applications/{self.application.id}/accept/')
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(Notification.objects.exists())
+        self.assertEqual(OutboxEvent.objects.count(), 1)
+
+        self.assertEqual(drain_outbox(), (1, 0))
+        notification = Notification.objects.get()
+        self.assertEqual(notification.user, self.provider)
+        self.assertEqual(notification.payload, {'application_id': self.application.id, 'request_title': 'Fix robot'})
+        self.assertFalse(OutboxEvent.objects.exists())
+
+    def test_duplicate_events_are_coalesced_per_user(self):
+        for _ in range(3):
+            enqueue('new_application', {'application_id': self.application.id})
+        enqueue('info', {'text': 'hi'}, user=self.buyer)
+        enqueue('info', {'text': 'hi'}, user=self.buyer)
+        self.assertEqual(drain_outbox(), (5, 0))
+        self.assertEqual(Notification.objects.filter(type='new_application').get().payload['provider_name'], 'Bob Smith')
+        self.assertEqual(Notification.objects.filter(type='info').count(), 1)
+
+    def test_failed_events_are_retried_later(self):
+        enqueue('new_application', {})
+        self.assertEqual(drain_outbox(), (0, 1))
+        event = OutboxEvent.objects.get()
+        self.assertEqual(event.attempts, 1)
+        self.assertGreater(event.available_at, timezone.now())
+        self.assertEqual(drain_outbox(), (0, 0))
+
+    def test_malformed_event_fails_alone(self):
+        enqueue('new_application', {'application_id': self.application.id})
+        enqueue('new_application', {})
+        enqueue('application_accepted', {'application_id': self.application.id})
+        self.assertEqual(drain_outbox(), (2, 1))
+        self.assertEqual(set(Notification.objects.values_list('type', flat=True)), {'new_application', 'application_accepted'})
+        event = OutboxEvent.objects.get()
+        self.assertEqual(event.payload, {})
+        self.assertEqual(event.attempts, 1)
+
+    @override_settings(NOTIFICATION_OUTBOX_EAGER=True, NOTIFICATION_OUTBOX_EAGER_THREAD=False)
+    def test_inline_eager_drain_delivers_on_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            enqueue('new_application', {'application_id': self.application.id})
+        self.assertEqual(Notification.objects.get().type, 'new_application')
+        self.assertFalse(OutboxEvent.objects.exists())
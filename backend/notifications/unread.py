@@ -0,0 +1,31 @@
+"""
+Cached unread-notification counts for the UI badge.
+
+The count is cached per user and dropped whenever that user gets a new
+notification or marks some as read, so badge polls are served from the
+cache. A miss is one COUNT over the partial ``notif_unread_idx`` index.
+"""
+from django.core.cache import cache
+from django.db import transaction
+
+UNREAD_COUNT_TIMEOUT = 300
+
+
+def cache_key(user_id):
+    return f'notifications:unread:{user_id}'
+
+
+def unread_count(user_id):
+    from .models import Notification
+
+    key = cache_key(user_id)
+    count = cache.get(key)
+    if count is None:
+        count = Notification.objects.filter(user_id=user_id, read_at__isnull=True).count()
+        cache.set(key, count, UNREAD_COUNT_TIMEOUT)
+    return count
+
+
+def invalidate_unread_count(user_id):
+    # After commit, so a concurrent poll can't re-cache the pre-write count.
+    transaction.on_commit(lambda: cache.delete(cache_key(user_id)))
@@ -1,11 +1,14 @@
 from rest_framework import viewsets, permissions
 from rest_framework.decorators import action
+from rest_framework.exceptions import NotFound, ValidationError
 from rest_framework.response import Response
 from django.utils import timezone
 from .models import Notification
 from .serializers import NotificationSerializer
+from .unread import invalidate_unread_count, unread_count as get_unread_count
+from core.mixins import SerializerRelationsMixin
 
-class NotificationViewSet(viewsets.ModelViewSet):
+class NotificationViewSet(SerializerRelationsMixin, viewsets.ModelViewSet):
     serializer_class = NotificationSerializer
     permission_classes = [permissions.IsAuthenticated]
     
@@ -14,7 +17,30 @@ class NotificationViewSet(viewsets.ModelViewSet):
     
     @action(detail=True, methods=['put'])
     def read(self, request, pk=None):
-        notification = self.get_object()
-        notification.read_at = timezone.now()
-        notification.save()
+        try:
+            updated = self.get_queryset().filter(pk=int(pk)).update(read_at=timezone.now())
+        except ValueError:
+            updated = 0
+        if not updated:
+            raise NotFound()
+        invalidate_unread_count(request.user.id)
         return Response({'status': 'marked as read'})
+    
+    @action(detail=False, methods=['post'])
+    def read_all(self, request):
+        """Mark every unread notification as read, or only those with id <= ?up_to=."""
+        queryset = self.get_queryset().filter(read_at__isnull=True)
+        up_to = request.data.get('up_to', request.query_params.get('up_to'))
+        if up_to is not None:
+            try:
+                queryset = queryset.filter(id__lte=int(up_to))
+            except (TypeError, ValueError):
+                raise ValidationError({'up_to': 'Must be a notification id'})
+        updated = queryset.update(read_at=timezone.now())
+        if updated:
+            invalidate_unread_count(request.user.id)
+        return Response({'status': 'marked as read', 'updated': updated})
+    
+    @action(detail=False, methods=['get'])
+    def unread_count(self, request):
+        return Response({'unread': get_unread_count(request.user.id)})
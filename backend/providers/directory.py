@@ -0,0 +1,38 @@
+"""
+Cached pages of the provider directory (the buyer-facing provider list).
+
+Each page is cached by its full query string under a generation number;
+any profile write or rating change bumps the generation, which retires
+every cached page at once. Pages are computed through core.cache.fetch,
+so a burst of buyers hitting an expired page triggers one query.
+"""
+import hashlib
+
+from django.core.cache import cache
+from django.db import transaction
+
+from core.cache import fetch
+
+GENERATION_KEY = 'providers:directory:generation'
+PAGE_TIMEOUT = 120
+
+
+def cached_page(full_path, compute):
+    generation = cache.get_or_set(GENERATION_KEY, 0, None)
+    digest = hashlib.sha256(full_path.encode()).hexdigest()[:32]
+    return fetch(f'providers:directory:{generation}:{digest}', compute, PAGE_TIMEOUT)
+
+
+def _bump():
+    cache.add(GENERATION_KEY, 0, None)
+    try:
+        cache.incr(GENERATION_KEY)
+    except ValueError:
+        cache.set(GENERATION_KEY, 1, None)
+
+
+def invalidate_directory():
+    # Now for this transaction's own reads, and again after commit so a
+    # concurrent read can't re-cache the pre-write page.
+    _bump()
+    transaction.on_commit(_bump)
@@ -0,0 +1,66 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+
+from providers.directory import invalidate_directory
+from providers.models import ProviderProfile
+from providers.ratings import merge_metrics
+from reviews.models import Review
+
+
+class Command(BaseCommand):
+    help = 'Rebuild provider rating aggregates from existing reviews, streaming in batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help='Profiles written per batch (default: 500)')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        profile_ids = dict(ProviderProfile.objects.values_list('user_id', 'id'))
+        fields = ['ratings_count', 'ratings_total', 'average_rating', 'metric_ratings']
+
+        reviews = (
+            Review.objects.filter(reviewee_id__in=ProviderProfile.objects.values('user_id'))
+            .order_by('reviewee_id')
+            .values_list('reviewee_id', 'rating_overall', 'metrics')
+            .iterator(chunk_size=2000)
+        )
+
+        batch = []
+        rebuilt = 0
+        current = None
+        for reviewee_id, rating, metrics in reviews:
+            if current is None or current.user_id != reviewee_id:
+                current = ProviderProfile(
+                    id=profile_ids[reviewee_id], user_id=reviewee_id,
+                    ratings_count=0, ratings_total=0, average_rating=0, metric_ratings={},
+                )
+                batch.append(current)
+                rebuilt += 1
+            current.ratings_count += 1
+            current.ratings_total += rating
+            current.average_rating = current.ratings_total / current.ratings_count
+            current.metric_ratings = merge_metrics(current.metric_ratings, metrics)
+            # Only flush once the last profile in the batch is complete
+            if len(batch) > batch_size:
+                self.flush(batch[:-1], fields)
+                batch = batch[-1:]
+        self.flush(batch, fields)
+
+        # Profiles whose reviews have all been deleted
+        stale = ProviderProfile.objects.filter(
+            ~Exists(Review.objects.filter(reviewee_id=OuterRef('user_id')))
+        ).exclude(ratings_count=0, ratings_total=0)
+        cleared = stale.update(ratings_count=0, ratings_total=0, average_rating=0, metric_ratings={})
+        invalidate_directory()
+
+        self.stdout.write(
+            self.style.SUCCESS(f'Rebuilt ratings for {rebuilt} providers, cleared {cleared}')
+        )
+
+    def flush(self, profiles, fields):
+        if not profiles:
+            return
+        with transaction.atomic():
+            ProviderProfile.objects.bulk_update(profiles, fields)
+        self.stdout.write(f'Updated {len(profiles)} providers')
@@ -0,0 +1,181 @@
+"""
+Technician matching for service requests.
+
+ProviderIndex keeps an inverted index (token -> provider ids) over the JSON
+list fields of every ProviderProfile. Ranking a request only touches the
+providers that share at least one token with it, instead of scanning and
+decoding every profile row.
+
+The index is built lazily on first use and kept current by the
+ProviderProfile save/delete signals (see providers.signals). Because each
+worker process holds its own copy, it is also rebuilt after
+PROVIDER_MATCH_INDEX_TTL seconds so edits made in other workers show up.
+"""
+import heapq
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+
+# (provider fields, request fields, weight, split comma-separated values)
+MATCH_FIELDS = {
+    'services': (('services_offered',), ('service_types',), 0.35, False),
+    'skills': (('tech_skills',), ('technician_requirements',), 0.25, False),
+    'certifications': (('certifications',), ('safety_requirements',), 0.15, False),
+    'regions': (('operating_regions', 'countries'), ('locations',), 0.15, True),
+}
+RATE_WEIGHT = 0.10
+DEFAULT_INDEX_TTL = 300
+
+
+def normalize_tokens(values, split=False):
+    tokens = set()
+    if not isinstance(values, (list, tuple)):
+        values = [values] if values else []
+    for value in values:
+        if not isinstance(value, str):
+            continue
+        value = value.strip().lower()
+        if not value:
+            continue
+        tokens.add(value)
+        if split and ',' in value:
+            tokens.update(part.strip() for part in value.split(',') if part.strip())
+    return tokens
+
+
+def rate_score(hourly_rate, budget):
+    """1.0 when the hourly rate fits the budget, decaying as it exceeds it."""
+    if not budget or budget <= 0 or hourly_rate is None:
+        return 0.0
+    if hourly_rate <= budget:
+        return 1.0
+    return budget / hourly_rate
+
+
+class ProviderIndex:
+    def __init__(self):
+        self._lock = threading.RLock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._postings = {name: defaultdict(set) for name in MATCH_FIELDS}
+            self._documents = {}
+            self._rates = {}
+            self._loaded_at = None
+
+    def _is_stale(self):
+        if self._loaded_at is None:
+            return True
+        ttl = getattr(settings, 'PROVIDER_MATCH_INDEX_TTL', DEFAULT_INDEX_TTL)
+        return ttl is not None and time.monotonic() - self._loaded_at > ttl
+
+    def ensure_loaded(self):
+        with self._lock:
+            if self._is_stale():
+                self.rebuild()
+
+    def rebuild(self):
+        from .models import ProviderProfile
+
+        fields = ['id', 'hourly_rate_eur']
+        for provider_fields, _, _, _ in MATCH_FIELDS.values():
+            fields.extend(provider_fields)
+        with self._lock:
+            self.reset()
+            for row in ProviderProfile.objects.values(*fields).iterator(chunk_size=2000):
+                self._add(row['id'], row)
+            self._loaded_at = time.monotonic()
+
+    def update(self, profile):
+        """Re-index a single profile; a no-op until the index is first built."""
+        with self._lock:
+            if self._loaded_at is None:
+                return
+            row = {'hourly_rate_eur': profile.hourly_rate_eur}
+            for provider_fields, _, _, _ in MATCH_FIELDS.values():
+                for name in provider_fields:
+                    row[name] = getattr(profile, name)
+            self._remove(profile.pk)
+            self._add(profile.pk, row)
+
+    def remove(self, provider_id):
+        with self._lock:
+            self._remove(provider_id)
+
+    def _add(self, provider_id, row):
+        document = {}
+        for name, (provider_fields, _, _, split) in MATCH_FIELDS.items():
+            tokens = set()
+            for field in provider_fields:
+                tokens |= normalize_tokens(row.get(field), split=split)
+            for token in tokens:
+                self._postings[name][token].add(provider_id)
+            document[name] = tokens
+        self._documents[provider_id] = document
+        rate = row.get('hourly_rate_eur')
+        self._rates[provider_id] = float(rate) if rate is not None else None
+
+    def _remove(self, provider_id):
+        document = self._documents.pop(provider_id, None)
+        self._rates.pop(provider_id, None)
+        if not document:
+            return
+        for name, tokens in document.items():
+            postings = self._postings[name]
+            for token in tokens:
+                ids = postings.get(token)
+                if ids is not None:
+                    ids.discard(provider_id)
+                    if not ids:
+                        del postings[token]
+
+    def rank(self, service_request, limit=20):
+        """
+        Return up to ``limit`` (provider_id, score, breakdown) tuples, best first.
+
+        Each field scores the fraction of the request's tokens the provider
+        covers; the weighted sum is in [0, 1]. Only providers sharing at least
+        one token with the request are considered.
+        """
+        self.ensure_loaded()
+        budget = service_request.budget_eur
+        budget = float(budget) if budget else 0.0
+        wanted = {}
+        for name, (_, request_fields, _, split) in MATCH_FIELDS.items():
+            tokens = set()
+            for field in request_fields:
+                tokens |= normalize_tokens(getattr(service_request, field), split=split)
+            wanted[name] = tokens
+
+        scores = defaultdict(float)
+        with self._lock:
+            for name, (_, _, weight, _) in MATCH_FIELDS.items():
+                tokens = wanted[name]
+                if not tokens:
+                    continue
+                share = weight / len(tokens)
+                postings = self._postings[name]
+                for token in tokens:
+                    for provider_id in postings.get(token, ()):
+                        scores[provider_id] += share
+            rates = self._rates
+            for provider_id in scores:
+                scores[provider_id] += RATE_WEIGHT * rate_score(rates.get(provider_id), budget)
+
+            best = heapq.nlargest(limit, scores.items(), key=lambda item: (item[1], -item[0]))
+            results = []
+            for provider_id, score in best:
+                document = self._documents[provider_id]
+                breakdown = {
+                    name: round(len(document[name] & tokens) / len(tokens), 3) if tokens else 0.0
+                    for name, tokens in wanted.items()
+                }
+                breakdown['rate'] = round(rate_score(rates.get(provider_id), budget), 3)
+                results.append((provider_id, round(score, 4), breakdown))
+        return results
+
+
+provider_index = ProviderIndex()
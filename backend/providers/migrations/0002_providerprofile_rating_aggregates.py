@@ -0,0 +1,23 @@
+# Generated by Django 4.2.30 on 2026-10-18 12:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("providers", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="providerprofile",
+            name="metric_ratings",
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.AddField(
+            model_name="providerprofile",
+            name="ratings_total",
+            field=models.IntegerField(default=0),
+        ),
+    ]
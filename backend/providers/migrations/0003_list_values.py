@@ -0,0 +1,67 @@
+# Generated by Django 4.2.30 on 2026-10-18 12:45
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+# Kept literal so later changes to LIST_FILTER_FIELDS don't rewrite history.
+TABLE = 'providers_providerprofile'
+FIELDS = ('countries', 'operating_regions', 'tech_skills', 'services_offered')
+
+
+def create_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        # jsonb_path_ops indexes answer the @> containment filters.
+        for field in FIELDS:
+            schema_editor.execute(
+                f'CREATE INDEX provider_{field}_gin ON {TABLE} USING GIN ({field} jsonb_path_ops)'
+            )
+    else:
+        from core.jsonlists import rebuild_list_values
+        rebuild_list_values(apps.get_model('providers', 'ProviderProfile'), FIELDS, using=schema_editor.connection.alias)
+
+
+def drop_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        for field in FIELDS:
+            schema_editor.execute(f'DROP INDEX IF EXISTS provider_{field}_gin')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("providers", "0002_providerprofile_rating_aggregates"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ProviderProfileListValue",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("field", models.CharField(max_length=50)),
+                ("value", models.CharField(max_length=255)),
+                (
+                    "provider",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="list_values",
+                        to="providers.providerprofile",
+                    ),
+                ),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name="providerprofilelistvalue",
+            constraint=models.UniqueConstraint(
+                fields=("field", "value", "provider"), name="provider_listvalue_uniq"
+            ),
+        ),
+        migrations.RunPython(create_indexes, drop_indexes),
+    ]
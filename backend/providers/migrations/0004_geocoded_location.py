@@ -0,0 +1,41 @@
+# Generated by Django 4.2.30 on 2026-10-18 12:48
+
+from django.db import migrations, models
+
+
+def geocode_existing(apps, schema_editor):
+    from core.geo import set_location
+
+    ProviderProfile = apps.get_model('providers', 'ProviderProfile')
+    fields = ['base_latitude', 'base_longitude', 'base_geocell']
+    rows = []
+    for profile in ProviderProfile.objects.iterator():
+        set_location(profile, [profile.base_location], *fields)
+        rows.append(profile)
+    ProviderProfile.objects.bulk_update(rows, fields, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("providers", "0003_list_values"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="providerprofile",
+            name="base_geocell",
+            field=models.IntegerField(blank=True, db_index=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="providerprofile",
+            name="base_latitude",
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="providerprofile",
+            name="base_longitude",
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.RunPython(geocode_existing, migrations.RunPython.noop),
+    ]
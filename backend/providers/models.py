@@ -5,6 +5,10 @@ class ProviderProfile(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE)
     company_name = models.CharField(max_length=255, blank=True, null=True)
     base_location = models.CharField(max_length=255)
+    # Geocoded from base_location on save (core.geo)
+    base_latitude = models.FloatField(null=True, blank=True)
+    base_longitude = models.FloatField(null=True, blank=True)
+    base_geocell = models.IntegerField(null=True, blank=True, db_index=True)
     countries = models.JSONField(default=list)
     operating_regions = models.JSONField(default=list)
     education = models.CharField(max_length=255)
@@ -15,4 +19,24 @@ class ProviderProfile(models.Model):
     hourly_rate_eur = models.DecimalField(max_digits=8, decimal_places=2)
     average_rating = models.FloatField(default=0)
     ratings_count = models.IntegerField(default=0)
+    ratings_total = models.IntegerField(default=0)
+    # {metric: {"count": n, "total": t, "average": a}} aggregated from Review.metrics
+    metric_ratings = models.JSONField(default=dict, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
+
+
+# JSON list fields filterable with ?<field>=a&<field>=b (see core.jsonlists)
+LIST_FILTER_FIELDS = ('countries', 'operating_regions', 'tech_skills', 'services_offered')
+
+
+class ProviderProfileListValue(models.Model):
+    """One element of a ProviderProfile JSON list field, mirrored for indexed filtering."""
+    provider = models.ForeignKey(ProviderProfile, on_delete=models.CASCADE, related_name='list_values')
+    field = models.CharField(max_length=50)
+    value = models.CharField(max_length=255)
+
+    class Meta:
+        constraints = [
+            # Leading (field, value) also serves the filter lookups
+            models.UniqueConstraint(fields=['field', 'value', 'provider'], name='provider_listvalue_uniq'),
+        ]
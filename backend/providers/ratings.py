@@ -0,0 +1,80 @@
+"""
+Incremental provider rating aggregates.
+
+Each review write adjusts the reviewee's ProviderProfile in O(1): the
+overall count/total/average are updated with a single F-expression UPDATE,
+and the per-metric running averages in ``metric_ratings`` are updated under
+a row lock. Both run inside the caller's transaction, so the aggregates
+commit or roll back together with the review.
+
+``rebuild_provider_ratings`` recomputes everything from scratch.
+"""
+from django.db import transaction
+from django.db.models import F, FloatField
+from django.db.models.functions import Cast
+
+from .directory import invalidate_directory
+from .models import ProviderProfile
+
+
+def numeric_metrics(metrics):
+    """The numeric entries of a Review.metrics payload."""
+    if not isinstance(metrics, dict):
+        return {}
+    return {
+        name: value for name, value in metrics.items()
+        if isinstance(value, (int, float)) and not isinstance(value, bool)
+    }
+
+
+def merge_metrics(metric_ratings, metrics, sign=1):
+    """Add (sign=1) or remove (sign=-1) one review's metrics from the aggregate."""
+    merged = dict(metric_ratings or {})
+    for name, value in numeric_metrics(metrics).items():
+        entry = merged.get(name) or {'count': 0, 'total': 0}
+        count = entry['count'] + sign
+        total = entry['total'] + sign * value
+        if count <= 0:
+            merged.pop(name, None)
+            continue
+        merged[name] = {'count': count, 'total': total, 'average': round(total / count, 3)}
+    return merged
+
+
+def apply_review(reviewee_id, rating, metrics, sign=1):
+    """Fold one review into (sign=1) or out of (sign=-1) the reviewee's aggregates."""
+    with transaction.atomic():
+        profiles = ProviderProfile.objects.filter(user_id=reviewee_id)
+        if numeric_metrics(metrics):
+            current = profiles.select_for_update().values_list('metric_ratings', flat=True).first()
+            if current is None:
+                return
+            profiles.update(metric_ratings=merge_metrics(current, metrics, sign))
+        if sign > 0:
+            _add_rating(profiles, rating)
+        else:
+            _remove_rating(profiles, rating)
+    # The aggregates are written with update(), which sends no post_save.
+    invalidate_directory()
+
+
+def _add_rating(profiles, rating):
+    count = F('ratings_count') + 1
+    total = F('ratings_total') + rating
+    profiles.update(
+        ratings_count=count,
+        ratings_total=total,
+        average_rating=Cast(total, FloatField()) / Cast(count, FloatField()),
+    )
+
+
+def _remove_rating(profiles, rating):
+    # Removing the last review must not divide by zero.
+    profiles.filter(ratings_count__lte=1).update(ratings_count=0, ratings_total=0, average_rating=0)
+    count = F('ratings_count') - 1
+    total = F('ratings_total') - rating
+    profiles.filter(ratings_count__gt=1).update(
+        ratings_count=count,
+        ratings_total=total,
+        average_rating=Cast(total, FloatField()) / Cast(count, FloatField()),
+    )
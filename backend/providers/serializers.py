@@ -2,7 +2,10 @@ from rest_framework import serializers
 from .models import ProviderProfile
 
 class ProviderProfileSerializer(serializers.ModelSerializer):
+    # Only present when the list is filtered with ?near=
+    distance_km = serializers.FloatField(read_only=True)
+
     class Meta:
         model = ProviderProfile
         fields = '__all__'
-        read_only_fields = ['user', 'created_at', 'average_rating', 'ratings_count']
+        read_only_fields = ['user', 'created_at', 'average_rating', 'ratings_count', 'ratings_total', 'metric_ratings', 'base_latitude', 'base_longitude', 'base_geocell']
@@ -0,0 +1,37 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from core.geo import set_location
+from core.jsonlists import sync_list_values
+
+from .directory import invalidate_directory
+from .matching import provider_index
+from .models import LIST_FILTER_FIELDS, ProviderProfile
+
+
+@receiver(pre_save, sender=ProviderProfile)
+def geocode_base_location(sender, instance, **kwargs):
+    set_location(instance, [instance.base_location], 'base_latitude', 'base_longitude', 'base_geocell')
+
+
+@receiver(post_save, sender=ProviderProfile)
+def index_provider_profile(sender, instance, **kwargs):
+    transaction.on_commit(lambda: provider_index.update(instance))
+
+
+@receiver(post_save, sender=ProviderProfile)
+def mirror_list_fields(sender, instance, update_fields=None, using='default', **kwargs):
+    sync_list_values(instance, LIST_FILTER_FIELDS, update_fields, using)
+
+
+@receiver(post_save, sender=ProviderProfile)
+@receiver(post_delete, sender=ProviderProfile)
+def invalidate_provider_directory(sender, **kwargs):
+    invalidate_directory()
+
+
+@receiver(post_delete, sender=ProviderProfile)
+def unindex_provider_profile(sender, instance, **kwargs):
+    provider_id = instance.pk
+    transaction.on_commit(lambda: provider_index.remove(provider_id))
@@ -8,3 +8,126 @@ class ProviderProfileTest(TestCase):
         profile = ProviderProfile.objects.create(user=user, base_location='Berlin', education='BSc', years_experience=5)
         self.assertEqual(profile.user.username, 'provider1')
         self.assertEqual(profile.base_location, 'Berlin')
+
+
+class ProviderMatchingTest(TestCase):
+    def setUp(self):
+        from buyers.models import BuyerProfile
+        from service_requests.models import ServiceRequest
+        from .matching import provider_index
+        provider_index.reset()
+        self.buyer_user = User.objects.create(username='matchbuyer', role='buyer')
+        buyer = BuyerProfile.objects.create(user=self.buyer_user, company_name='TestCo', industry='Tech', contact_person_name='Alice')
+        self.req = ServiceRequest.objects.create(buyer=buyer, title='Test', machine_type='TypeA', serial_number='123', customer_company_name='TestCo', customer_address='Addr', contact_person_name='Alice', contact_email='alice@test.com', contact_phone='123', service_types=['Repair', 'Maintenance'], technician_requirements=['PLC'], locations=['Berlin, DE'], issue_description='Issue', urgency='high', preferred_date='2025-08-21', budget_eur=100, payment_method='bank_transfer')
+        self.strong = self.create_provider('strong', services_offered=['repair', 'maintenance'], tech_skills=['PLC'], countries=['DE'])
+        self.weak = self.create_provider('weak', services_offered=['Repair'], countries=['FR'])
+        self.create_provider('unrelated', services_offered=['Painting'])
+
+    def create_provider(self, username, **fields):
+        user = User.objects.create(username=username, role='provider')
+        return ProviderProfile.objects.create(user=user, base_location='Berlin', education='BSc', years_experience=5, hourly_rate_eur=80, **fields)
+
+    def test_matches_are_ranked_and_unrelated_providers_skipped(self):
+        from rest_framework.test import APIClient
+        client = APIClient()
+        client.force_authenticate(self.buyer_user)
+        response = client.get(f'/api/service-requests/{self.req.id}/matches/')
+        self.assertEqual(response.status_code, 200)
+        ids = [match['provider']['id'] for match in response.json()['results']]
+        self.assertEqual(ids, [self.strong.id, self.weak.id])
+
+    def test_index_updates_incrementally_on_save(self):
+        from .matching import provider_index
+        provider_index.ensure_loaded()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.weak.tech_skills = ['PLC']
+            self.weak.countries = ['DE']
+            self.weak.services_offered = ['Repair', 'Maintenance']
+            self.weak.save()
+        ranked = provider_index.rank(self.req)
+        self.assertEqual({provider_id for provider_id, _, _ in ranked[:2]}, {self.strong.id, self.weak.id})
+        self.assertEqual(ranked[0][1], ranked[1][1])
+
+
+class ProviderListFilterTest(TestCase):
+    def setUp(self):
+        self.buyer_user = User.objects.create(username='directorybuyer', role='buyer')
+        self.strong = self.create_provider('strong', services_offered=['repair', 'maintenance'], countries=['DE'])
+        self.weak = self.create_provider('weak', services_offered=['Repair'], countries=['FR'])
+
+    def create_provider(self, username, **fields):
+        user = User.objects.create(username=username, role='provider')
+        return ProviderProfile.objects.create(user=user, base_location='Berlin', education='BSc', years_experience=5, hourly_rate_eur=80, **fields)
+
+    def test_directory_filters_by_list_containment(self):
+        from rest_framework.test import APIClient
+        client = APIClient()
+        client.force_authenticate(self.buyer_user)
+        def ids(**params):
+            return sorted(p['id'] for p in client.get('/api/providers/profiles/', params).json()['results'])
+        self.assertEqual(ids(services_offered='Repair'), [self.weak.id])
+        self.assertEqual(ids(services_offered=['repair', 'maintenance'], countries='DE'), [self.strong.id])
+        self.assertEqual(ids(services_offered='repair', countries='FR'), [])
+
+        self.weak.services_offered = ['repair', 'maintenance']
+        self.weak.save()
+        self.assertEqual(ids(services_offered=['repair', 'maintenance']), [self.strong.id, self.weak.id])
+
+
+class ProviderDirectoryCacheTest(TestCase):
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+        self.buyer_user = User.objects.create(username='cachedbuyer', role='buyer')
+        user = User.objects.create(username='cachedprovider', role='provider')
+        self.profile = ProviderProfile.objects.create(user=user, base_location='Berlin', education='BSc', years_experience=5, hourly_rate_eur=80)
+
+    def test_pages_are_cached_until_a_profile_changes(self):
+        from rest_framework.test import APIClient
+        client = APIClient()
+        client.force_authenticate(self.buyer_user)
+        client.get('/api/providers/profiles/')
+        with self.assertNumQueries(0):
+            self.assertEqual(client.get('/api/providers/profiles/').json()['count'], 1)
+
+        self.profile.hourly_rate_eur = 95
+        self.profile.save()
+        self.assertEqual(client.get('/api/providers/profiles/').json()['results'][0]['hourly_rate_eur'], '95.00')
+
+
+class ProviderProximityTest(TestCase):
+    def setUp(self):
+        self.buyer_user = User.objects.create(username='proximitybuyer', role='buyer')
+        self.berlin = self.create_provider('berlin', 'Alexanderplatz 1, 10178 Berlin, Germany')
+        self.potsdam = self.create_provider('potsdam', 'Potsdam, DE')
+        self.munich = self.create_provider('munich', 'München')
+        self.unknown = self.create_provider('unknown', 'Somewhere remote')
+
+    def create_provider(self, username, base_location):
+        user = User.objects.create(username=username, role='provider')
+        return ProviderProfile.objects.create(user=user, base_location=base_location, education='BSc', years_experience=5, hourly_rate_eur=80)
+
+    def test_geocoding_is_offline_and_stored(self):
+        from core.geo import geocode, grid_cell
+        self.assertEqual(geocode('Frankfurt am Main, DE'), (50.110, 8.682))
+        self.assertEqual(geocode('Frankfurt, Oder'), (50.110, 8.682))
+        self.assertEqual(geocode('Frankfurt (Oder)'), (52.347, 14.551))
+        self.assertEqual(geocode('52.5, 13.4'), (52.5, 13.4))
+        self.assertIsNone(self.unknown.base_latitude)
+        self.assertEqual((self.munich.base_latitude, self.munich.base_longitude), (48.137, 11.575))
+        self.assertEqual(self.munich.base_geocell, grid_cell(48.137, 11.575))
+
+    def test_near_filter_ranks_by_distance(self):
+        from rest_framework.test import APIClient
+        from core.geo import haversine_km
+        client = APIClient()
+        client.force_authenticate(self.buyer_user)
+        results = client.get('/api/providers/profiles/', {'near': 'Berlin', 'radius_km': 150}).json()['results']
+        self.assertEqual([r['id'] for r in results], [self.berlin.id, self.potsdam.id])
+        self.assertAlmostEqual(results[1]['distance_km'], haversine_km(52.520, 13.405, 52.391, 13.064), places=3)
+
+        results = client.get('/api/providers/profiles/', {'near': '52.52,13.405', 'radius_km': 600}).json()['results']
+        self.assertEqual([r['id'] for r in results], [self.berlin.id, self.potsdam.id, self.munich.id])
+        results = client.get('/api/providers/profiles/', {'bbox': '47,10,49,12'}).json()['results']
+        self.assertEqual([r['id'] for r in results], [self.munich.id])
+        self.assertEqual(client.get('/api/providers/profiles/', {'near': 'Atlantis'}).status_code, 400)
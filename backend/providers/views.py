@@ -1,12 +1,19 @@
 from rest_framework import viewsets, permissions
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from .models import ProviderProfile
+from core.geo import NearFilter
+from core.jsonlists import JSONListFilter
+from users.profiles import get_role_profile
+from .directory import cached_page
+from .models import LIST_FILTER_FIELDS, ProviderProfile
 from .serializers import ProviderProfileSerializer
 
 class ProviderProfileViewSet(viewsets.ModelViewSet):
     serializer_class = ProviderProfileSerializer
     permission_classes = [permissions.IsAuthenticated]
+    filter_backends = [JSONListFilter, NearFilter]
+    json_list_filter_fields = LIST_FILTER_FIELDS
+    near_filter_fields = ('base_latitude', 'base_longitude', 'base_geocell')
     
     def get_queryset(self):
         if self.request.user.role == 'provider':
@@ -15,20 +22,27 @@ class ProviderProfileViewSet(viewsets.ModelViewSet):
             return ProviderProfile.objects.all()
         return ProviderProfile.objects.none()
     
+    def list(self, request, *args, **kwargs):
+        if request.user.role != 'buyer':
+            return super().list(request, *args, **kwargs)
+        # Every buyer sees the same directory, so pages are shared between them.
+        return Response(cached_page(
+            request.get_full_path(), lambda: super(ProviderProfileViewSet, self).list(request, *args, **kwargs).data
+        ))
+
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
     
     @action(detail=False, methods=['get', 'put', 'patch'])
     def me(self, request):
-        try:
-            profile = ProviderProfile.objects.get(user=request.user)
-            if request.method == 'GET':
-                serializer = self.get_serializer(profile)
-                return Response(serializer.data)
-            else:
-                serializer = self.get_serializer(profile, data=request.data, partial=True)
-                serializer.is_valid(raise_exception=True)
-                serializer.save()
-                return Response(serializer.data)
-        except ProviderProfile.DoesNotExist:
+        profile = get_role_profile(request, 'provider')
+        if profile is None:
             return Response({'error': 'Profile not found'}, status=404)
+        if request.method == 'GET':
+            serializer = self.get_serializer(profile)
+            return Response(serializer.data)
+        else:
+            serializer = self.get_serializer(profile, data=request.data, partial=True)
+            serializer.is_valid(raise_exception=True)
+            serializer.save()
+            return Response(serializer.data)
@@ -0,0 +1,29 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from providers.ratings import apply_review
+from .models import Review
+
+
+@receiver(pre_save, sender=Review)
+def remember_previous_rating(sender, instance, **kwargs):
+    instance._previous_rating = None
+    if instance.pk:
+        instance._previous_rating = (
+            Review.objects.filter(pk=instance.pk)
+            .values_list('reviewee_id', 'rating_overall', 'metrics')
+            .first()
+        )
+
+
+@receiver(post_save, sender=Review)
+def aggregate_review(sender, instance, created, **kwargs):
+    previous = getattr(instance, '_previous_rating', None)
+    if previous is not None:
+        apply_review(*previous, sign=-1)
+    apply_review(instance.reviewee_id, instance.rating_overall, instance.metrics)
+
+
+@receiver(post_delete, sender=Review)
+def unaggregate_review(sender, instance, **kwargs):
+    apply_review(instance.reviewee_id, instance.rating_overall, instance.metrics, sign=-1)
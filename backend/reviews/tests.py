@@ -3,6 +3,8 @@ from .models import Review
 from users.models import User
 from service_requests.models import ServiceRequest
 from buyers.models import BuyerProfile
+from providers.models import ProviderProfile
+from core.testing import QueryBudgetMixin
 
 class ReviewTest(TestCase):
     def test_create_review(self):
@@ -13,3 +15,60 @@ class ReviewTest(TestCase):
         review = Review.objects.create(request=req, reviewer=user, reviewee=user2, role_of_reviewer='buyer', rating_overall=5)
         self.assertEqual(review.rating_overall, 5)
         self.assertEqual(review.role_of_reviewer, 'buyer')
+
+
+class ReviewQueryBudgetTest(QueryBudgetMixin, TestCase):
+    def test_list_query_count_is_independent_of_page_size(self):
+        from rest_framework.test import APIClient
+        user = User.objects.create(username='budgetreviewer', role='buyer')
+        reviewee = User.objects.create(username='budgetreviewee', role='provider')
+        buyer = BuyerProfile.objects.create(user=user, company_name='TestCo', industry='Tech', contact_person_name='Alice')
+        req = ServiceRequest.objects.create(buyer=buyer, title='Test', machine_type='TypeA', serial_number='123', customer_company_name='TestCo', customer_address='Addr', contact_person_name='Alice', contact_email='alice@test.com', contact_phone='123', service_types=['repair'], issue_description='Issue', urgency='high', preferred_date='2025-08-21', budget_eur=100, payment_method='bank_transfer')
+
+        def make_row():
+            Review.objects.create(request=req, reviewer=user, reviewee=reviewee, role_of_reviewer='buyer', rating_overall=4)
+
+        client = APIClient()
+        client.force_authenticate(user)
+        # COUNT, page
+        self.assertListQueryBudget(client, '/api/reviews/', 2, make_row)
+
+
+class ProviderRatingAggregationTest(TestCase):
+    def setUp(self):
+        self.buyer_user = User.objects.create(username='ratingbuyer', role='buyer')
+        self.provider_user = User.objects.create(username='ratingprovider', role='provider')
+        self.profile = ProviderProfile.objects.create(user=self.provider_user, base_location='Berlin', education='BSc', years_experience=5, hourly_rate_eur=50)
+        buyer = BuyerProfile.objects.create(user=self.buyer_user, company_name='TestCo', industry='Tech', contact_person_name='Alice')
+        self.req = ServiceRequest.objects.create(buyer=buyer, title='Test', machine_type='TypeA', serial_number='123', customer_company_name='TestCo', customer_address='Addr', contact_person_name='Alice', contact_email='alice@test.com', contact_phone='123', service_types=['repair'], issue_description='Issue', urgency='high', preferred_date='2025-08-21', budget_eur=100, payment_method='bank_transfer')
+
+    def review(self, rating, **metrics):
+        return Review.objects.create(request=self.req, reviewer=self.buyer_user, reviewee=self.provider_user, role_of_reviewer='buyer', rating_overall=rating, metrics=metrics)
+
+    def test_reviews_update_aggregates_incrementally(self):
+        self.review(5, quality=5, communication=3)
+        first = self.review(2, quality=3)
+        self.profile.refresh_from_db()
+        self.assertEqual(self.profile.ratings_count, 2)
+        self.assertAlmostEqual(self.profile.average_rating, 3.5)
+        self.assertEqual(self.profile.metric_ratings['quality']['average'], 4)
+        self.assertEqual(self.profile.metric_ratings['communication']['count'], 1)
+
+        first.delete()
+        self.profile.refresh_from_db()
+        self.assertEqual(self.profile.ratings_count, 1)
+        self.assertAlmostEqual(self.profile.average_rating, 5)
+        self.assertEqual(self.profile.metric_ratings['quality']['average'], 5)
+
+    def test_rebuild_command_matches_incremental_aggregates(self):
+        from django.core.management import call_command
+        from io import StringIO
+        self.review(4, quality=4)
+        self.review(1, quality=2)
+        incremental = ProviderProfile.objects.get(pk=self.profile.pk)
+        ProviderProfile.objects.update(ratings_count=0, ratings_total=0, average_rating=0, metric_ratings={})
+        call_command('rebuild_provider_ratings', batch_size=1, stdout=StringIO())
+        self.profile.refresh_from_db()
+        self.assertEqual(self.profile.ratings_count, incremental.ratings_count)
+        self.assertAlmostEqual(self.profile.average_rating, incremental.average_rating)
+        self.assertEqual(self.profile.metric_ratings, incremental.metric_ratings)
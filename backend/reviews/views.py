@@ -1,11 +1,12 @@
 from rest_framework import viewsets, permissions
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from django.db import models
+from django.db import models, transaction
 from .models import Review
 from .serializers import ReviewSerializer
+from core.mixins import SerializerRelationsMixin
 
-class ReviewViewSet(viewsets.ModelViewSet):
+class ReviewViewSet(SerializerRelationsMixin, viewsets.ModelViewSet):
     serializer_class = ReviewSerializer
     permission_classes = [permissions.IsAuthenticated]
     
@@ -16,13 +17,24 @@ class ReviewViewSet(viewsets.ModelViewSet):
         )
     
     def perform_create(self, serializer):
-        serializer.save(reviewer=self.request.user)
+        # The provider rating aggregates are updated by the Review signals;
+        # keep them in the same transaction as the review row.
+        with transaction.atomic():
+            serializer.save(reviewer=self.request.user)
+    
+    def perform_update(self, serializer):
+        with transaction.atomic():
+            serializer.save()
+    
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            instance.delete()
     
     @action(detail=False, methods=['get'])
     def user(self, request):
         user_id = request.query_params.get('user_id')
         if user_id:
-            reviews = Review.objects.filter(reviewee_id=user_id)
+            reviews = self.filter_queryset(Review.objects.filter(reviewee_id=user_id))
             serializer = self.get_serializer(reviews, many=True)
             return Response(serializer.data)
         return Response({'error': 'user_id parameter required'}, status=400)
@@ -58,6 +58,7 @@ def migrate_remote_database():
     
     try:
         execute_from_command_line(['manage.py', 'migrate', '--run-syncdb'])
+        execute_from_command_line(['manage.py', 'createcachetable'])
         print("✅ Migrations completed successfully!")
         return True
     except Exception as e:
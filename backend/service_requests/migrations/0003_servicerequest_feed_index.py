@@ -0,0 +1,17 @@
+# Generated by Django 4.2.30 on 2026-10-18 12:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("service_requests", "0002_alter_servicerequest_alternative_dates_and_more"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="servicerequest",
+            index=models.Index(fields=["created_at", "id"], name="servicereq_feed_idx"),
+        ),
+    ]
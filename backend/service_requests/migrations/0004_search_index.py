@@ -0,0 +1,77 @@
+from django.db import migrations
+
+# Kept literal so later changes to service_requests.search don't rewrite history.
+TABLE = 'service_requests_servicerequest'
+FTS_TABLE = 'service_requests_search'
+PG_SEARCH_COLUMN = 'search_vector'
+PG_CONFIG = 'english'
+SEARCH_FIELDS = [
+    ('title', 'A'),
+    ('machine_type', 'A'),
+    ('issue_description', 'B'),
+    ('history_notes', 'C'),
+]
+COLUMNS = ', '.join(field for field, _ in SEARCH_FIELDS)
+
+SQLITE_FORWARDS = [
+    f"""CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5(
+        {COLUMNS}, content='{TABLE}', content_rowid='id', tokenize='porter unicode61'
+    )""",
+    f"""CREATE TRIGGER {FTS_TABLE}_ai AFTER INSERT ON {TABLE} BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, {COLUMNS})
+        VALUES (new.id, {', '.join('new.' + field for field, _ in SEARCH_FIELDS)});
+    END""",
+    f"""CREATE TRIGGER {FTS_TABLE}_ad AFTER DELETE ON {TABLE} BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {COLUMNS})
+        VALUES ('delete', old.id, {', '.join('old.' + field for field, _ in SEARCH_FIELDS)});
+    END""",
+    f"""CREATE TRIGGER {FTS_TABLE}_au AFTER UPDATE OF {COLUMNS} ON {TABLE} BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {COLUMNS})
+        VALUES ('delete', old.id, {', '.join('old.' + field for field, _ in SEARCH_FIELDS)});
+        INSERT INTO {FTS_TABLE}(rowid, {COLUMNS})
+        VALUES (new.id, {', '.join('new.' + field for field, _ in SEARCH_FIELDS)});
+    END""",
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')",
+]
+SQLITE_BACKWARDS = [
+    f'DROP TRIGGER IF EXISTS {FTS_TABLE}_ai',
+    f'DROP TRIGGER IF EXISTS {FTS_TABLE}_ad',
+    f'DROP TRIGGER IF EXISTS {FTS_TABLE}_au',
+    f'DROP TABLE IF EXISTS {FTS_TABLE}',
+]
+
+PG_VECTOR = ' || '.join(
+    f"setweight(to_tsvector('{PG_CONFIG}', coalesce({field}, '')), '{weight}')"
+    for field, weight in SEARCH_FIELDS
+)
+PG_FORWARDS = [
+    # A stored generated column is maintained by Postgres on every write path,
+    # including bulk updates that skip model signals.
+    f'ALTER TABLE {TABLE} ADD COLUMN {PG_SEARCH_COLUMN} tsvector GENERATED ALWAYS AS ({PG_VECTOR}) STORED',
+    f'CREATE INDEX servicereq_search_idx ON {TABLE} USING GIN ({PG_SEARCH_COLUMN})',
+]
+PG_BACKWARDS = [
+    'DROP INDEX IF EXISTS servicereq_search_idx',
+    f'ALTER TABLE {TABLE} DROP COLUMN IF EXISTS {PG_SEARCH_COLUMN}',
+]
+
+
+def run(statements_by_vendor):
+    def apply(apps, schema_editor):
+        for statement in statements_by_vendor.get(schema_editor.connection.vendor, []):
+            schema_editor.execute(statement)
+    return apply
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("service_requests", "0003_servicerequest_feed_index"),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            run({'sqlite': SQLITE_FORWARDS, 'postgresql': PG_FORWARDS}),
+            run({'sqlite': SQLITE_BACKWARDS, 'postgresql': PG_BACKWARDS}),
+        ),
+    ]
@@ -0,0 +1,67 @@
+# Generated by Django 4.2.30 on 2026-10-18 12:45
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+# Kept literal so later changes to LIST_FILTER_FIELDS don't rewrite history.
+TABLE = 'service_requests_servicerequest'
+FIELDS = ('service_types', 'locations', 'technician_requirements')
+
+
+def create_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        # jsonb_path_ops indexes answer the @> containment filters.
+        for field in FIELDS:
+            schema_editor.execute(
+                f'CREATE INDEX servicereq_{field}_gin ON {TABLE} USING GIN ({field} jsonb_path_ops)'
+            )
+    else:
+        from core.jsonlists import rebuild_list_values
+        rebuild_list_values(apps.get_model('service_requests', 'ServiceRequest'), FIELDS, using=schema_editor.connection.alias)
+
+
+def drop_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        for field in FIELDS:
+            schema_editor.execute(f'DROP INDEX IF EXISTS servicereq_{field}_gin')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("service_requests", "0004_search_index"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ServiceRequestListValue",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("field", models.CharField(max_length=50)),
+                ("value", models.CharField(max_length=255)),
+                (
+                    "request",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="list_values",
+                        to="service_requests.servicerequest",
+                    ),
+                ),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name="servicerequestlistvalue",
+            constraint=models.UniqueConstraint(
+                fields=("field", "value", "request"), name="servicereq_listvalue_uniq"
+            ),
+        ),
+        migrations.RunPython(create_indexes, drop_indexes),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 4.2.30 on 2026-10-18 12:48
+
+from django.db import migrations, models
+
+
+def geocode_existing(apps, schema_editor):
+    from core.geo import set_location
+
+    ServiceRequest = apps.get_model('service_requests', 'ServiceRequest')
+    fields = ['customer_latitude', 'customer_longitude', 'customer_geocell']
+    rows = []
+    for service_request in ServiceRequest.objects.iterator():
+        set_location(service_request, [service_request.customer_address, *(str(location) for location in service_request.locations or [])], *fields)
+        rows.append(service_request)
+    ServiceRequest.objects.bulk_update(rows, fields, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("service_requests", "0005_list_values"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="servicerequest",
+            name="customer_geocell",
+            field=models.IntegerField(blank=True, db_index=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="servicerequest",
+            name="customer_latitude",
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="servicerequest",
+            name="customer_longitude",
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.RunPython(geocode_existing, migrations.RunPython.noop),
+    ]
@@ -9,6 +9,10 @@ class ServiceRequest(models.Model):
     locations = models.JSONField(default=list, blank=True)
     customer_company_name = models.CharField(max_length=255)
     customer_address = models.TextField()
+    # Geocoded from customer_address (or locations) on save (core.geo)
+    customer_latitude = models.FloatField(null=True, blank=True)
+    customer_longitude = models.FloatField(null=True, blank=True)
+    customer_geocell = models.IntegerField(null=True, blank=True, db_index=True)
     contact_person_name = models.CharField(max_length=100)
     contact_person_position = models.CharField(max_length=100, blank=True)
     contact_email = models.EmailField()
@@ -28,5 +32,28 @@ class ServiceRequest(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            # Backs the keyset-paginated provider feed (ORDER BY created_at, id)
+            models.Index(fields=['created_at', 'id'], name='servicereq_feed_idx'),
+        ]
+
     def __str__(self):
         return self.title
+
+
+# JSON list fields filterable with ?<field>=a&<field>=b (see core.jsonlists)
+LIST_FILTER_FIELDS = ('service_types', 'locations', 'technician_requirements')
+
+
+class ServiceRequestListValue(models.Model):
+    """One element of a ServiceRequest JSON list field, mirrored for indexed filtering."""
+    request = models.ForeignKey(ServiceRequest, on_delete=models.CASCADE, related_name='list_values')
+    field = models.CharField(max_length=50)
+    value = models.CharField(max_length=255)
+
+    class Meta:
+        constraints = [
+            # Leading (field, value) also serves the filter lookups
+            models.UniqueConstraint(fields=['field', 'value', 'request'], name='servicereq_listvalue_uniq'),
+        ]
@@ -0,0 +1,137 @@
+import base64
+from collections import OrderedDict
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import BasePagination, LimitOffsetPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Keyset pagination over (created_at, id), newest first.
+
+    Unlike PageNumberPagination there is no COUNT(*) and no OFFSET: every
+    page is a single index range scan, so page N costs the same as page 1.
+
+    - ``?before=<cursor>`` returns rows older than the cursor (next page).
+    - ``?since=<cursor>`` returns rows newer than the cursor, so clients can
+      poll for new postings only.
+    """
+    page_size = 20
+    max_page_size = 100
+    page_size_query_param = 'page_size'
+    before_query_param = 'before'
+    since_query_param = 'since'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        page_size = self.get_page_size(request)
+        before = self.decode_cursor(request.query_params.get(self.before_query_param))
+        since = self.decode_cursor(request.query_params.get(self.since_query_param))
+
+        if since is not None:
+            created_at, pk = since
+            queryset = queryset.filter(
+                Q(created_at__gt=created_at) | Q(created_at=created_at, id__gt=pk)
+            ).order_by('created_at', 'id')
+        else:
+            if before is not None:
+                created_at, pk = before
+                queryset = queryset.filter(
+                    Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk)
+                )
+            queryset = queryset.order_by('-created_at', '-id')
+
+        rows = list(queryset[:page_size + 1])
+        self.has_more = len(rows) > page_size
+        rows = rows[:page_size]
+        if since is not None:
+            # Rows were fetched oldest first so no new posting is skipped;
+            # present them in feed order.
+            rows.reverse()
+
+        self.polling_mode = since is not None
+        self.page = rows
+        self.since = since
+        return rows
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'next': {'type': 'string', 'nullable': True},
+                'previous': {'type': 'string', 'nullable': True},
+                'results': schema,
+            },
+        }
+
+    def get_next_link(self):
+        """Link to the next (older) page, or None when the feed is exhausted."""
+        if self.polling_mode or not self.has_more or not self.page:
+            return None
+        url = remove_query_param(self.base_url, self.since_query_param)
+        return replace_query_param(url, self.before_query_param, self.encode_cursor(self.page[-1]))
+
+    def get_previous_link(self):
+        """Link that returns only postings newer than this page."""
+        if self.page:
+            cursor = self.encode_cursor(self.page[0])
+        elif self.since is not None:
+            cursor = self.encode_cursor(self.since)
+        else:
+            return None
+        url = remove_query_param(self.base_url, self.before_query_param)
+        return replace_query_param(url, self.since_query_param, cursor)
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params.get(self.page_size_query_param, self.page_size))
+        except (TypeError, ValueError):
+            return self.page_size
+        if page_size <= 0:
+            return self.page_size
+        return min(page_size, self.max_page_size)
+
+    def encode_cursor(self, position):
+        if isinstance(position, tuple):
+            created_at, pk = position
+        else:
+            created_at, pk = position.created_at, position.pk
+        raw = f'{created_at.isoformat()}|{pk}'
+        return base64.urlsafe_b64encode(raw.encode('ascii')).decode('ascii')
+
+    def decode_cursor(self, encoded):
+        if not encoded:
+            return None
+        try:
+            raw = base64.urlsafe_b64decode(encoded.encode('ascii')).decode('ascii')
+            created_at, pk = raw.rsplit('|', 1)
+            created_at = parse_datetime(created_at)
+            pk = int(pk)
+        except (ValueError, UnicodeError, TypeError):
+            raise ValidationError({'cursor': 'Invalid cursor.'})
+        if created_at is None:
+            raise ValidationError({'cursor': 'Invalid cursor.'})
+        return created_at, pk
+
+
+class NearFeedPagination(LimitOffsetPagination):
+    """
+    Offset pages for a feed filtered with ?near=, which is ranked by
+    distance rather than recency, so the (created_at, id) cursor doesn't
+    apply. Radius-bounded result sets are small enough for OFFSET.
+    """
+    default_limit = KeysetPagination.page_size
+    max_limit = KeysetPagination.max_page_size
+    limit_query_param = 'page_size'
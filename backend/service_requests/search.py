@@ -0,0 +1,115 @@
+"""
+Full-text search over service requests.
+
+The index lives in the database and is maintained there (see migration
+0004): on Postgres a stored, weighted tsvector column with a GIN index, on
+SQLite an external-content FTS5 table kept in sync by triggers. Both cover
+every write path, including bulk updates. ``search_requests`` queries
+whichever one the connection has and applies the caller's queryset, so the
+viewset's visibility rules still hold.
+"""
+import html
+import re
+
+from django.db import connections
+from django.db.models import BooleanField, FloatField
+from django.db.models.expressions import RawSQL
+
+FTS_TABLE = 'service_requests_search'
+PG_SEARCH_COLUMN = 'search_vector'
+PG_CONFIG = 'english'
+SEARCH_FIELDS = [
+    ('title', 'A'),
+    ('machine_type', 'A'),
+    ('issue_description', 'B'),
+    ('history_notes', 'C'),
+]
+BM25_WEIGHTS = {'A': 10.0, 'B': 4.0, 'C': 1.0}
+
+# Highlights are marked with private-use characters and only turned into
+# <mark> tags after the text has been HTML-escaped.
+MARK_START, MARK_END = '\ue000', '\ue001'
+TOKEN_RE = re.compile(r'\w+')
+
+
+def mark_up(text):
+    return html.escape(text or '').replace(MARK_START, '<mark>').replace(MARK_END, '</mark>')
+
+
+def fts5_query(query):
+    """Quote each word so user input can't inject FTS5 syntax; the last word matches as a prefix."""
+    terms = [f'"{term}"' for term in TOKEN_RE.findall(query)]
+    if terms:
+        terms[-1] += '*'
+    return ' '.join(terms)
+
+
+def search_requests(queryset, query, limit=20, offset=0):
+    """
+    Search ``queryset`` for ``query``, best match first.
+
+    Returns ([(request, rank, highlight)], has_more), where highlight holds
+    the marked-up title and a snippet of the best matching text.
+    """
+    vendor = connections[queryset.db].vendor
+    if vendor == 'postgresql':
+        return _search_postgres(queryset, query, limit, offset)
+    if vendor == 'sqlite':
+        return _search_sqlite(queryset, query, limit, offset)
+    raise NotImplementedError(f'Full-text search is not available on {vendor}')
+
+
+def _search_postgres(queryset, query, limit, offset):
+    from django.contrib.postgres.search import SearchHeadline, SearchQuery
+
+    column = f'"{queryset.model._meta.db_table}"."{PG_SEARCH_COLUMN}"'
+    tsquery = SearchQuery(query, config=PG_CONFIG, search_type='websearch')
+    marks = {'config': PG_CONFIG, 'start_sel': MARK_START, 'stop_sel': MARK_END}
+    rows = list(
+        queryset
+        .filter(RawSQL(f'{column} @@ websearch_to_tsquery(%s, %s)', (PG_CONFIG, query), output_field=BooleanField()))
+        .annotate(
+            rank=RawSQL(f'ts_rank_cd({column}, websearch_to_tsquery(%s, %s), 32)', (PG_CONFIG, query),
+                        output_field=FloatField()),
+            # ts_headline is only evaluated for the rows that survive the LIMIT.
+            headline_title=SearchHeadline('title', tsquery, highlight_all=True, **marks),
+            headline_snippet=SearchHeadline('issue_description', tsquery, max_words=30, min_words=10, **marks),
+        )
+        .order_by('-rank', '-id')[offset:offset + limit + 1]
+    )
+    hits = [
+        (row, row.rank, {'title': mark_up(row.headline_title), 'snippet': mark_up(row.headline_snippet)})
+        for row in rows[:limit]
+    ]
+    return hits, len(rows) > limit
+
+
+def _search_sqlite(queryset, query, limit, offset, batch_size=200):
+    match = fts5_query(query)
+    if not match:
+        return [], False
+    weights = ', '.join(str(BM25_WEIGHTS[weight]) for _, weight in SEARCH_FIELDS)
+    sql = (
+        f'SELECT rowid, -bm25({FTS_TABLE}, {weights}), '
+        f'highlight({FTS_TABLE}, 0, %s, %s), snippet({FTS_TABLE}, -1, %s, %s, %s, 16) '
+        f'FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s ORDER BY 2 DESC, rowid DESC LIMIT %s OFFSET %s'
+    )
+    hits, skipped, fts_offset = [], 0, 0
+    with connections[queryset.db].cursor() as cursor:
+        # Walk the ranked matches in batches, keeping those the queryset
+        # allows; the work grows with the number of matches, not the table.
+        while len(hits) <= limit:
+            cursor.execute(sql, [MARK_START, MARK_END, MARK_START, MARK_END, '…', match, batch_size, fts_offset])
+            batch = cursor.fetchall()
+            visible = queryset.in_bulk([row[0] for row in batch])
+            for request_id, rank, title, snippet in batch:
+                if request_id not in visible:
+                    continue
+                if skipped < offset:
+                    skipped += 1
+                    continue
+                hits.append((visible[request_id], rank, {'title': mark_up(title), 'snippet': mark_up(snippet)}))
+            if len(batch) < batch_size:
+                break
+            fts_offset += batch_size
+    return hits[:limit], len(hits) > limit
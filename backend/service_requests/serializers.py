@@ -2,10 +2,13 @@ from rest_framework import serializers
 from .models import ServiceRequest
 
 class ServiceRequestSerializer(serializers.ModelSerializer):
+    # Only present when the list is filtered with ?near=
+    distance_km = serializers.FloatField(read_only=True)
+
     class Meta:
         model = ServiceRequest
         fields = '__all__'
-        read_only_fields = ['buyer', 'created_at', 'updated_at']
+        read_only_fields = ['buyer', 'created_at', 'updated_at', 'customer_latitude', 'customer_longitude', 'customer_geocell']
 
     def validate_service_types(self, value):
         """Ensure service_types is a list"""
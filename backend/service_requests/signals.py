@@ -0,0 +1,19 @@
+from django.db.models.signals import post_save, pre_save
+from django.dispatch import receiver
+
+from core.geo import set_location
+from core.jsonlists import sync_list_values
+
+from .models import LIST_FILTER_FIELDS, ServiceRequest
+
+
+@receiver(pre_save, sender=ServiceRequest)
+def geocode_customer_address(sender, instance, **kwargs):
+    # Fall back to the listed locations when the address isn't in the gazetteer.
+    texts = [instance.customer_address, *(str(location) for location in instance.locations or [])]
+    set_location(instance, texts, 'customer_latitude', 'customer_longitude', 'customer_geocell')
+
+
+@receiver(post_save, sender=ServiceRequest)
+def mirror_list_fields(sender, instance, update_fields=None, using='default', **kwargs):
+    sync_list_values(instance, LIST_FILTER_FIELDS, update_fields, using)
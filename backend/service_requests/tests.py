@@ -9,3 +9,179 @@ class ServiceRequestModelTest(TestCase):
         req = ServiceRequest.objects.create(buyer=user, title='Test', machine_type='TypeA', serial_number='123', customer_company_name='TestCo', customer_address='Addr', contact_person_name='Alice', contact_person_position='Manager', contact_email='alice@test.com', contact_phone='123', service_types=[], issue_description='Issue', urgency='high', preferred_date='2025-08-21', budget_eur=100, payment_method='bank_transfer', status='draft')
         self.assertEqual(req.title, 'Test')
         self.assertEqual(req.status, 'draft')
+
+
+class ServiceRequestFeedTest(TestCase):
+    def setUp(self):
+        from rest_framework.test import APIClient
+        from users.models import User
+        buyer_user = User.objects.create(username='feedbuyer', role='buyer')
+        self.buyer = BuyerProfile.objects.create(user=buyer_user, company_name='TestCo', industry='Tech', contact_person_name='Alice')
+        self.provider = User.objects.create(username='feedprovider', role='provider')
+        self.client = APIClient()
+        self.client.force_authenticate(self.provider)
+        self.requests = [self.create_request(f'Request {i}') for i in range(5)]
+
+    def create_request(self, title, status='open'):
+        return ServiceRequest.objects.create(buyer=self.buyer, title=title, machine_type='TypeA', serial_number='123', customer_company_name='TestCo', customer_address='Addr', contact_person_name='Alice', contact_email='alice@test.com', contact_phone='123', service_types=['repair'], issue_description='Issue', urgency='high', preferred_date='2025-08-21', budget_eur=100, payment_method='bank_transfer', status=status)
+
+    def test_feed_pages_are_disjoint_and_newest_first(self):
+        first = self.client.get('/api/service-requests/feed/', {'page_size': 3}).json()
+        self.assertEqual([r['title'] for r in first['results']], ['Request 4', 'Request 3', 'Request 2'])
+        # The page query only: the ETag is built from the fetched rows
+        with self.assertNumQueries(1):
+            second = self.client.get(first['next']).json()
+        self.assertEqual([r['title'] for r in second['results']], ['Request 1', 'Request 0'])
+        self.assertIsNone(second['next'])
+
+    def test_since_cursor_returns_only_new_postings(self):
+        first = self.client.get('/api/service-requests/feed/').json()
+        self.create_request('Request 5')
+        self.create_request('Closed', status='completed')
+        newer = self.client.get(first['previous']).json()
+        self.assertEqual([r['title'] for r in newer['results']], ['Request 5'])
+
+    def test_invalid_cursor_is_rejected(self):
+        response = self.client.get('/api/service-requests/feed/', {'before': 'garbage'})
+        self.assertEqual(response.status_code, 400)
+
+
+class ServiceRequestConditionalGetTest(TestCase):
+    def setUp(self):
+        from rest_framework.test import APIClient
+        from users.models import User
+        buyer_user = User.objects.create(username='etagbuyer', role='buyer')
+        self.buyer = BuyerProfile.objects.create(user=buyer_user, company_name='TestCo', industry='Tech', contact_person_name='Alice')
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create(username='etagprovider', role='provider'))
+        self.requests = [self.create_request(f'Request {i}') for i in range(3)]
+
+    def create_request(self, title):
+        return ServiceRequest.objects.create(buyer=self.buyer, title=title, machine_type='TypeA', serial_number='123', customer_company_name='TestCo', customer_address='Addr', contact_person_name='Alice', contact_email='alice@test.com', contact_phone='123', service_types=['repair'], issue_description='Issue', urgency='high', preferred_date='2025-08-21', budget_eur=100, payment_method='bank_transfer', status='open')
+
+    def test_unchanged_list_is_not_modified(self):
+        url = '/api/service-requests/'
+        etag = self.client.get(url)['ETag']
+        # Validator only: no COUNT, no page, no serialization
+        with self.assertNumQueries(1):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+        self.assertEqual(self.client.get(url, {'page': 1}, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+        self.requests[0].title = 'Edited'
+        self.requests[0].save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+        self.requests[1].delete()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_detail_honours_etag_and_last_modified(self):
+        url = f'/api/service-requests/{self.requests[0].id}/'
+        response = self.client.get(url)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+        self.assertEqual(self.client.get(url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified']).status_code, 304)
+        self.assertEqual(self.client.get(url, HTTP_IF_MODIFIED_SINCE='Mon, 01 Jan 2001 00:00:00 GMT').status_code, 200)
+
+    def test_feed_polls_are_not_modified_until_a_posting_arrives(self):
+        url = '/api/service-requests/feed/'
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        self.create_request('New')
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_feed_etag_does_not_aggregate_over_the_feed(self):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        url = '/api/service-requests/feed/'
+        first = self.client.get(url, {'page_size': 2})
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, {'page_size': 2}, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn('COUNT(', queries[0]['sql'].upper())
+        self.assertIn('LIMIT 3', queries[0]['sql'])
+
+        self.requests[2].title = 'Edited'
+        self.requests[2].save()
+        self.assertEqual(self.client.get(url, {'page_size': 2}, HTTP_IF_NONE_MATCH=first['ETag']).status_code, 200)
+
+
+class ServiceRequestSearchTest(TestCase):
+    def setUp(self):
+        from rest_framework.test import APIClient
+        from users.models import User
+        buyer_user = User.objects.create(username='searchbuyer', role='buyer')
+        self.buyer = BuyerProfile.objects.create(user=buyer_user, company_name='TestCo', industry='Tech', contact_person_name='Alice')
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create(username='searchprovider', role='provider'))
+        for i in range(5):
+            ServiceRequest.objects.create(**{**self.fields(), 'title': f'Request {i}'})
+
+    def test_ranks_title_matches_first_and_highlights(self):
+        ServiceRequest.objects.create(**{**self.fields(), 'title': 'Spindle <b>noise</b>', 'issue_description': 'Loud grinding'})
+        ServiceRequest.objects.create(**{**self.fields(), 'title': 'Annual check', 'issue_description': 'Some spindle noise lately'})
+        response = self.client.get('/api/service-requests/search/', {'q': 'spindle'})
+        self.assertEqual(response.status_code, 200)
+        results = response.json()['results']
+        self.assertEqual([r['request']['title'] for r in results], ['Spindle <b>noise</b>', 'Annual check'])
+        self.assertEqual(results[0]['highlight']['title'], '<mark>Spindle</mark> &lt;b&gt;noise&lt;/b&gt;')
+        self.assertIn('<mark>spindle</mark>', results[1]['highlight']['snippet'])
+
+    def test_respects_visibility_and_follows_updates(self):
+        hidden = ServiceRequest.objects.create(**{**self.fields(), 'title': 'Hydraulic leak', 'status': 'draft'})
+        self.assertEqual(self.client.get('/api/service-requests/search/', {'q': 'hydraulic'}).json()['results'], [])
+        ServiceRequest.objects.filter(pk=hidden.pk).update(status='open', title='Pneumatic leak')
+        self.assertEqual(self.client.get('/api/service-requests/search/', {'q': 'hydraulic'}).json()['results'], [])
+        results = self.client.get('/api/service-requests/search/', {'q': 'pneumat'}).json()['results']
+        self.assertEqual([r['request']['id'] for r in results], [hidden.pk])
+
+    def test_pages_and_rejects_empty_query(self):
+        response = self.client.get('/api/service-requests/search/', {'q': 'request', 'limit': 3})
+        self.assertEqual(len(response.json()['results']), 3)
+        self.assertTrue(response.json()['has_more'])
+        response = self.client.get('/api/service-requests/search/', {'q': 'request', 'limit': 3, 'offset': 3})
+        self.assertEqual(len(response.json()['results']), 2)
+        self.assertFalse(response.json()['has_more'])
+        self.assertEqual(self.client.get('/api/service-requests/search/', {'q': ' '}).status_code, 400)
+
+    def fields(self):
+        return dict(buyer=self.buyer, machine_type='TypeA', serial_number='123', customer_company_name='TestCo', customer_address='Addr', contact_person_name='Alice', contact_email='alice@test.com', contact_phone='123', service_types=['repair'], issue_description='Issue', urgency='high', preferred_date='2025-08-21', budget_eur=100, payment_method='bank_transfer', status='open')
+
+
+class ServiceRequestListFilterTest(TestCase):
+    def test_feed_filters_by_list_containment(self):
+        from rest_framework.test import APIClient
+        from users.models import User
+        buyer = BuyerProfile.objects.create(user=User.objects.create(username='filterbuyer', role='buyer'), company_name='TestCo', industry='Tech', contact_person_name='Alice')
+        client = APIClient()
+        client.force_authenticate(User.objects.create(username='filterprovider', role='provider'))
+        fields = dict(buyer=buyer, machine_type='TypeA', serial_number='123', customer_company_name='TestCo', customer_address='Addr', contact_person_name='Alice', contact_email='alice@test.com', contact_phone='123', issue_description='Issue', urgency='high', preferred_date='2025-08-21', budget_eur=100, payment_method='bank_transfer')
+        plc = ServiceRequest.objects.create(title='PLC', service_types=['repair'], technician_requirements=['PLC', 'Siemens'], locations=['Berlin, DE'], **fields)
+        ServiceRequest.objects.create(title='Hydraulics', service_types=['repair'], technician_requirements=['Hydraulics'], **fields)
+
+        def titles(**params):
+            return [r['title'] for r in client.get('/api/service-requests/feed/', params).json()['results']]
+        self.assertEqual(titles(service_types='repair'), ['Hydraulics', 'PLC'])
+        self.assertEqual(titles(technician_requirements=['PLC', 'Siemens'], locations='Berlin, DE'), ['PLC'])
+        self.assertEqual(titles(technician_requirements=['PLC', 'Hydraulics']), [])
+        self.assertEqual(titles(near='Potsdam', radius_km=50), ['PLC'])
+        plc.technician_requirements = ['PLC']
+        plc.save()
+        self.assertEqual(titles(technician_requirements=['PLC', 'Siemens']), [])
+
+    def test_near_feed_is_ranked_by_distance(self):
+        from rest_framework.test import APIClient
+        from users.models import User
+        buyer = BuyerProfile.objects.create(user=User.objects.create(username='nearbuyer', role='buyer'), company_name='TestCo', industry='Tech', contact_person_name='Alice')
+        client = APIClient()
+        client.force_authenticate(User.objects.create(username='nearprovider', role='provider'))
+        fields = dict(buyer=buyer, machine_type='TypeA', serial_number='123', customer_company_name='TestCo', customer_address='Addr', contact_person_name='Alice', contact_email='alice@test.com', contact_phone='123', service_types=['repair'], issue_description='Issue', urgency='high', preferred_date='2025-08-21', budget_eur=100, payment_method='bank_transfer')
+        for city in ('Hamburg', 'Berlin', 'Leipzig'):
+            ServiceRequest.objects.create(title=city, locations=[f'{city}, DE'], **fields)
+
+        response = client.get('/api/service-requests/feed/', {'near': 'Potsdam', 'radius_km': 500, 'page_size': 2}).json()
+        self.assertEqual([r['title'] for r in response['results']], ['Berlin', 'Leipzig'])
+        self.assertLess(response['results'][0]['distance_km'], response['results'][1]['distance_km'])
+        self.assertEqual([r['title'] for r in client.get(response['next']).json()['results']], ['Hamburg'])
@@ -1,49 +1,121 @@
 from rest_framework import viewsets, permissions, status
+from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.exceptions import ValidationError
-from .models import ServiceRequest
+from core.geo import NearFilter
+from core.jsonlists import JSONListFilter
+from core.mixins import ConditionalGetMixin
+from .models import LIST_FILTER_FIELDS, ServiceRequest
+from .pagination import KeysetPagination, NearFeedPagination
+from .search import search_requests
 from .serializers import ServiceRequestSerializer
-from buyers.models import BuyerProfile
+from users.profiles import get_role_profile
 import logging
 
 logger = logging.getLogger(__name__)
 
-class ServiceRequestViewSet(viewsets.ModelViewSet):
+class ServiceRequestViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     serializer_class = ServiceRequestSerializer
     permission_classes = [permissions.IsAuthenticated]
+    filter_backends = [JSONListFilter, NearFilter]
+    json_list_filter_fields = LIST_FILTER_FIELDS
+    near_filter_fields = ('customer_latitude', 'customer_longitude', 'customer_geocell')
     
     def get_queryset(self):
         if self.request.user.role == 'buyer':
-            try:
-                buyer_profile = BuyerProfile.objects.get(user=self.request.user)
-                return ServiceRequest.objects.filter(buyer=buyer_profile)
-            except BuyerProfile.DoesNotExist:
+            buyer_profile = get_role_profile(self.request, 'buyer')
+            if buyer_profile is None:
                 return ServiceRequest.objects.none()
+            return ServiceRequest.objects.filter(buyer=buyer_profile)
         elif self.request.user.role == 'provider':
             return ServiceRequest.objects.filter(status__in=['open', 'in_progress'])
         return ServiceRequest.objects.none()
     
-    def perform_create(self, serializer):
+    @action(detail=False, methods=['get'])
+    def feed(self, request):
+        """
+        Cursor-paginated feed, newest first. Supports ?before= and ?since= cursors.
+
+        With ?near= the feed is ranked by distance and paged with ?offset= instead.
+        """
+        queryset = self.filter_queryset(self.get_queryset())
+        near = bool(request.query_params.get('near', '').strip())
+        paginator = NearFeedPagination() if near else KeysetPagination()
+        page = paginator.paginate_queryset(queryset, request, view=self)
+        # The ETag comes from the page just fetched (the cursor is in the
+        # URL), so polls don't add an aggregate over the whole feed.
+        state = paginator.count if near else paginator.has_more
+
+        def respond():
+            serializer = self.get_serializer(page, many=True)
+            return paginator.get_paginated_response(serializer.data)
+        return self.conditional_response(self.page_validator(page, state), None, respond)
+    
+    @action(detail=False, methods=['get'])
+    def search(self, request):
+        """Full-text search ranked by relevance, with <mark>-highlighted matches. Supports ?limit= and ?offset=."""
+        query = request.query_params.get('q', '').strip()
+        if not query:
+            raise ValidationError({'q': 'This parameter is required'})
         try:
-            buyer_profile = BuyerProfile.objects.get(user=self.request.user)
-            serializer.save(buyer=buyer_profile)
-        except BuyerProfile.DoesNotExist:
+            limit = min(max(int(request.query_params.get('limit', 20)), 1), 50)
+            offset = max(int(request.query_params.get('offset', 0)), 0)
+        except ValueError:
+            raise ValidationError({'limit': 'limit and offset must be integers'})
+        
+        hits, has_more = search_requests(self.filter_queryset(self.get_queryset()), query, limit=limit, offset=offset)
+        results = [
+            {'rank': rank, 'highlight': highlight, 'request': self.get_serializer(service_request).data}
+            for service_request, rank, highlight in hits
+        ]
+        return Response({'query': query, 'results': results, 'has_more': has_more})
+    
+    @action(detail=True, methods=['get'])
+    def matches(self, request, pk=None):
+        """Providers ranked against this request by the indexed matching engine."""
+        from providers.matching import provider_index
+        from providers.models import ProviderProfile
+        from providers.serializers import ProviderProfileSerializer
+        
+        service_request = self.get_object()
+        try:
+            limit = min(max(int(request.query_params.get('limit', 20)), 1), 50)
+        except ValueError:
+            raise ValidationError({'limit': 'Must be an integer'})
+        
+        ranked = provider_index.rank(service_request, limit=limit)
+        profiles = ProviderProfile.objects.in_bulk([provider_id for provider_id, _, _ in ranked])
+        results = []
+        for provider_id, score, breakdown in ranked:
+            profile = profiles.get(provider_id)
+            if profile is None:
+                continue
+            results.append({
+                'score': score,
+                'breakdown': breakdown,
+                'provider': ProviderProfileSerializer(profile).data,
+            })
+        return Response({'request_id': service_request.id, 'results': results})
+    
+    def perform_create(self, serializer):
+        buyer_profile = get_role_profile(self.request, 'buyer')
+        if buyer_profile is None:
             raise ValidationError("Buyer profile required to create service request")
+        serializer.save(buyer=buyer_profile)
     
     def create(self, request, *args, **kwargs):
         logger.info(f"Creating service request with data: {request.data}")
         logger.info(f"User: {request.user}, Role: {getattr(request.user, 'role', 'None')}")
         
         # Check if user has buyer profile
-        try:
-            buyer_profile = BuyerProfile.objects.get(user=request.user)
-            logger.info(f"Found buyer profile: {buyer_profile.id}")
-        except BuyerProfile.DoesNotExist:
+        buyer_profile = get_role_profile(request, 'buyer')
+        if buyer_profile is None:
             logger.error("Buyer profile not found")
             return Response(
                 {"error": "Buyer profile required to create service request"}, 
                 status=status.HTTP_400_BAD_REQUEST
             )
+        logger.info(f"Found buyer profile: {buyer_profile.id}")
         
         serializer = self.get_serializer(data=request.data)
         if serializer.is_valid():
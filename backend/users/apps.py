@@ -3,4 +3,7 @@ from django.apps import AppConfig
 class UsersConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'users'
-    path = '/var/task/backend/users'  # Matches traceback path
\ No newline at end of file
+    path = '/var/task/backend/users'  # Matches traceback path
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,68 @@
+"""
+JWT authentication that resolves the user from a short-lived cache.
+
+The token signature and expiry are still verified on every request; only
+the User primary-key lookup is cached. Entries hold the user's concrete
+fields except the password hash and are rebuilt into a User with
+``Model.from_db``, so the password is a deferred field that loads on first
+access (e.g. in ChangePasswordView) and ``save()`` writes back only loaded
+fields. users.signals drops the entry whenever the user is saved or deleted;
+AUTH_USER_CACHE_TTL bounds staleness after bulk updates that skip signals.
+"""
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from .models import User
+
+CACHE_KEY = 'auth:user:{}'
+EXCLUDED_FIELDS = {'password'}
+
+
+def _cache():
+    return caches[getattr(settings, 'AUTH_USER_CACHE_ALIAS', 'default')]
+
+
+def invalidate_cached_user(user_id):
+    _cache().delete(CACHE_KEY.format(user_id))
+
+
+def _snapshot(user):
+    fields = [f for f in User._meta.concrete_fields if f.name not in EXCLUDED_FIELDS]
+    return {
+        'fields': [f.attname for f in fields],
+        'values': [getattr(user, f.attname) for f in fields],
+        'password_md5': get_md5_hash_password(user.password) if api_settings.CHECK_REVOKE_TOKEN else None,
+    }
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError as e:
+            raise InvalidToken(_('Token contained no recognizable user identification')) from e
+
+        key = CACHE_KEY.format(user_id)
+        snapshot = _cache().get(key)
+        if snapshot is None:
+            try:
+                user = User.objects.get(**{api_settings.USER_ID_FIELD: user_id})
+            except User.DoesNotExist as e:
+                raise AuthenticationFailed(_('User not found'), code='user_not_found') from e
+            snapshot = _snapshot(user)
+            _cache().set(key, snapshot, getattr(settings, 'AUTH_USER_CACHE_TTL', 60))
+        else:
+            user = User.from_db(DEFAULT_DB_ALIAS, snapshot['fields'], snapshot['values'])
+
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_('User is inactive'), code='user_inactive')
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != snapshot['password_md5']:
+                raise AuthenticationFailed(_("The user's password has been changed."), code='password_changed')
+        return user
@@ -0,0 +1,174 @@
+"""
+Materialized dashboard counters.
+
+The write paths for service requests, applications, message threads and
+reviews adjust DashboardCounters rows with F-expression updates (see
+users.signals), so the dashboard is a primary-key read instead of a set of
+COUNT queries. A user without a row yet is materialized from the source
+tables on first touch; ``check_dashboard_counters`` recomputes all rows in
+bulk and reports drift. The marketplace-wide open-request count, read on
+every provider's dashboard, is also served from the cache (core.cache.fetch).
+"""
+from collections import defaultdict
+
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F
+
+from core.cache import fetch
+
+from .models import DashboardCounters, MarketplaceCounters, User
+
+COUNTER_FIELDS = ('requests', 'applications', 'messages', 'reviews')
+OPEN_STATUS = 'open'
+OPEN_REQUESTS_KEY = 'dashboard:open_requests'
+OPEN_REQUESTS_TIMEOUT = 60
+
+
+def compute_counters(user_ids=None):
+    """Count from the source tables; returns {user_id: {field: value}}."""
+    from applications.models import Application
+    from chat.models import MessageThread
+    from reviews.models import Review
+    from service_requests.models import ServiceRequest
+
+    users = User.objects.all()
+    if user_ids is not None:
+        users = users.filter(id__in=user_ids)
+    roles = dict(users.values_list('id', 'role'))
+    counters = {user_id: dict.fromkeys(COUNTER_FIELDS, 0) for user_id in roles}
+
+    def count_by(queryset, key):
+        if user_ids is not None:
+            queryset = queryset.filter(**{f'{key}__in': user_ids})
+        return queryset.order_by().values_list(key).annotate(n=Count('pk'))
+
+    for user_id, n in count_by(ServiceRequest.objects.all(), 'buyer__user_id'):
+        if roles.get(user_id) == 'buyer':
+            counters[user_id]['requests'] = n
+    for user_id, n in count_by(Application.objects.all(), 'request__buyer__user_id'):
+        if roles.get(user_id) == 'buyer':
+            counters[user_id]['applications'] = n
+    for user_id, n in count_by(Application.objects.all(), 'provider__user_id'):
+        if roles.get(user_id) == 'provider':
+            counters[user_id]['applications'] = n
+    for user_id, n in count_by(MessageThread.participants.through.objects.all(), 'user_id'):
+        if user_id in counters:
+            counters[user_id]['messages'] = n
+
+    reviews = defaultdict(int)
+    for user_id, n in count_by(Review.objects.all(), 'reviewer_id'):
+        reviews[user_id] += n
+    for user_id, n in count_by(Review.objects.exclude(reviewer_id=F('reviewee_id')), 'reviewee_id'):
+        reviews[user_id] += n
+    for user_id, n in reviews.items():
+        if user_id in counters:
+            counters[user_id]['reviews'] = n
+    return counters
+
+
+def compute_open_requests():
+    from service_requests.models import ServiceRequest
+    return ServiceRequest.objects.filter(status=OPEN_STATUS).count()
+
+
+def get_counters(user):
+    """The user's counters row, materializing it on first access."""
+    try:
+        return DashboardCounters.objects.get(user=user)
+    except DashboardCounters.DoesNotExist:
+        return _materialize(user.pk)
+
+
+def get_open_requests():
+    return fetch(OPEN_REQUESTS_KEY, _read_open_requests, OPEN_REQUESTS_TIMEOUT)
+
+
+def _read_open_requests():
+    try:
+        return MarketplaceCounters.objects.get(pk=1).open_requests
+    except MarketplaceCounters.DoesNotExist:
+        return _materialize_marketplace().open_requests
+
+
+def invalidate_open_requests():
+    # Now for this transaction's own reads, and again after commit so a
+    # concurrent read can't re-cache the pre-write count.
+    cache.delete(OPEN_REQUESTS_KEY)
+    transaction.on_commit(lambda: cache.delete(OPEN_REQUESTS_KEY))
+
+
+def bump(user_ids, field, delta=1):
+    """Add ``delta`` to ``field`` for each user; rows that don't exist yet are computed."""
+    user_ids = {user_id for user_id in user_ids if user_id is not None}
+    if not user_ids:
+        return
+    existing = set(
+        DashboardCounters.objects.filter(user_id__in=user_ids).values_list('user_id', flat=True)
+    )
+    if existing:
+        DashboardCounters.objects.filter(user_id__in=existing).update(**{field: F(field) + delta})
+    for user_id in user_ids - existing:
+        # Computed after the write, so the change is already included.
+        _materialize(user_id)
+
+
+def bump_open_requests(delta):
+    if not MarketplaceCounters.objects.filter(pk=1).update(open_requests=F('open_requests') + delta):
+        _materialize_marketplace()
+    invalidate_open_requests()
+
+
+def _materialize(user_id):
+    values = compute_counters([user_id]).get(user_id, dict.fromkeys(COUNTER_FIELDS, 0))
+    try:
+        with transaction.atomic():
+            return DashboardCounters.objects.create(user_id=user_id, **values)
+    except IntegrityError:
+        # Another request materialized it first.
+        return DashboardCounters.objects.get(user_id=user_id)
+
+
+def _materialize_marketplace():
+    counters, _ = MarketplaceCounters.objects.update_or_create(
+        pk=1, defaults={'open_requests': compute_open_requests()}
+    )
+    return counters
+
+
+def rebuild_counters(batch_size=500, dry_run=False):
+    """
+    Recompute every user's counters in batches and rewrite rows that drifted.
+
+    Returns (checked, drifted).
+    """
+    checked = drifted = 0
+    user_ids = list(User.objects.order_by('pk').values_list('pk', flat=True))
+    for start in range(0, len(user_ids), batch_size):
+        chunk = user_ids[start:start + batch_size]
+        expected = compute_counters(chunk)
+        stored = DashboardCounters.objects.in_bulk(chunk)
+        to_create, to_update = [], []
+        for user_id, values in expected.items():
+            row = stored.get(user_id)
+            if row is None:
+                to_create.append(DashboardCounters(user_id=user_id, **values))
+            elif any(getattr(row, field) != value for field, value in values.items()):
+                for field, value in values.items():
+                    setattr(row, field, value)
+                to_update.append(row)
+        checked += len(expected)
+        drifted += len(to_create) + len(to_update)
+        if not dry_run:
+            with transaction.atomic():
+                DashboardCounters.objects.bulk_create(to_create, ignore_conflicts=True)
+                DashboardCounters.objects.bulk_update(to_update, COUNTER_FIELDS)
+
+    open_requests = compute_open_requests()
+    marketplace = MarketplaceCounters.objects.filter(pk=1).first()
+    if marketplace is None or marketplace.open_requests != open_requests:
+        drifted += 1
+        if not dry_run:
+            MarketplaceCounters.objects.update_or_create(pk=1, defaults={'open_requests': open_requests})
+            invalidate_open_requests()
+    return checked, drifted
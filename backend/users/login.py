@@ -0,0 +1,181 @@
+"""
+Password checks for the login endpoint, isolated from the request workers.
+
+A password hash costs tens of milliseconds of CPU, so a burst of logins
+could otherwise occupy every worker. Hashing runs in a small thread pool
+(hashlib and argon2 release the GIL, so threads hash in parallel) behind
+an admission limit: at most LOGIN['HASH_WORKERS'] hashes run at once, up to
+LOGIN['HASH_QUEUE_SIZE'] more wait, and anything beyond that is turned
+away at once with a 503 and Retry-After instead of queueing.
+
+Before any hashing, attempts are throttled in the shared cache per client
+IP and per account (failed attempts only, reset by a successful login).
+A correct password stored with an outdated hasher or work factor is
+rehashed with the first of PASSWORD_HASHERS.
+"""
+import hashlib
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+from django.conf import settings
+from django.contrib.auth.hashers import check_password, make_password
+from django.core.cache import caches
+from rest_framework import status
+from rest_framework.exceptions import APIException, Throttled
+from rest_framework.throttling import BaseThrottle
+
+from .models import User
+
+DEFAULTS = {
+    'HASH_WORKERS': 2,
+    'HASH_QUEUE_SIZE': 16,
+    'HASH_TIMEOUT': 10.0,
+    # (attempts, window seconds)
+    'IP_RATE': (30, 60),
+    'ACCOUNT_FAILURE_RATE': (10, 15 * 60),
+    'CACHE_ALIAS': 'default',
+}
+IP_KEY = 'login:ip:{}'
+ACCOUNT_KEY = 'login:account:{}'
+
+
+class LoginBusy(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = 'Login is busy, please retry shortly.'
+    default_code = 'login_busy'
+    # Sent as Retry-After by DRF's exception handler.
+    wait = 1
+
+
+def config(name):
+    return getattr(settings, 'LOGIN', {}).get(name, DEFAULTS[name])
+
+
+def _cache():
+    return caches[config('CACHE_ALIAS')]
+
+
+# Throttling
+
+def _account_id(username):
+    # Usernames may be long or contain spaces, which some cache backends reject in keys.
+    return hashlib.sha256(username.casefold().encode()).hexdigest()[:32]
+
+
+def _bucket(template, ident, window):
+    """Cache key for the current fixed window and the seconds left in it."""
+    now = time.time()
+    return f'{template.format(ident)}:{int(now // window)}', window - now % window
+
+
+def _hit(key, window):
+    cache = _cache()
+    if cache.add(key, 1, window + 1):
+        return 1
+    try:
+        return cache.incr(key)
+    except ValueError:  # expired between add() and incr()
+        cache.set(key, 1, window + 1)
+        return 1
+
+
+def client_ip(request):
+    # Honours REST_FRAMEWORK['NUM_PROXIES'] like the DRF throttles.
+    return BaseThrottle().get_ident(request)
+
+
+def check_throttles(request, username):
+    """Count this attempt against the client's IP; raises Throttled if either limit is reached."""
+    limit, window = config('IP_RATE')
+    key, remaining = _bucket(IP_KEY, client_ip(request), window)
+    if _hit(key, window) > limit:
+        raise Throttled(wait=remaining, detail='Too many login attempts from this address.')
+
+    limit, window = config('ACCOUNT_FAILURE_RATE')
+    key, remaining = _bucket(ACCOUNT_KEY, _account_id(username), window)
+    if _cache().get(key, 0) >= limit:
+        raise Throttled(wait=remaining, detail='Too many failed login attempts for this account.')
+
+
+def record_failure(username):
+    window = config('ACCOUNT_FAILURE_RATE')[1]
+    _hit(_bucket(ACCOUNT_KEY, _account_id(username), window)[0], window)
+
+
+def reset_failures(username):
+    window = config('ACCOUNT_FAILURE_RATE')[1]
+    _cache().delete(_bucket(ACCOUNT_KEY, _account_id(username), window)[0])
+
+
+# Hashing pool
+
+_executor = None
+_admission = None
+_lock = threading.Lock()
+
+
+def _get_pool():
+    global _executor, _admission
+    with _lock:
+        if _admission is None:
+            workers = config('HASH_WORKERS')
+            if workers:
+                _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='login-hash')
+            _admission = threading.BoundedSemaphore(max(workers, 1) + config('HASH_QUEUE_SIZE'))
+    return _executor, _admission
+
+
+def _verify(password, encoded):
+    """(is_correct, new_encoded or None); runs on a pool thread, so it touches no Django models."""
+    if encoded is None:
+        # Unknown username: pay for one hash anyway, so response times don't reveal which accounts exist.
+        make_password(password)
+        return False, None
+    rehashed = []
+    # check_password calls the setter only for a correct password whose hash is outdated.
+    is_correct = check_password(password, encoded, setter=lambda raw: rehashed.append(make_password(raw)))
+    return is_correct, (rehashed[0] if rehashed else None)
+
+
+def _run(password, encoded):
+    executor, admission = _get_pool()
+    if not admission.acquire(blocking=False):
+        raise LoginBusy()
+    if executor is None:
+        try:
+            return _verify(password, encoded)
+        finally:
+            admission.release()
+    try:
+        future = executor.submit(_verify, password, encoded)
+    except Exception:
+        admission.release()
+        raise
+    # The slot is held until the hash finishes, even if this request stops waiting for it.
+    future.add_done_callback(lambda f: admission.release())
+    try:
+        return future.result(timeout=config('HASH_TIMEOUT'))
+    except FutureTimeout:
+        future.cancel()
+        raise LoginBusy()
+
+
+def authenticate_password(request, username, password):
+    """
+    The active user for ``username``/``password``, or None.
+
+    Raises Throttled, or LoginBusy when the hashing pool is full.
+    The user lookup and any rehash write stay on the request thread.
+    """
+    check_throttles(request, username)
+    user = User._default_manager.filter(**{User.USERNAME_FIELD: username}).first()
+    is_correct, new_encoded = _run(password, user.password if user else None)
+    if user is None or not is_correct or not user.is_active:
+        record_failure(username)
+        return None
+    reset_failures(username)
+    if new_encoded:
+        user.password = new_encoded
+        user.save(update_fields=['password'])
+    return user
@@ -0,0 +1,83 @@
+import json
+import statistics
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import Counter
+
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure login and unrelated-endpoint latency on a running server under a concurrent login storm. "
+        "The storm comes from one address, so start the server with LOGIN_IP_RATE raised."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='http://127.0.0.1:8000', help='Base URL of the running server')
+        parser.add_argument('--username', required=True)
+        parser.add_argument('--password', required=True)
+        parser.add_argument('--logins', type=int, default=16, help='Concurrent login clients')
+        parser.add_argument('--readers', type=int, default=4, help='Concurrent clients on the unrelated endpoint')
+        parser.add_argument('--path', default='/api/auth/profile/', help='Unrelated endpoint, requested with a bearer token')
+        parser.add_argument('--duration', type=float, default=15.0, help='Seconds to run')
+
+    def handle(self, *args, **options):
+        base = options['url'].rstrip('/')
+        credentials = json.dumps({'username': options['username'], 'password': options['password']}).encode()
+        status, body, _ = self.request(f'{base}/api/auth/login/', credentials)
+        if status != 200:
+            raise CommandError(f'Initial login failed with HTTP {status}')
+        token = json.loads(body)['access']
+
+        results = {'login': [], 'other': []}
+        stop = time.monotonic() + options['duration']
+
+        def worker(name, url, data, headers):
+            samples = []
+            while time.monotonic() < stop:
+                status, _, elapsed = self.request(url, data, headers)
+                samples.append((status, elapsed))
+            results[name].extend(samples)
+
+        threads = [
+            threading.Thread(target=worker, args=('login', f'{base}/api/auth/login/', credentials, {}))
+            for _ in range(options['logins'])
+        ] + [
+            threading.Thread(target=worker, args=('other', f"{base}{options['path']}", None,
+                                                  {'Authorization': f'Bearer {token}'}))
+            for _ in range(options['readers'])
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        for name, label in (('login', 'login'), ('other', options['path'])):
+            self.report(label, results[name], options['duration'])
+
+    def request(self, url, data=None, headers=None):
+        request = urllib.request.Request(url, data=data, headers={'Content-Type': 'application/json', **(headers or {})})
+        started = time.perf_counter()
+        try:
+            with urllib.request.urlopen(request, timeout=60) as response:
+                status, body = response.status, response.read()
+        except urllib.error.HTTPError as exc:
+            status, body = exc.code, exc.read()
+        except (urllib.error.URLError, OSError):
+            status, body = 'error', b''
+        return status, body, time.perf_counter() - started
+
+    def report(self, label, samples, duration):
+        if not samples:
+            self.stdout.write(f'{label}: no requests completed')
+            return
+        latencies = sorted(elapsed * 1000 for _, elapsed in samples)
+        p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+        statuses = ', '.join(f'{status}: {count}' for status, count in sorted(Counter(s for s, _ in samples).items(), key=str))
+        self.stdout.write(
+            f'{label}: {len(samples)} requests ({len(samples) / duration:.1f}/s), '
+            f'p50 {statistics.median(latencies):.0f} ms, p99 {p99:.0f} ms, max {latencies[-1]:.0f} ms [{statuses}]'
+        )
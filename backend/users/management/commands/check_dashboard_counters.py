@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from users.counters import rebuild_counters
+
+
+class Command(BaseCommand):
+    help = 'Recompute the materialized dashboard counters in bulk and repair any drift'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help='Users recomputed per batch (default: 500)')
+        parser.add_argument('--dry-run', action='store_true', help='Report drift without writing')
+
+    def handle(self, *args, **options):
+        checked, drifted = rebuild_counters(options['batch_size'], dry_run=options['dry_run'])
+        verb = 'found' if options['dry_run'] else 'repaired'
+        self.stdout.write(
+            self.style.SUCCESS(f'Checked {checked} users, {verb} {drifted} drifted counters')
+        )
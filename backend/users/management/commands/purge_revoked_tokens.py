@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from users.revocation import compact
+
+
+class Command(BaseCommand):
+    help = 'Delete revocation entries for refresh tokens that have expired'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Entries deleted per batch (default: 1000)')
+
+    def handle(self, *args, **options):
+        removed = compact(options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Purged {removed} expired revocation entries'))
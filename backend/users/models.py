@@ -28,3 +28,26 @@ class User(AbstractUser):
         related_name='custom_user_set',
         related_query_name='custom_user',
     )
+
+
+class DashboardCounters(models.Model):
+    """Per-user dashboard stats, kept current by the write-path signals in users.signals."""
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='dashboard_counters')
+    requests = models.IntegerField(default=0)
+    applications = models.IntegerField(default=0)
+    messages = models.IntegerField(default=0)
+    reviews = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+
+class MarketplaceCounters(models.Model):
+    """Singleton (pk=1) holding marketplace-wide stats such as open requests."""
+    open_requests = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+
+class RevokedToken(models.Model):
+    """A revoked refresh token, kept only until it would have expired anyway (see users.revocation)."""
+    jti = models.CharField(max_length=255, primary_key=True)
+    expires_at = models.DateTimeField(db_index=True)
+    revoked_at = models.DateTimeField(auto_now_add=True, db_index=True)
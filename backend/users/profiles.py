@@ -0,0 +1,41 @@
+"""
+The caller's role profile, resolved once per request.
+
+Views get the BuyerProfile or ProviderProfile of ``request.user`` through
+``get_role_profile`` instead of querying for it; the result (including "no
+profile") is kept on the underlying HttpRequest, so get_queryset, create,
+perform_create and the actions of one request share a single lookup. The
+cache dies with the request, which keeps it correct with the cached user
+from users.authentication and with force_authenticate in tests, where the
+same User instance is reused across requests.
+"""
+from django.apps import apps
+
+PROFILE_MODELS = {
+    'buyer': 'buyers.BuyerProfile',
+    'provider': 'providers.ProviderProfile',
+}
+
+
+def _request_cache(request):
+    http_request = getattr(request, '_request', request)
+    try:
+        return http_request._role_profiles
+    except AttributeError:
+        http_request._role_profiles = {}
+        return http_request._role_profiles
+
+
+def get_role_profile(request, role=None):
+    """The caller's profile for ``role`` (their own role by default), or None."""
+    user = request.user
+    if not user.is_authenticated:
+        return None
+    role = role or user.role
+    if role not in PROFILE_MODELS:
+        return None
+    cache = _request_cache(request)
+    if role not in cache:
+        model = apps.get_model(PROFILE_MODELS[role])
+        cache[role] = model.objects.filter(user=user).first()
+    return cache[role]
@@ -0,0 +1,138 @@
+"""
+Revocation store for refresh tokens, keyed by JTI.
+
+Only revoked tokens are recorded (at logout and when a refresh rotates the
+token), and only until they expire; ``compact`` purges the rest, so the
+table tracks recent revocations rather than every token ever issued.
+
+Each worker keeps a Bloom filter of the revoked JTIs. A token that misses
+the filter is accepted without touching the database; only possible hits
+are confirmed with a primary-key lookup. Workers learn about each other's
+revocations through a version counter in the shared cache: on a change
+they load just the rows revoked since their last sync. Compaction bumps an
+epoch that makes every worker rebuild its filter from the live rows. With
+a per-process cache (LocMem) workers also resync every SYNC_INTERVAL.
+"""
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.utils import timezone
+
+from core.bloom import BloomFilter
+
+from .models import RevokedToken
+
+DEFAULTS = {
+    'BLOOM_CAPACITY': 1_000_000,
+    'BLOOM_ERROR_RATE': 0.001,
+    'SYNC_INTERVAL': 30,
+    'CACHE_ALIAS': 'default',
+}
+VERSION_KEY = 'auth:revoked:version'
+EPOCH_KEY = 'auth:revoked:epoch'
+# Incremental syncs re-read this far back, covering clock skew between
+# workers and revocations that commit out of order.
+SYNC_LOOKBACK = timedelta(seconds=60)
+
+
+def config(name):
+    return getattr(settings, 'REFRESH_TOKEN_REVOCATION', {}).get(name, DEFAULTS[name])
+
+
+def _cache():
+    return caches[config('CACHE_ALIAS')]
+
+
+def _counter(key):
+    return _cache().get_or_set(key, 0, None)
+
+
+def _bump(key):
+    cache = _cache()
+    cache.add(key, 0, None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 1, None)
+
+
+class _State:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.filter = None
+        self.epoch = None
+        self.version = None
+        self.synced_at = None
+        self.monotonic = 0.0
+
+    def rebuild(self, epoch, version):
+        now = timezone.now()
+        rows = RevokedToken.objects.filter(expires_at__gt=now).values_list('jti', flat=True)
+        jtis = list(rows.iterator(chunk_size=10000))
+        capacity = config('BLOOM_CAPACITY')
+        while capacity < 2 * len(jtis):
+            capacity *= 2
+        bloom = BloomFilter(capacity, config('BLOOM_ERROR_RATE'))
+        for jti in jtis:
+            bloom.add(jti)
+        self.filter, self.epoch, self.version, self.synced_at = bloom, epoch, version, now
+
+    def catch_up(self, version):
+        now = timezone.now()
+        since = self.synced_at - SYNC_LOOKBACK
+        for jti in RevokedToken.objects.filter(revoked_at__gte=since).values_list('jti', flat=True).iterator():
+            if jti not in self.filter:
+                self.filter.add(jti)
+        self.version, self.synced_at = version, now
+
+    def sync(self):
+        epoch, version = _counter(EPOCH_KEY), _counter(VERSION_KEY)
+        stale = time.monotonic() - self.monotonic > config('SYNC_INTERVAL')
+        if self.filter is not None and epoch == self.epoch and version == self.version and not stale:
+            return
+        with self.lock:
+            if self.filter is None or epoch != self.epoch or self.filter.full:
+                self.rebuild(epoch, version)
+            else:
+                self.catch_up(version)
+            self.monotonic = time.monotonic()
+
+
+_state = _State()
+
+
+def revoke(jti, expires_at):
+    """Record ``jti`` as revoked until ``expires_at`` (an aware datetime)."""
+    if expires_at <= timezone.now():
+        return
+    RevokedToken.objects.bulk_create([RevokedToken(jti=jti, expires_at=expires_at)], ignore_conflicts=True)
+    with _state.lock:
+        if _state.filter is not None:
+            _state.filter.add(jti)
+    # Other workers must not sync before the row is visible to them.
+    transaction.on_commit(lambda: _bump(VERSION_KEY))
+
+
+def is_revoked(jti):
+    _state.sync()
+    if jti not in _state.filter:
+        return False
+    return RevokedToken.objects.filter(jti=jti).exists()
+
+
+def compact(batch_size=1000):
+    """Delete entries for tokens that have expired; returns how many were removed."""
+    now = timezone.now()
+    removed = 0
+    while True:
+        batch = list(RevokedToken.objects.filter(expires_at__lte=now).values_list('jti', flat=True)[:batch_size])
+        if not batch:
+            break
+        removed += RevokedToken.objects.filter(jti__in=batch).delete()[0]
+    if removed:
+        _bump(EPOCH_KEY)
+    return removed
@@ -1,6 +1,8 @@
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer as BaseTokenRefreshSerializer
 from .models import User
+from .tokens import RefreshToken
 
 User = get_user_model()
 
@@ -47,3 +49,8 @@ class UserRegistrationSerializer(serializers.ModelSerializer):
             )
         
         return user
+
+
+class TokenRefreshSerializer(BaseTokenRefreshSerializer):
+    # Rotation revokes the presented token through users.revocation
+    token_class = RefreshToken
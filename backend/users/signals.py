@@ -0,0 +1,117 @@
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from applications.models import Application
+from buyers.models import BuyerProfile
+from chat.models import MessageThread
+from providers.models import ProviderProfile
+from reviews.models import Review
+from service_requests.models import ServiceRequest
+
+from .authentication import invalidate_cached_user
+from .counters import OPEN_STATUS, bump, bump_open_requests
+from .models import User
+
+
+def _profile_user_id(model, profile_id):
+    return model.objects.filter(pk=profile_id).values_list('user_id', flat=True).first()
+
+
+def _application_user_ids(application):
+    buyer_user_id = (
+        ServiceRequest.objects.filter(pk=application.request_id)
+        .values_list('buyer__user_id', flat=True)
+        .first()
+    )
+    return [buyer_user_id, _profile_user_id(ProviderProfile, application.provider_id)]
+
+
+@receiver(pre_save, sender=ServiceRequest)
+def remember_request_status(sender, instance, **kwargs):
+    instance._previous_status = None
+    if instance.pk:
+        instance._previous_status = (
+            ServiceRequest.objects.filter(pk=instance.pk).values_list('status', flat=True).first()
+        )
+
+
+@receiver(post_save, sender=ServiceRequest)
+def count_service_request(sender, instance, created, **kwargs):
+    if created:
+        bump([_profile_user_id(BuyerProfile, instance.buyer_id)], 'requests')
+    was_open = getattr(instance, '_previous_status', None) == OPEN_STATUS
+    is_open = instance.status == OPEN_STATUS
+    if is_open != was_open:
+        bump_open_requests(1 if is_open else -1)
+
+
+@receiver(post_delete, sender=ServiceRequest)
+def uncount_service_request(sender, instance, **kwargs):
+    bump([_profile_user_id(BuyerProfile, instance.buyer_id)], 'requests', -1)
+    if instance.status == OPEN_STATUS:
+        bump_open_requests(-1)
+
+
+@receiver(post_save, sender=Application)
+def count_application(sender, instance, created, **kwargs):
+    if created:
+        bump(_application_user_ids(instance), 'applications')
+
+
+@receiver(post_delete, sender=Application)
+def uncount_application(sender, instance, **kwargs):
+    bump(_application_user_ids(instance), 'applications', -1)
+
+
+@receiver(m2m_changed, sender=MessageThread.participants.through)
+def count_thread_participants(sender, instance, action, reverse, pk_set, **kwargs):
+    if action == 'pre_clear':
+        if reverse:
+            instance._cleared_threads = {instance.pk: instance.messagethread_set.count()}
+        else:
+            instance._cleared_threads = dict.fromkeys(instance.participants.values_list('pk', flat=True), 1)
+        return
+    if action == 'post_clear':
+        changes = {user_id: -n for user_id, n in getattr(instance, '_cleared_threads', {}).items()}
+    elif action in ('post_add', 'post_remove'):
+        sign = 1 if action == 'post_add' else -1
+        if reverse:
+            changes = {instance.pk: sign * len(pk_set)}
+        else:
+            changes = dict.fromkeys(pk_set, sign)
+    else:
+        return
+    for user_id, delta in changes.items():
+        if delta:
+            bump([user_id], 'messages', delta)
+
+
+@receiver(pre_delete, sender=MessageThread)
+def remember_thread_participants(sender, instance, **kwargs):
+    # Deleting a thread drops its participant rows without an m2m_changed signal.
+    instance._deleted_participants = list(instance.participants.values_list('pk', flat=True))
+
+
+@receiver(post_delete, sender=MessageThread)
+def uncount_thread(sender, instance, **kwargs):
+    bump(getattr(instance, '_deleted_participants', ()), 'messages', -1)
+
+
+@receiver(post_save, sender=Review)
+def count_review(sender, instance, created, **kwargs):
+    if created:
+        bump([instance.reviewer_id, instance.reviewee_id], 'reviews')
+
+
+@receiver(post_delete, sender=Review)
+def uncount_review(sender, instance, **kwargs):
+    bump([instance.reviewer_id, instance.reviewee_id], 'reviews', -1)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def drop_cached_user(sender, instance, **kwargs):
+    # After commit, so a concurrent request can't re-cache the old row.
+    user_id = instance.pk
+    transaction.on_commit(lambda: invalidate_cached_user(user_id))
@@ -6,3 +6,228 @@ class UserModelTest(TestCase):
         user = User.objects.create(username='testuser', role='buyer')
         self.assertEqual(user.username, 'testuser')
         self.assertEqual(user.role, 'buyer')
+
+
+class DashboardCountersTest(TestCase):
+    def setUp(self):
+        from buyers.models import BuyerProfile
+        from providers.models import ProviderProfile
+        self.buyer = User.objects.create(username='dashbuyer', role='buyer')
+        self.provider = User.objects.create(username='dashprovider', role='provider')
+        self.buyer_profile = BuyerProfile.objects.create(user=self.buyer, company_name='TestCo', industry='Tech', contact_person_name='Alice')
+        self.provider_profile = ProviderProfile.objects.create(user=self.provider, base_location='Berlin', education='BSc', years_experience=5, hourly_rate_eur=50)
+
+    def create_activity(self):
+        from applications.models import Application
+        from chat.models import MessageThread
+        from reviews.models import Review
+        from service_requests.models import ServiceRequest
+        req = ServiceRequest.objects.create(buyer=self.buyer_profile, title='Test', machine_type='TypeA', serial_number='123', customer_company_name='TestCo', customer_address='Addr', contact_person_name='Alice', contact_email='alice@test.com', contact_phone='123', service_types=['repair'], issue_description='Issue', urgency='high', preferred_date='2025-08-21', budget_eur=100, payment_method='bank_transfer')
+        Application.objects.create(request=req, provider=self.provider_profile, pitch='Choose me')
+        thread = MessageThread.objects.create(request=req)
+        thread.participants.set([self.buyer, self.provider])
+        Review.objects.create(request=req, reviewer=self.buyer, reviewee=self.provider, role_of_reviewer='buyer', rating_overall=5)
+        return req
+
+    def dashboard(self, user):
+        from rest_framework.test import APIClient
+        client = APIClient()
+        client.force_authenticate(user)
+        return client.get('/api/dashboard/').json()['stats']
+
+    def test_counters_follow_write_paths(self):
+        req = self.create_activity()
+        self.create_activity()
+        self.assertEqual(self.dashboard(self.buyer), {'requests': 2, 'applications': 2, 'messages': 2, 'reviews': 2})
+        self.assertEqual(self.dashboard(self.provider), {'requests': 2, 'applications': 2, 'messages': 2, 'reviews': 2})
+
+        req.status = 'in_progress'
+        req.save()
+        req.messagethread_set.all().delete()
+        self.assertEqual(self.dashboard(self.provider)['requests'], 1)
+        self.assertEqual(self.dashboard(self.buyer)['messages'], 1)
+
+    def test_dashboard_is_a_single_read(self):
+        self.create_activity()
+        self.dashboard(self.buyer)
+        from rest_framework.test import APIClient
+        client = APIClient()
+        client.force_authenticate(self.buyer)
+        with self.assertNumQueries(1):
+            client.get('/api/dashboard/')
+
+    def test_consistency_check_repairs_drift(self):
+        from .counters import rebuild_counters
+        from .models import DashboardCounters
+        self.create_activity()
+        DashboardCounters.objects.filter(user=self.buyer).update(requests=42, reviews=0)
+        self.assertEqual(rebuild_counters(batch_size=1)[1], 1)
+        self.assertEqual(self.dashboard(self.buyer)['requests'], 1)
+        self.assertEqual(rebuild_counters(dry_run=True)[1], 0)
+
+
+class CachedJWTAuthenticationTest(TestCase):
+    def setUp(self):
+        from django.core.cache import cache
+        from rest_framework.test import APIClient
+        from rest_framework_simplejwt.tokens import RefreshToken
+        cache.clear()
+        self.user = User.objects.create_user(username='cached', password='secret123', role='buyer')
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(self.user).access_token}')
+
+    def test_user_is_served_from_cache_after_first_request(self):
+        with self.assertNumQueries(1):
+            self.assertEqual(self.client.get('/api/auth/profile/').json()['role'], 'buyer')
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get('/api/auth/profile/').json()['username'], 'cached')
+
+    def test_changes_invalidate_the_cache(self):
+        self.client.get('/api/auth/profile/')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.role = 'provider'
+            self.user.save()
+        self.assertEqual(self.client.get('/api/auth/profile/').json()['role'], 'provider')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.is_active = False
+            self.user.save()
+        self.assertEqual(self.client.get('/api/auth/profile/').status_code, 401)
+
+    def test_password_change_through_cached_user(self):
+        self.client.get('/api/auth/profile/')
+        response = self.client.post('/api/auth/change-password/', {'old_password': 'secret123', 'new_password': 'better456'})
+        self.assertEqual(response.status_code, 200)
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.check_password('better456'))
+        self.assertEqual(self.user.role, 'buyer')
+
+
+class LoginTest(TestCase):
+    def setUp(self):
+        from django.core.cache import cache
+        from rest_framework.test import APIClient
+        cache.clear()
+        self.user = User.objects.create_user(username='login', password='secret123', role='buyer')
+        self.client = APIClient()
+
+    def login(self, password='secret123', username='login'):
+        return self.client.post('/api/auth/login/', {'username': username, 'password': password})
+
+    def test_login_returns_tokens(self):
+        response = self.login()
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('access', response.json())
+        self.assertEqual(self.login('wrong').status_code, 401)
+        self.assertEqual(self.login(username='nobody').status_code, 401)
+
+    def test_outdated_hash_is_upgraded_on_login(self):
+        from django.contrib.auth.hashers import make_password
+        User.objects.filter(pk=self.user.pk).update(password=make_password('secret123', hasher='pbkdf2_sha1'))
+        self.assertEqual(self.login().status_code, 200)
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.password.startswith('pbkdf2_sha256$'))
+        self.assertEqual(self.login().status_code, 200)
+
+    def test_failed_attempts_lock_the_account(self):
+        from django.test import override_settings
+        with override_settings(LOGIN={'ACCOUNT_FAILURE_RATE': (2, 60)}):
+            self.assertEqual(self.login('wrong').status_code, 401)
+            self.assertEqual(self.login('wrong').status_code, 401)
+            response = self.login()
+        self.assertEqual(response.status_code, 429)
+        self.assertIn('Retry-After', response)
+
+    def test_attempts_are_limited_per_ip(self):
+        from django.test import override_settings
+        with override_settings(LOGIN={'IP_RATE': (1, 60)}):
+            self.assertEqual(self.login().status_code, 200)
+            self.assertEqual(self.login().status_code, 429)
+
+    def test_changing_forwarded_for_does_not_reset_the_ip_bucket(self):
+        from django.conf import settings
+        from django.test import override_settings
+        # Unset, DRF keys throttles on the raw header, which the client controls.
+        self.assertIsNotNone(settings.REST_FRAMEWORK.get('NUM_PROXIES'))
+        for num_proxies in (0, 1):
+            with override_settings(LOGIN={'IP_RATE': (2, 60)},
+                                   REST_FRAMEWORK={**settings.REST_FRAMEWORK, 'NUM_PROXIES': num_proxies}):
+                statuses = [
+                    self.client.post('/api/auth/login/', {'username': 'login', 'password': 'secret123'},
+                                     REMOTE_ADDR='10.0.0.1', HTTP_X_FORWARDED_FOR=f'198.51.100.{i}, 203.0.113.{num_proxies}').status_code
+                    for i in range(3)
+                ]
+            self.assertEqual(statuses, [200, 200, 429])
+
+    def test_full_hashing_pool_turns_logins_away(self):
+        import threading
+        from unittest import mock
+        exhausted = threading.BoundedSemaphore(1)
+        exhausted.acquire()
+        with mock.patch('users.login._get_pool', return_value=(None, exhausted)):
+            response = self.login()
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response['Retry-After'], '1')
+
+
+class RefreshTokenRevocationTest(TestCase):
+    def setUp(self):
+        from django.core.cache import cache
+        from rest_framework.test import APIClient
+        from .tokens import RefreshToken
+        cache.clear()
+        self.user = User.objects.create_user(username='revoke', password='secret123', role='buyer')
+        self.refresh = RefreshToken.for_user(self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.refresh.access_token}')
+
+    def refresh_with(self, token):
+        return self.client.post('/api/auth/token/refresh/', {'refresh': str(token)})
+
+    def test_logout_revokes_the_refresh_token(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post('/api/auth/logout/', {'refresh': str(self.refresh)})
+        self.assertEqual(response.status_code, 205)
+        self.assertEqual(self.refresh_with(self.refresh).status_code, 401)
+
+    def test_logout_rejects_someone_elses_token(self):
+        from .tokens import RefreshToken
+        other = User.objects.create_user(username='other', password='secret123', role='buyer')
+        response = self.client.post('/api/auth/logout/', {'refresh': str(RefreshToken.for_user(other))})
+        self.assertEqual(response.status_code, 400)
+
+    def test_rotation_revokes_the_used_token(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.refresh_with(self.refresh)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.refresh_with(response.json()['refresh']).status_code, 200)
+        self.assertEqual(self.refresh_with(self.refresh).status_code, 401)
+
+    def test_unrevoked_tokens_skip_the_database(self):
+        from . import revocation
+        revocation.is_revoked('warm-up')
+        with self.assertNumQueries(0):
+            self.assertFalse(revocation.is_revoked('never-revoked'))
+
+    def test_workers_pick_up_revocations_through_the_cache(self):
+        from datetime import timedelta
+        from django.utils import timezone
+        from . import revocation
+        from .models import RevokedToken
+        revocation.is_revoked('warm-up')
+        # Written by another worker: the row exists and the shared version moved on.
+        RevokedToken.objects.create(jti='elsewhere', expires_at=timezone.now() + timedelta(days=1))
+        revocation._bump(revocation.VERSION_KEY)
+        self.assertTrue(revocation.is_revoked('elsewhere'))
+
+    def test_compaction_purges_expired_entries(self):
+        from datetime import timedelta
+        from django.utils import timezone
+        from . import revocation
+        from .models import RevokedToken
+        now = timezone.now()
+        RevokedToken.objects.create(jti='expired', expires_at=now - timedelta(minutes=1))
+        RevokedToken.objects.create(jti='live', expires_at=now + timedelta(days=1))
+        self.assertEqual(revocation.compact(batch_size=1), 1)
+        self.assertEqual(list(RevokedToken.objects.values_list('jti', flat=True)), ['live'])
+        self.assertTrue(revocation.is_revoked('live'))
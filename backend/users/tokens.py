@@ -0,0 +1,24 @@
+"""
+Refresh tokens checked against the revocation store in users.revocation.
+
+Used in place of simplejwt's RefreshToken, whose blacklist support needs
+the token_blacklist app and its table of every outstanding token.
+"""
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken as BaseRefreshToken
+from rest_framework_simplejwt.utils import datetime_from_epoch
+
+from . import revocation
+
+
+class RefreshToken(BaseRefreshToken):
+    def verify(self, *args, **kwargs):
+        super().verify(*args, **kwargs)
+        if revocation.is_revoked(self.payload[api_settings.JTI_CLAIM]):
+            raise TokenError(_('Token is blacklisted'))
+
+    def blacklist(self):
+        """Revoke this token; the refresh serializer also calls this when rotating."""
+        revocation.revoke(self.payload[api_settings.JTI_CLAIM], datetime_from_epoch(self.payload['exp']))
@@ -3,12 +3,12 @@ from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
-from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt.settings import api_settings
 from rest_framework_simplejwt.views import TokenRefreshView as BaseTokenRefreshView
-from django.contrib.auth import authenticate
-from django.db.models import Count, Q
+from .login import authenticate_password
 from .models import User
 from .serializers import UserSerializer, UserRegistrationSerializer
+from .tokens import RefreshToken
 
 class RegisterView(generics.CreateAPIView):
     queryset = User.objects.all()
@@ -21,8 +21,11 @@ class LoginView(APIView):
     def post(self, request):
         username = request.data.get('username')
         password = request.data.get('password')
+        if not isinstance(username, str) or not isinstance(password, str) or not username:
+            return Response({'error': 'Invalid credentials'}, status=status.HTTP_401_UNAUTHORIZED)
         
-        user = authenticate(username=username, password=password)
+        # Hashing runs in a bounded pool behind per-IP/account throttles (users.login)
+        user = authenticate_password(request, username, password)
         if user:
             refresh = RefreshToken.for_user(user)
             return Response({
@@ -39,6 +42,8 @@ class LogoutView(APIView):
         try:
             refresh_token = request.data["refresh"]
             token = RefreshToken(refresh_token)
+            if str(token.get(api_settings.USER_ID_CLAIM)) != str(request.user.pk):
+                return Response(status=status.HTTP_400_BAD_REQUEST)
             token.blacklist()
             return Response(status=status.HTTP_205_RESET_CONTENT)
         except Exception as e:
@@ -80,64 +85,21 @@ class DashboardView(APIView):
     permission_classes = [IsAuthenticated]
     
     def get(self, request):
+        from .counters import get_counters, get_open_requests
         user = request.user
         
-        # Initialize stats
+        # Materialized counters, kept current by users.signals
+        counters = get_counters(user)
         stats = {
-            'requests': 0,
-            'applications': 0,
-            'messages': 0,
-            'reviews': 0
+            'requests': counters.requests,
+            'applications': counters.applications,
+            'messages': counters.messages,
+            'reviews': counters.reviews
         }
         
-        # Calculate stats based on user role
-        if user.role == 'buyer':
-            # For buyers: count their service requests and applications received
-            from service_requests.models import ServiceRequest
-            from applications.models import Application
-            from buyers.models import BuyerProfile
-            
-            try:
-                buyer_profile = BuyerProfile.objects.get(user=user)
-                stats['requests'] = ServiceRequest.objects.filter(buyer=buyer_profile).count()
-                stats['applications'] = Application.objects.filter(
-                    request__buyer=buyer_profile
-                ).count()
-            except BuyerProfile.DoesNotExist:
-                stats['requests'] = 0
-                stats['applications'] = 0
-            
-        elif user.role == 'provider':
-            # For providers: count available requests and their applications
-            from service_requests.models import ServiceRequest
-            from applications.models import Application
-            from providers.models import ProviderProfile
-            
-            stats['requests'] = ServiceRequest.objects.filter(status='open').count()
-            
-            try:
-                provider_profile = ProviderProfile.objects.get(user=user)
-                stats['applications'] = Application.objects.filter(provider=provider_profile).count()
-            except ProviderProfile.DoesNotExist:
-                stats['applications'] = 0
-        
-        # Count messages (conversations)
-        try:
-            from chat.models import Conversation
-            stats['messages'] = Conversation.objects.filter(
-                participants=user
-            ).count()
-        except:
-            stats['messages'] = 0
-        
-        # Count reviews
-        try:
-            from reviews.models import Review
-            stats['reviews'] = Review.objects.filter(
-                Q(reviewer=user) | Q(reviewed_user=user)
-            ).count()
-        except:
-            stats['reviews'] = 0
+        # Providers see the marketplace-wide number of open requests
+        if user.role == 'provider':
+            stats['requests'] = get_open_requests()
         
         # Recent activity (simplified for now)
         recent_activity = []